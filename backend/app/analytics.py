@@ -0,0 +1,247 @@
+# backend/app/analytics.py
+"""
+Consultas analíticas de vendas: período, granularidade (dia/semana/mês),
+agrupamento por produto ou categoria, top-N e médias móveis.
+
+Toda a agregação roda no banco. A fonte padrão é a tabela de agregados
+diários (sales_daily), então o custo depende do número de dias × grupos no
+período, não do número de vendas; source="sales" lê direto a tabela de
+vendas (útil para conferência). Os períodos usam date/strftime no SQLite e
+date_trunc no Postgres e são identificados pela data de início
+('YYYY-MM-DD'; semanas começam na segunda-feira).
+
+As funções aqui só montam os SELECTs e o resultado; quem executa é
+app/crud_async.py (mesmo padrão das demais consultas de leitura).
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Optional
+
+from sqlalchemy import Date, Float, Integer, cast, extract, func, literal, literal_column, select, type_coerce
+
+from app import models
+from app.money import Money
+
+# Métricas gravadas em centavos (tipo Money): AVG delas também volta em centavos
+MONEY_METRICS = ("total_sales", "profit")
+
+@dataclass
+class AnalyticsParams:
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None       # inclusivo
+    granularity: str = "month"
+    group_by: str = "none"
+    metric: str = "total_sales"           # métrica do ranking e da média móvel
+    top: Optional[int] = None
+    moving_average: Optional[int] = None  # janela, em períodos
+    source: str = "rollup"
+
+
+@dataclass
+class AnalyticsQueries:
+    totals: object
+    series: object
+    groups: object = None
+
+
+# --- Fonte dos dados ---
+def _source(params: AnalyticsParams, dialect: str):
+    """
+    Retorna (dia, chaves de agrupamento, métricas, FROM, filtros) da fonte escolhida.
+    As métricas são expressões somadas por período/grupo.
+    """
+    if params.source == "rollup":
+        daily = models.DailySales
+        filters = []
+        if params.start_date:
+            filters.append(daily.day >= params.start_date)
+        if params.end_date:
+            filters.append(daily.day <= params.end_date)
+        metrics = {
+            "sale_count": daily.sale_count,
+            "quantity": daily.quantity,
+            "total_sales": daily.total_sales,
+            "profit": daily.profit,
+        }
+        keys = {"product": daily.product_id, "category": daily.category_id}
+        return daily.day, keys, metrics, daily.__table__, filters
+
+    sale = models.Sale
+    filters = []
+    # Filtra pela coluna indexada (sales.date), não pela expressão do dia
+    if params.start_date:
+        filters.append(sale.date >= datetime.combine(params.start_date, time.min))
+    if params.end_date:
+        filters.append(sale.date < datetime.combine(params.end_date + timedelta(days=1), time.min))
+    metrics = {
+        "sale_count": literal(1),
+        "quantity": sale.quantity,
+        "total_sales": sale.total_price,
+        "profit": sale.profit,
+    }
+    keys = {"product": sale.product_id, "category": models.Product.category_id}
+    source = sale.__table__.outerjoin(models.Product.__table__, sale.product_id == models.Product.id)
+    day = cast(sale.date, Date) if dialect == "postgresql" else func.date(sale.date)
+    return day, keys, metrics, source, filters
+
+
+def _const(value: str):
+    """
+    Constante inline no SQL (valores fixos deste módulo, nunca entrada do usuário):
+    com parâmetros, o Postgres não reconhece a expressão do SELECT no GROUP BY.
+    """
+    return literal_column(f"'{value}'")
+
+
+def _period(day, granularity: str, dialect: str):
+    """Expressão SQL com o início do período, como texto 'YYYY-MM-DD'."""
+    if dialect == "postgresql":
+        if granularity == "day":
+            return func.to_char(day, _const("YYYY-MM-DD"))
+        return func.to_char(func.date_trunc(_const(granularity), day), _const("YYYY-MM-DD"))
+
+    # SQLite: 'weekday 0' avança até o domingo; -6 dias volta à segunda-feira
+    if granularity == "week":
+        return func.date(day, _const("weekday 0"), _const("-6 days"))
+    if granularity == "month":
+        return func.strftime(_const("%Y-%m-01"), day)
+    return func.date(day)
+
+
+def _period_index(period, granularity: str, dialect: str):
+    """
+    Número inteiro do período (dias, semanas ou meses desde uma origem fixa):
+    períodos consecutivos diferem em 1, mesmo que não haja vendas entre eles.
+    """
+    if dialect == "postgresql":
+        start = func.to_date(period, _const("YYYY-MM-DD"))
+        days = start - cast(_const("1970-01-01"), Date)
+    else:
+        start = period
+        days = cast(func.julianday(period), Integer)
+    if granularity == "month":
+        return cast(extract("year", start) * 12 + extract("month", start), Integer)
+    if granularity == "week":
+        return cast(days // 7, Integer)
+    return days
+
+
+def _moving_average(params: AnalyticsParams, ranked, key, period, dialect: str):
+    """
+    Média móvel de `params.moving_average` períodos de calendário: a janela é
+    RANGE sobre o número do período, então períodos sem vendas contam como zero
+    (Jan = 10, Mar = 10 e janela 2 dão 5 em março). No começo da série a média
+    usa só os períodos já decorridos desde o primeiro (ou desde start_date).
+    """
+    window = params.moving_average
+    index = _period_index(period, params.granularity, dialect)
+    total = func.sum(ranked).over(partition_by=key, order_by=index, range_=(-(window - 1), 0))
+    if params.start_date:
+        first = _period_index(
+            _period(literal(params.start_date, Date), params.granularity, dialect),
+            params.granularity, dialect,
+        )
+    else:
+        first = func.min(index).over()
+    least = func.least if dialect == "postgresql" else func.min
+    periods = least(window, index - first + 1)
+    return cast(total, Float) / cast(periods, Float)
+
+
+def build_queries(params: AnalyticsParams, dialect: str) -> AnalyticsQueries:
+    """Monta os SELECTs de totais, série por período e ranking dos grupos."""
+    day, keys, metrics, source, filters = _source(params, dialect)
+    sums = [func.coalesce(func.sum(expr), 0).label(name) for name, expr in metrics.items()]
+    ranked = func.sum(metrics[params.metric])
+    key = keys.get(params.group_by)
+
+    totals = select(*sums).select_from(source).where(*filters)
+
+    groups = None
+    series_filters = list(filters)
+    if key is not None:
+        groups = (
+            select(key.label("key"), *sums)
+            .select_from(source)
+            .where(*filters)
+            .group_by(key)
+            .order_by(ranked.desc(), key)
+        )
+        if params.top:
+            groups = groups.limit(params.top)
+            # A série fica restrita aos N primeiros grupos (subconsulta no próprio banco)
+            top_keys = (
+                select(key).select_from(source).where(*filters)
+                .group_by(key).order_by(ranked.desc(), key).limit(params.top)
+                .correlate(None)
+            )
+            series_filters.append(key.in_(top_keys))
+
+    period = _period(day, params.granularity, dialect)
+    group_columns = [period] + ([key] if key is not None else [])
+    columns = [period.label("period")] + ([key.label("key")] if key is not None else []) + sums
+    if params.moving_average:
+        moving_average = _moving_average(params, ranked, key, period, dialect)
+        if params.metric in MONEY_METRICS:
+            # A soma vira float na divisão: sem o Money, a média sairia em centavos
+            moving_average = type_coerce(moving_average, Money)
+        columns.append(moving_average.label("moving_average"))
+
+    series = (
+        select(*columns)
+        .select_from(source)
+        .where(*series_filters)
+        .group_by(*group_columns)
+        .order_by(*group_columns)
+    )
+    return AnalyticsQueries(totals=totals, series=series, groups=groups)
+
+
+def names_query(group_by: str, keys):
+    """Nomes dos produtos/categorias presentes no resultado."""
+    model = models.Product if group_by == "product" else models.Category
+    return select(model.id, model.name).where(model.id.in_(keys))
+
+
+# --- Montagem do resultado ---
+def _metrics(row) -> dict:
+    return {
+        "sale_count": int(row.sale_count or 0),
+        "quantity": int(row.quantity or 0),
+        "total_sales": float(row.total_sales or 0),
+        "profit": float(row.profit or 0),
+    }
+
+
+def group_keys(series_rows, group_rows) -> set:
+    keys = {row.key for row in group_rows or []}
+    keys.update(row.key for row in series_rows if "key" in row._fields)
+    keys.discard(None)
+    return keys
+
+
+def analytics_result(params: AnalyticsParams, totals_row, series_rows, group_rows, names: dict) -> dict:
+    grouped = params.group_by != "none"
+    series = []
+    for row in series_rows:
+        point = {"period": str(row.period), **_metrics(row)}
+        if grouped:
+            point["key"] = row.key
+            point["name"] = names.get(row.key)
+        if params.moving_average:
+            point["moving_average"] = float(row.moving_average) if row.moving_average is not None else None
+        series.append(point)
+
+    return {
+        "start_date": params.start_date,
+        "end_date": params.end_date,
+        "granularity": params.granularity,
+        "group_by": params.group_by,
+        "metric": params.metric,
+        "source": params.source,
+        "totals": _metrics(totals_row),
+        "groups": [
+            {"key": row.key, "name": names.get(row.key), **_metrics(row)} for row in group_rows or []
+        ],
+        "series": series,
+    }
@@ -0,0 +1,366 @@
+# backend/app/archive.py
+"""
+Histórico de vendas por mês: arquivamento dos meses fechados e partições
+nativas no Postgres.
+
+Arquivamento (SQLite e Postgres): os meses anteriores aos últimos
+ARCHIVE_KEEP_MONTHS saem de `sales` para um arquivo Parquet por mês em
+ARCHIVE_DIR (schema da exportação de vendas, zstd) e entram no catálogo
+sales_archives com os totais, o intervalo de IDs e o sha256 do arquivo. Os
+agregados do mês em sales_daily ficam como resumo somente leitura: dashboard
+e analytics (fonte rollup) não mudam e o rollup.rebuild os preserva. A
+exportação de vendas abre só os arquivos dos meses do período pedido.
+
+Partições (Postgres): `partition` converte sales numa tabela particionada
+por mês (RANGE em date, mais uma partição DEFAULT para datas nulas ou meses
+sem partição). Consultas com período (listagem, exportações) leem só as
+partições do período, e arquivar um mês vira DETACH + DROP da partição em
+vez de DELETE. As partições do mês atual e dos próximos
+PARTITION_MONTHS_AHEAD meses são criadas na subida da API e a cada `run`.
+O SQLite não tem particionamento nativo: lá o índice ix_sales_date restringe
+as consultas por período e o arquivamento mantém em `sales` só os meses abertos.
+
+Vendas que chegarem depois para um mês arquivado entram em `sales` (e nos
+agregados) normalmente; o próximo `run` as junta ao arquivo do mês.
+
+Uso: python -m app.archive [run [--keep-months N] [--dry-run] | list | restore YYYY-MM | partition]
+"""
+import argparse
+import hashlib
+import os
+import sys
+from datetime import date, datetime, time
+
+from sqlalchemy import delete, func, insert, select, text
+from sqlalchemy.orm import Session
+
+from app import cache, crud, exports, models
+
+ARCHIVE_DIR = os.getenv("ARCHIVE_DIR", "./archive")
+ARCHIVE_KEEP_MONTHS = int(os.getenv("ARCHIVE_KEEP_MONTHS", "12"))
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+
+DEFAULT_PARTITION = "sales_pdefault"
+
+
+class ArchiveChanged(Exception):
+    """O mês recebeu vendas enquanto era arquivado (nada foi removido; rode de novo)."""
+
+
+# --- Meses ---
+def month_start(value) -> date:
+    return date(value.year, value.month, 1)
+
+
+def next_month(day: date) -> date:
+    return date(day.year + day.month // 12, day.month % 12 + 1, 1)
+
+
+def add_months(day: date, months: int) -> date:
+    index = day.year * 12 + day.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_key(day: date) -> str:
+    return day.strftime('%Y-%m')
+
+
+def parse_month(text_value: str) -> date:
+    return datetime.strptime(text_value, '%Y-%m').date()
+
+
+def _bounds(day: date):
+    """Período do mês em datas com hora: [início, início do mês seguinte)."""
+    return datetime.combine(day, time.min), datetime.combine(next_month(day), time.min)
+
+
+# --- Partições nativas (Postgres) ---
+def _partition_name(day: date) -> str:
+    return f"sales_p{day:%Y_%m}"
+
+
+def is_partitioned(conn) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return conn.execute(text(
+        "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('sales'))"
+    )).scalar()
+
+
+def _partition_exists(conn, day: date) -> bool:
+    return conn.execute(
+        text("SELECT to_regclass(:name) IS NOT NULL"), {"name": _partition_name(day)}
+    ).scalar()
+
+
+def _create_partition(conn, day: date) -> bool:
+    """
+    Cria a partição do mês (idempotente). Vendas do mês que já estejam na
+    partição DEFAULT são movidas para ela antes do ATTACH.
+    """
+    if _partition_exists(conn, day):
+        return False
+    name, start, end = _partition_name(day), day.isoformat(), next_month(day).isoformat()
+    conn.execute(text(f"CREATE TABLE {name} (LIKE sales INCLUDING DEFAULTS)"))
+    conn.execute(text(
+        f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE date >= '{start}' AND date < '{end}' RETURNING *) "
+        f"INSERT INTO {name} SELECT * FROM moved"
+    ))
+    conn.execute(text(f"ALTER TABLE sales ATTACH PARTITION {name} FOR VALUES FROM ('{start}') TO ('{end}')"))
+    return True
+
+
+def _archived_keys(conn) -> set:
+    return set(conn.execute(select(models.SalesArchive.month)).scalars())
+
+
+def ensure_partitions(conn, months_ahead: int = PARTITION_MONTHS_AHEAD) -> list:
+    """Partições do mês atual e dos próximos meses. Só age no Postgres já particionado."""
+    if not is_partitioned(conn):
+        return []
+    archived = _archived_keys(conn)
+    created = []
+    day = month_start(datetime.utcnow())
+    for _ in range(months_ahead + 1):
+        if month_key(day) not in archived and _create_partition(conn, day):
+            created.append(_partition_name(day))
+        day = next_month(day)
+    return created
+
+
+def partition_postgres(conn, months_ahead: int = PARTITION_MONTHS_AHEAD) -> int:
+    """
+    Converte sales numa tabela particionada por mês, copiando as vendas
+    (na transação de `conn`). A chave primária vira um índice em id: no
+    Postgres, uma chave única de tabela particionada teria de incluir date.
+    Retorna o número de partições mensais criadas (0 se já estava particionada).
+    """
+    if conn.dialect.name != "postgresql":
+        raise RuntimeError("Partições nativas só existem no Postgres (no SQLite, use o arquivamento).")
+    if is_partitioned(conn):
+        return 0
+
+    sequence = conn.execute(text("SELECT pg_get_serial_sequence('sales', 'id')")).scalar()
+    first, last = conn.execute(text("SELECT min(date), max(date) FROM sales")).one()
+
+    conn.execute(text("ALTER TABLE sales RENAME TO sales_unpartitioned"))
+    conn.execute(text("CREATE TABLE sales (LIKE sales_unpartitioned INCLUDING DEFAULTS) PARTITION BY RANGE (date)"))
+    conn.execute(text(f"CREATE TABLE {DEFAULT_PARTITION} PARTITION OF sales DEFAULT"))
+
+    archived = _archived_keys(conn)
+    current = month_start(datetime.utcnow())
+    day = month_start(first) if first is not None else current
+    end = add_months(max(current, month_start(last) if last is not None else current), months_ahead)
+    created = 0
+    while day <= end:
+        if month_key(day) not in archived:
+            _create_partition(conn, day)
+            created += 1
+        day = next_month(day)
+
+    conn.execute(text("INSERT INTO sales SELECT * FROM sales_unpartitioned"))
+    if sequence:
+        # A sequência do id passa para a tabela nova (senão cairia junto com a antiga)
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY sales.id"))
+    conn.execute(text("DROP TABLE sales_unpartitioned"))
+
+    # Índices e FK no pai valem para todas as partições (atuais e futuras)
+    conn.execute(text("CREATE INDEX ix_sales_id ON sales (id)"))
+    conn.execute(text("CREATE INDEX ix_sales_date ON sales (date)"))
+    conn.execute(text("CREATE INDEX ix_sales_product_id_date ON sales (product_id, date)"))
+    conn.execute(text("ALTER TABLE sales ADD FOREIGN KEY (product_id) REFERENCES products (id)"))
+    return created
+
+
+# --- Arquivamento ---
+def closed_months(db: Session, keep_months: int = ARCHIVE_KEEP_MONTHS) -> list:
+    """Meses com vendas em `sales` anteriores aos últimos `keep_months` (o atual nunca entra)."""
+    cutoff = add_months(month_start(datetime.utcnow()), -max(keep_months, 0))
+    cutoff_at = datetime.combine(cutoff, time.min)
+    first = db.execute(select(func.min(models.Sale.date)).where(models.Sale.date < cutoff_at)).scalar()
+    months = []
+    day = month_start(first) if first is not None else cutoff
+    while day < cutoff:
+        start, end = _bounds(day)
+        has_sales = db.execute(
+            select(models.Sale.id).where(models.Sale.date >= start, models.Sale.date < end).limit(1)
+        ).first()
+        if has_sales:
+            months.append(day)
+        day = next_month(day)
+    return months
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _remove_sales(db: Session, day: date, max_id: int) -> int:
+    """Tira de `sales` as vendas do mês já gravadas no arquivo. Retorna quantas saíram."""
+    conn = db.connection()
+    if is_partitioned(conn) and _partition_exists(conn, day):
+        name = _partition_name(day)
+        # Com a partição travada, nada entra no mês até o DETACH
+        conn.execute(text(f"LOCK TABLE {name} IN ACCESS EXCLUSIVE MODE"))
+        count, newest = conn.execute(text(f"SELECT count(*), max(id) FROM {name}")).one()
+        if newest is None or newest <= max_id:
+            conn.execute(text(f"ALTER TABLE sales DETACH PARTITION {name}"))
+            conn.execute(text(f"DROP TABLE {name}"))
+            # Vendas do mês que tenham caído na DEFAULT saem pelo DELETE abaixo
+            return count + _delete_range(db, day, max_id)
+    return _delete_range(db, day, max_id)
+
+
+def _delete_range(db: Session, day: date, max_id: int) -> int:
+    start, end = _bounds(day)
+    return db.execute(
+        delete(models.Sale).where(models.Sale.date >= start, models.Sale.date < end, models.Sale.id <= max_id),
+        execution_options={"synchronize_session": False},
+    ).rowcount
+
+
+def archive_month(db: Session, day: date, archive_dir: str = ARCHIVE_DIR) -> dict:
+    """
+    Arquiva um mês: grava o Parquet (junto com o arquivo anterior do mês, se
+    houver), registra no catálogo e remove as vendas de `sales`, tudo numa
+    transação. Se o número de vendas removidas não bater com o gravado (uma
+    venda entrou no meio), nada é removido e ArchiveChanged é lançada.
+    Retorna o resumo do mês, ou None quando não há vendas novas para arquivar.
+    """
+    if not exports.ARROW_AVAILABLE:
+        raise RuntimeError("O arquivamento grava Parquet e requer o pyarrow (pip install pyarrow).")
+
+    key = month_key(day)
+    start, end = _bounds(day)
+    record = db.get(models.SalesArchive, key)
+    previous = os.path.join(archive_dir, record.path) if record is not None else None
+    archived_before = record.sale_count if record is not None else 0
+
+    os.makedirs(archive_dir, exist_ok=True)
+    # Nome novo a cada execução: o arquivo anterior só sai depois do commit
+    filename = f"sales-{key}-{datetime.utcnow():%Y%m%d%H%M%S%f}.parquet"
+    path = os.path.join(archive_dir, filename)
+    try:
+        totals = exports.write_sales_parquet(
+            path, crud.iter_sales_export(db, since_date=start, before_date=end), previous=previous
+        )
+        added = totals["sale_count"] - archived_before
+        if added <= 0:
+            os.remove(path)
+            db.rollback()
+            return None
+
+        removed = _remove_sales(db, day, totals["max_id"])
+        if removed != added:
+            raise ArchiveChanged(f"{key}: {added} vendas gravadas, {removed} removidas.")
+
+        if record is None:
+            record = models.SalesArchive(month=key, starts_on=day, ends_before=next_month(day))
+            db.add(record)
+        record.path = filename
+        record.sale_count = totals["sale_count"]
+        record.quantity = totals["quantity"]
+        record.total_sales = totals["total_sales"]
+        record.profit = totals["profit"]
+        record.min_id = totals["min_id"]
+        record.max_id = totals["max_id"]
+        record.size_bytes = os.path.getsize(path)
+        record.sha256 = _sha256(path)
+        record.archived_at = datetime.utcnow()
+        db.commit()
+    except Exception:
+        db.rollback()
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+
+    if previous is not None and os.path.exists(previous):
+        os.remove(previous)
+    cache.invalidate(cache.SALES)
+    return {"month": key, "archived": added, "sale_count": record.sale_count,
+            "file": filename, "size_bytes": record.size_bytes}
+
+
+def archive_closed(db: Session, keep_months: int = ARCHIVE_KEEP_MONTHS, archive_dir: str = ARCHIVE_DIR) -> list:
+    """Arquiva todos os meses fechados (um mês por transação). Retorna os resumos."""
+    results = []
+    for day in closed_months(db, keep_months):
+        summary = archive_month(db, day, archive_dir)
+        if summary is not None:
+            results.append(summary)
+    ensure_partitions(db.connection())
+    db.commit()
+    return results
+
+
+def restore_month(db: Session, key: str, archive_dir: str = ARCHIVE_DIR) -> int:
+    """
+    Devolve as vendas de um mês arquivado para `sales` (com os IDs originais)
+    e remove o arquivo. Os agregados não mudam: já contavam essas vendas.
+    """
+    record = db.get(models.SalesArchive, key)
+    if record is None:
+        raise ValueError(f"Mês {key} não está arquivado.")
+    path = os.path.join(archive_dir, record.path)
+
+    conn = db.connection()
+    if is_partitioned(conn):
+        _create_partition(conn, record.starts_on)
+    restored = 0
+    for batch in exports.iter_parquet_sales(path):
+        db.execute(insert(models.Sale), [
+            {"id": sale_id, "product_id": product_id, "quantity": quantity,
+             "total_price": total_price, "profit": profit, "date": sale_date}
+            for sale_id, product_id, _, quantity, total_price, profit, sale_date in batch
+        ])
+        restored += len(batch)
+    db.delete(record)
+    db.commit()
+    os.remove(path)
+    cache.invalidate(cache.SALES)
+    return restored
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Arquivamento mensal e partições de vendas")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_parser = commands.add_parser("run", help="Arquiva os meses fechados")
+    run_parser.add_argument("--keep-months", type=int, default=ARCHIVE_KEEP_MONTHS,
+                            help="Meses fechados mantidos em sales (além do atual)")
+    run_parser.add_argument("--dry-run", action="store_true", help="Só lista os meses que seriam arquivados")
+    commands.add_parser("list", help="Meses arquivados")
+    restore_parser = commands.add_parser("restore", help="Devolve um mês arquivado para sales")
+    restore_parser.add_argument("month", help="YYYY-MM")
+    commands.add_parser("partition", help="Converte sales em tabela particionada por mês (Postgres)")
+    args = parser.parse_args()
+
+    from app import migrations
+    from app.database import SessionLocal, engine
+    migrations.upgrade(engine)
+
+    if args.command == "partition":
+        with engine.begin() as connection:
+            print(f"Partições mensais criadas: {partition_postgres(connection)}")
+        sys.exit(0)
+
+    session = SessionLocal()
+    try:
+        if args.command == "run" and args.dry_run:
+            for month in closed_months(session, args.keep_months):
+                print(month_key(month))
+        elif args.command == "run":
+            for summary in archive_closed(session, args.keep_months):
+                print(f"{summary['month']}: {summary['archived']} vendas arquivadas "
+                      f"({summary['sale_count']} no arquivo, {summary['size_bytes']} bytes) -> {summary['file']}")
+        elif args.command == "list":
+            for record in crud.get_sales_archives(session):
+                print(f"{record.month}  {record.sale_count:>9} vendas  total {record.total_sales}  "
+                      f"lucro {record.profit}  {record.path}")
+        else:
+            print(f"Vendas devolvidas: {restore_month(session, parse_month(args.month).strftime('%Y-%m'))}")
+    finally:
+        session.close()
@@ -0,0 +1,305 @@
+# backend/app/cache.py
+"""
+Cache das rotas de leitura (dashboard, categorias e produtos).
+
+Cada entrada vive no máximo CACHE_TTL_SECONDS e o cache guarda até
+CACHE_MAX_ENTRIES chaves (LRU). Os caminhos de escrita chamam invalidate()
+com os namespaces afetados logo após o commit.
+
+CACHE_BACKEND=memory (padrão) mantém o cache no processo. Com
+CACHE_BACKEND=sqlite as entradas ficam num arquivo SQLite local
+(CACHE_SQLITE_PATH), compartilhado entre os workers do uvicorn, então uma
+invalidação feita por um worker vale para todos.
+
+Cada namespace tem também uma versão (token aleatório + instante da
+alteração), trocada a cada invalidate(). As rotas de leitura montam o ETag a
+partir dela (app/conditional.py) sem consultar o banco. No backend em memória
+a versão também é trocada depois de CACHE_TTL_SECONDS, porque invalidações de
+outros workers não chegam aqui: o ETag fica velho no máximo pelo mesmo tempo
+que o cache.
+"""
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from starlette.concurrency import run_in_threadpool
+
+CACHE_TTL_SECONDS = float(os.getenv("CACHE_TTL_SECONDS", "30"))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "256"))
+CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+CACHE_SQLITE_PATH = os.getenv(
+    "CACHE_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "apollo_cache.db")
+)
+
+# Namespaces usados pelas rotas
+DASHBOARD = "dashboard"
+CATEGORIES = "categories"
+PRODUCTS = "products"
+SALES = "sales"   # sem entradas em cache; só a versão (ETag de /sales/)
+
+_MISSING = object()
+
+
+def _new_version() -> tuple:
+    return uuid.uuid4().hex[:16], time.time()
+
+
+class MemoryBackend:
+    """LRU com TTL em memória, protegido por lock (rotas síncronas rodam em threads)."""
+
+    def __init__(self, max_entries: int, version_ttl: float):
+        self.max_entries = max_entries
+        self.version_ttl = version_ttl
+        self._entries = OrderedDict()
+        self._versions = {}   # namespace -> (token, alterado_em, expira_em)
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str, key: str):
+        with self._lock:
+            entry = self._entries.get((namespace, key))
+            if entry is None:
+                return _MISSING
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[(namespace, key)]
+                return _MISSING
+            self._entries.move_to_end((namespace, key))
+            return value
+
+    def set(self, namespace: str, key: str, value, ttl: float, token: str) -> int:
+        """
+        Grava a entrada e retorna quantas foram removidas pelo limite do LRU.
+        Não grava nada se a versão do namespace não for mais `token`.
+        """
+        with self._lock:
+            version = self._versions.get(namespace)
+            if version is None or version[0] != token:
+                return 0
+            self._entries[(namespace, key)] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end((namespace, key))
+            evicted = 0
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def invalidate(self, namespaces) -> None:
+        with self._lock:
+            for entry_key in [k for k in self._entries if k[0] in namespaces]:
+                del self._entries[entry_key]
+            for namespace in namespaces:
+                self._versions.pop(namespace, None)
+
+    def versions(self, namespaces) -> list:
+        now = time.monotonic()
+        result = []
+        with self._lock:
+            for namespace in namespaces:
+                entry = self._versions.get(namespace)
+                if entry is None or entry[2] < now:
+                    entry = self._versions[namespace] = (*_new_version(), now + self.version_ttl)
+                result.append(entry[:2])
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteBackend:
+    """
+    Backend compartilhado entre processos (substituto local de um Redis).
+    Os valores são serializados com pickle; expiração usa o relógio de parede.
+    """
+
+    def __init__(self, path: str, max_entries: int):
+        self.path = path
+        self.max_entries = max_entries
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_entries ("
+                " namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB NOT NULL,"
+                " expires_at REAL NOT NULL, last_used REAL NOT NULL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache_versions ("
+                " namespace TEXT PRIMARY KEY, token TEXT NOT NULL, modified_at REAL NOT NULL)"
+            )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, namespace: str, key: str):
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+            (namespace, key)
+        ).fetchone()
+        now = time.time()
+        if row is None or row[1] < now:
+            return _MISSING
+        conn.execute(
+            "UPDATE cache_entries SET last_used = ? WHERE namespace = ? AND key = ?",
+            (now, namespace, key)
+        )
+        return pickle.loads(row[0])
+
+    def set(self, namespace: str, key: str, value, ttl: float, token: str) -> int:
+        conn = self._connect()
+        now = time.time()
+        inserted = conn.execute(
+            "INSERT OR REPLACE INTO cache_entries SELECT ?, ?, ?, ?, ?"
+            " WHERE EXISTS (SELECT 1 FROM cache_versions WHERE namespace = ? AND token = ?)",
+            (namespace, key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), now + ttl, now,
+             namespace, token)
+        ).rowcount
+        if not inserted:
+            return 0
+        conn.execute("DELETE FROM cache_entries WHERE expires_at < ?", (now,))
+        evicted = conn.execute(
+            "DELETE FROM cache_entries WHERE rowid IN ("
+            " SELECT rowid FROM cache_entries ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (self.max_entries,)
+        ).rowcount
+        return max(evicted, 0)
+
+    def invalidate(self, namespaces) -> None:
+        conn = self._connect()
+        # Versão primeiro: um set() concorrente ou é recusado ou é apagado logo abaixo
+        conn.executemany(
+            "INSERT OR REPLACE INTO cache_versions VALUES (?, ?, ?)",
+            [(ns, *_new_version()) for ns in namespaces]
+        )
+        conn.executemany(
+            "DELETE FROM cache_entries WHERE namespace = ?", [(ns,) for ns in namespaces]
+        )
+
+    def versions(self, namespaces) -> list:
+        conn = self._connect()
+        # Namespace ainda sem versão: a primeira gravada vale para todos os workers
+        conn.executemany(
+            "INSERT OR IGNORE INTO cache_versions VALUES (?, ?, ?)",
+            [(ns, *_new_version()) for ns in namespaces]
+        )
+        rows = dict(
+            (ns, (token, modified_at)) for ns, token, modified_at in conn.execute(
+                "SELECT namespace, token, modified_at FROM cache_versions WHERE namespace IN (%s)"
+                % ",".join("?" * len(namespaces)), list(namespaces)
+            )
+        )
+        return [rows[ns] for ns in namespaces]
+
+    def clear(self) -> None:
+        self._connect().execute("DELETE FROM cache_entries")
+
+
+def _make_backend():
+    if CACHE_BACKEND == "sqlite":
+        return SQLiteBackend(CACHE_SQLITE_PATH, CACHE_MAX_ENTRIES)
+    return MemoryBackend(CACHE_MAX_ENTRIES, CACHE_TTL_SECONDS)
+
+
+_backend = _make_backend()
+_stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0}
+_stats_lock = threading.Lock()
+
+
+def _count(name: str, amount: int = 1) -> None:
+    with _stats_lock:
+        _stats[name] += amount
+
+
+def get_or_set(namespace: str, key: str, loader, ttl: float = CACHE_TTL_SECONDS):
+    """
+    Retorna o valor em cache ou chama loader() e guarda o resultado.
+    O valor deve ser serializável (dicts/listas), nunca objetos ORM.
+
+    A versão do namespace é lida antes do loader(): se um invalidate() chegar
+    enquanto ele roda, o resultado (possivelmente velho) não é guardado.
+    """
+    if ttl <= 0:
+        return loader()
+
+    value = _backend.get(namespace, key)
+    if value is not _MISSING:
+        _count("hits")
+        return value
+
+    _count("misses")
+    token = _backend.versions([namespace])[0][0]
+    value = loader()
+    _count("evictions", _backend.set(namespace, key, value, ttl, token))
+    return value
+
+
+async def aget_or_set(namespace: str, key: str, loader, ttl: float = CACHE_TTL_SECONDS):
+    """
+    Versão assíncrona de get_or_set: `loader` é uma corrotina. O backend em
+    memória é consultado direto; o backend SQLite (arquivo) vai para o threadpool.
+    """
+    if ttl <= 0:
+        return await loader()
+
+    blocking = not isinstance(_backend, MemoryBackend)
+    if blocking:
+        value = await run_in_threadpool(_backend.get, namespace, key)
+    else:
+        value = _backend.get(namespace, key)
+    if value is not _MISSING:
+        _count("hits")
+        return value
+
+    _count("misses")
+    token = (await aversions(namespace))[0][0]
+    value = await loader()
+    if blocking:
+        evicted = await run_in_threadpool(_backend.set, namespace, key, value, ttl, token)
+    else:
+        evicted = _backend.set(namespace, key, value, ttl, token)
+    _count("evictions", evicted)
+    return value
+
+
+def invalidate(*namespaces: str) -> None:
+    """Descarta todas as entradas dos namespaces informados."""
+    _backend.invalidate(set(namespaces))
+    _count("invalidations")
+
+
+def versions(*namespaces: str) -> list:
+    """[(token, alterado_em)] de cada namespace, trocados a cada invalidate()."""
+    return _backend.versions(namespaces)
+
+
+async def aversions(*namespaces: str) -> list:
+    if isinstance(_backend, MemoryBackend):
+        return _backend.versions(namespaces)
+    return await run_in_threadpool(_backend.versions, namespaces)
+
+
+def clear() -> None:
+    _backend.clear()
+
+
+def stats() -> dict:
+    """Contadores do processo atual (hits/misses/evictions/invalidations)."""
+    with _stats_lock:
+        data = dict(_stats)
+    lookups = data["hits"] + data["misses"]
+    data["hit_ratio"] = round(data["hits"] / lookups, 4) if lookups else 0.0
+    data["backend"] = CACHE_BACKEND
+    data["ttl_seconds"] = CACHE_TTL_SECONDS
+    data["max_entries"] = CACHE_MAX_ENTRIES
+    return data
@@ -0,0 +1,279 @@
+# backend/app/columnar_import.py
+"""
+Importação colunar (vetorizada) de vendas para cargas históricas grandes.
+
+O CSV é lido em blocos de COLUMNAR_BLOCK_ROWS registros e cada bloco vira
+arrays tipados (pyarrow/NumPy): product_id, quantidade, total e data são
+convertidos em lote, preço unitário e custo vêm de um join vetorizado
+(searchsorted) com a tabela de preços (app/pricing.py), total e lucro são
+calculados por pricing.price_arrays e os agregados do dashboard são somados
+com bincount.
+
+Linhas que o caminho vetorizado não reconhece com segurança (formatos
+incomuns, valores inválidos) caem na máscara de rejeitadas e passam por
+importers.build_sale, então o resultado e as mensagens de erro são os
+mesmos do importador linha a linha.
+
+Dependências opcionais: numpy e pyarrow (pip install numpy pyarrow).
+"""
+import csv
+import os
+import time
+from datetime import datetime
+from itertools import islice
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app import cache, models, money, pricing, rollup
+from app.importers import build_sale, row_error_message
+from app.parallel_import import read_header
+
+try:
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.compute as pc
+except ImportError:  # pragma: no cover - depende do ambiente
+    np = pa = pc = None
+
+COLUMNAR_AVAILABLE = pc is not None
+COLUMNAR_BLOCK_ROWS = int(os.getenv("COLUMNAR_BLOCK_ROWS", "200000"))
+COLUMNAR_INSERT_BATCH = int(os.getenv("COLUMNAR_INSERT_BATCH", "20000"))
+
+_INT_PATTERN = r"^\s*[+-]?[0-9]+\s*$"
+_FLOAT_PATTERN = r"^\s*[+-]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][+-]?[0-9]+)?\s*$"
+# Totais com até 2 casas: rint(float × 100) dá o centavo exato; o resto vai para to_money
+_MONEY_PATTERN = r"^\s*[+-]?([0-9]+\.?[0-9]{0,2}|\.[0-9]{1,2})\s*$"
+_ISO_DATE_PATTERN = r"^[0-9]{4}-[0-9]{2}-[0-9]{2}$"
+_BR_DATE_PATTERN = r"^[0-9]{2}/[0-9]{2}/[0-9]{4}$"
+# Textos ASCII fora deste formato nunca passam no strptime: viram "agora" direto
+_DATE_LIKE_PATTERN = r"^[0-9 ]+([-/])[0-9 ]+([-/])[0-9 ]+$"
+# int(float(x)) só é exato no caminho vetorizado abaixo de 2^53
+_MAX_EXACT_FLOAT = float(2 ** 53)
+# Centavos somados em float64 (bincount) continuam exatos até aqui
+_MAX_EXACT_CENTS = float(2 ** 50)
+
+
+def _column(rows, index):
+    if index is None:
+        return pa.nulls(len(rows), pa.string())
+    return pa.array([row[index] if len(row) > index else None for row in rows], pa.string())
+
+
+def _fill(mask):
+    return pc.fill_null(mask, False)
+
+
+def _strict_strptime(text, mask, fmt: str):
+    """
+    strptime do pyarrow só nas linhas de `mask`. Ele aceita dias inexistentes
+    e avança o mês (31/02 vira 03/03); o datetime.strptime do importador
+    linha a linha os rejeita. Por isso só vale a data que, formatada de
+    volta, reproduz o texto; as demais ficam nulas e a linha vai para o
+    caminho linha a linha.
+    """
+    parsed = pc.strptime(pc.if_else(mask, text, None), format=fmt, unit="us", error_is_null=True)
+    round_trip = _fill(pc.equal(pc.strftime(parsed, format=fmt), text))
+    return pc.if_else(round_trip, parsed, None)
+
+
+def _parse_block(rows, fields, catalog, now):
+    """
+    Valida um bloco de registros. Retorna (índices válidos, colunas válidas,
+    [(índice, mensagem)], índices rejeitados para o caminho linha a linha).
+    """
+    p_id = _column(rows, fields.get("product_id"))
+    qtd = _column(rows, fields.get("quantity"))
+    price = _column(rows, fields.get("total_price"))
+    date = _column(rows, fields.get("date"))
+
+    # Linhas sem produto ou quantidade são ignoradas (como no importador padrão)
+    present = pc.and_(
+        _fill(pc.not_equal(p_id, "")), _fill(pc.not_equal(qtd, ""))
+    ).to_numpy(zero_copy_only=False)
+
+    int_ok = _fill(pc.match_substring_regex(p_id, _INT_PATTERN))
+    qtd_ok = _fill(pc.match_substring_regex(qtd, _FLOAT_PATTERN))
+    price_empty = pc.or_(pc.is_null(price), _fill(pc.equal(price, "")))
+    price_ok = pc.or_(price_empty, _fill(pc.match_substring_regex(price, _MONEY_PATTERN)))
+    date_empty = pc.or_(pc.is_null(date), _fill(pc.equal(date, "")))
+    iso = _fill(pc.match_substring_regex(date, _ISO_DATE_PATTERN))
+    br = _fill(pc.match_substring_regex(date, _BR_DATE_PATTERN))
+
+    parsed_iso = _strict_strptime(date, iso, "%Y-%m-%d")
+    parsed_br = _strict_strptime(date, br, "%d/%m/%Y")
+    parsed_date = pc.coalesce(parsed_iso, parsed_br)
+    unparseable = pc.and_(
+        pc.string_is_ascii(date), pc.invert(pc.match_substring_regex(date, _DATE_LIKE_PATTERN))
+    )
+    date_ok = pc.or_(pc.or_(date_empty, _fill(unparseable)), pc.is_valid(parsed_date))
+
+    fast = pc.and_(pc.and_(int_ok, qtd_ok), pc.and_(price_ok, date_ok)).to_numpy(zero_copy_only=False)
+    fast &= present
+
+    # Conversões em lote (valores fora do caminho rápido viram 0 e são descartados)
+    fast_mask = pa.array(fast)
+    ids = pc.cast(pc.utf8_trim_whitespace(pc.if_else(fast_mask, p_id, "0")), pa.int64()).to_numpy()
+    qtd_float = pc.cast(pc.utf8_trim_whitespace(pc.if_else(fast_mask, qtd, "0")), pa.float64()).to_numpy()
+    fast &= np.abs(qtd_float) < _MAX_EXACT_FLOAT
+
+    # Join vetorizado com a tabela de preços: (ids ordenados, preço unitário, custo)
+    product_ids, unit_prices, unit_costs = catalog
+    positions = np.searchsorted(product_ids, ids)
+    positions[positions >= len(product_ids)] = 0
+    found = (product_ids[positions] == ids) if len(product_ids) else np.zeros(len(ids), dtype=bool)
+    not_found = fast & ~found
+
+    quantity = np.trunc(qtd_float).astype(np.int64)
+    has_price = ~price_empty.to_numpy(zero_copy_only=False)
+    given_cents = np.rint(pc.cast(
+        pc.utf8_trim_whitespace(pc.if_else(pa.array(fast & has_price), price, "0")),
+        pa.float64()
+    ).to_numpy() * 100)
+    unit_cents = unit_prices[positions] if len(product_ids) else np.zeros(len(ids))
+    cost_cents = unit_costs[positions] if len(product_ids) else np.full(len(ids), np.nan)
+    # Produto sem preço cadastrado e sem total no CSV: o caminho linha a linha decide
+    fast &= ~(found & ~has_price & np.isnan(unit_cents))
+    # Fora da faixa exata do float64, quem calcula é o Decimal
+    fast &= ~(np.abs(np.where(has_price, given_cents, unit_cents * quantity)) >= _MAX_EXACT_CENTS)
+    fast &= ~(np.abs(np.nan_to_num(cost_cents) * quantity) >= _MAX_EXACT_CENTS)
+    valid = fast & found
+    total, profit = pricing.price_arrays(unit_cents, cost_cents, quantity, given_cents, has_price)
+
+    dates = parsed_date.to_numpy(zero_copy_only=False).astype("datetime64[us]")
+    dates[np.isnat(dates)] = np.datetime64(now, "us")
+
+    indices = np.nonzero(valid)[0]
+    columns = {
+        "product_id": ids[indices],
+        "quantity": quantity[indices],
+        "total_price": total[indices],
+        "profit": profit[indices],
+        "date": dates[indices],
+    }
+    errors = [(int(i), f"Produto ID {ids[i]} não encontrado.") for i in np.nonzero(not_found)[0]]
+    rejected = np.nonzero(present & ~fast)[0]
+    return indices, columns, errors, rejected
+
+
+def _rollup_buckets(columns) -> dict:
+    """Agrega (dia, produto) com NumPy: nº de vendas, quantidade, total e lucro (centavos)."""
+    if not len(columns["product_id"]):
+        return {}
+    days = columns["date"].astype("datetime64[D]")
+    keys = np.stack([days.astype(np.int64), columns["product_id"]], axis=1)
+    unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+    inverse = inverse.ravel()
+    counts = np.bincount(inverse)
+    quantity = np.bincount(inverse, weights=columns["quantity"])
+    total = np.bincount(inverse, weights=columns["total_price"])
+    profit = np.bincount(inverse, weights=columns["profit"])
+    return {
+        (np.datetime64(int(day), "D").item(), int(product_id)): (
+            int(counts[i]), int(quantity[i]), money.from_cents(int(total[i])), money.from_cents(int(profit[i]))
+        )
+        for i, (day, product_id) in enumerate(unique)
+    }
+
+
+def import_sales_file(db: Session, path: str, block_rows: int = COLUMNAR_BLOCK_ROWS, on_chunk=None) -> dict:
+    """
+    Importa o CSV de vendas em `path` pelo caminho colunar.
+    Mesmo relatório (e mesma numeração de linhas) de importers.import_sales.
+    """
+    if not COLUMNAR_AVAILABLE:
+        raise RuntimeError("O modo colunar requer numpy e pyarrow (pip install numpy pyarrow).")
+
+    started = time.perf_counter()
+    fieldnames, delimiter, _ = read_header(path)
+    # Como no DictReader, a última coluna com o mesmo nome vence
+    fields = {name: position for position, name in enumerate(fieldnames)}
+
+    # Recarregada: o arquivo pode citar produtos criados por outros workers
+    prices = pricing.get_table(db, fresh=True)
+    catalog = prices.arrays()
+
+    sales_added = 0
+    processed = 0
+    errors = []
+
+    try:
+        with open(path, encoding="utf-8-sig", newline="") as f:
+            reader = csv.reader(f, delimiter=delimiter)
+            next(reader, None)  # cabeçalho
+            while True:
+                block = list(islice(reader, block_rows))
+                if not block:
+                    break
+                # Linhas em branco não contam como registro (igual ao DictReader)
+                rows = [row for row in block if row]
+                if not rows:
+                    continue
+
+                now = datetime.utcnow()
+                indices, columns, block_errors, rejected = _parse_block(
+                    rows, fields, catalog, now
+                )
+
+                # Caminho linha a linha para as rejeitadas (mensagens idênticas)
+                fallback = []
+                for i in rejected:
+                    row = rows[i]
+                    record = {name: (row[pos] if len(row) > pos else None) for name, pos in fields.items()}
+                    try:
+                        sale = build_sale(record, prices)
+                        if sale is not None:
+                            fallback.append((int(i), sale))
+                    except Exception as e:
+                        block_errors.append((int(i), row_error_message(e)))
+
+                values = [
+                    {"product_id": p, "quantity": q, "total_price": money.from_cents(t),
+                     "profit": money.from_cents(pr), "date": d}
+                    for p, q, t, pr, d in zip(
+                        columns["product_id"].tolist(),
+                        columns["quantity"].tolist(),
+                        columns["total_price"].tolist(),
+                        columns["profit"].tolist(),
+                        columns["date"].tolist(),
+                    )
+                ]
+                buckets = _rollup_buckets(columns)
+                if fallback:
+                    # Mantém a ordem do arquivo nos INSERTs
+                    order = sorted(
+                        [(int(i), value) for i, value in zip(indices, values)] + fallback,
+                        key=lambda item: item[0]
+                    )
+                    values = [value for _, value in order]
+                    buckets = None
+
+                for start in range(0, len(values), COLUMNAR_INSERT_BATCH):
+                    db.execute(insert(models.Sale), values[start:start + COLUMNAR_INSERT_BATCH])
+                if buckets is None:
+                    rollup.apply_sales(db, values, prices.categories)
+                else:
+                    rollup.apply_buckets(db, buckets, prices.categories)
+                sales_added += len(values)
+
+                errors.extend(
+                    f"Linha {processed + index + 1}: {message}" for index, message in sorted(block_errors)
+                )
+                processed += len(rows)
+                if on_chunk:
+                    on_chunk(processed, errors, f.buffer.tell())
+
+        db.commit()
+        cache.invalidate(cache.DASHBOARD, cache.SALES)
+    except Exception:
+        db.rollback()
+        raise
+
+    elapsed = time.perf_counter() - started
+    return {
+        "message": "Importação de vendas concluída",
+        "sales_added": sales_added,
+        "errors": errors,
+        "rows_processed": processed,
+        "rows_per_second": round(processed / elapsed, 1) if elapsed > 0 else float(processed),
+    }
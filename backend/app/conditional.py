@@ -0,0 +1,82 @@
+# backend/app/conditional.py
+"""
+Requisições condicionais (ETag / If-None-Match e Last-Modified /
+If-Modified-Since) para as rotas de leitura.
+
+O ETag é um hash da rota, dos parâmetros e das versões dos namespaces do
+cache de que a resposta depende (app/cache.py). As versões mudam a cada
+invalidate() dos caminhos de escrita, então o ETag é conhecido antes de
+qualquer consulta: quando o cliente já tem a versão atual, a rota responde
+304 sem tocar no banco nem serializar nada.
+
+A compressão (app/compression.py) acrescenta "-gzip"/"-br" ao ETag da
+resposta comprimida; os sufixos são ignorados na comparação.
+"""
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+
+from fastapi import Request, Response
+
+from app import cache
+
+ENCODING_SUFFIXES = ("-gzip", "-br")
+
+
+def _etag(request: Request, versions) -> str:
+    params = sorted(request.query_params.multi_items())
+    source = repr((request.url.path, params, [token for token, _ in versions]))
+    return '"' + hashlib.sha1(source.encode()).hexdigest()[:24] + '"'
+
+
+def _strip_suffix(tag: str) -> str:
+    tag = tag.strip()
+    if tag.startswith("W/"):
+        tag = tag[2:]
+    for suffix in ENCODING_SUFFIXES:
+        if tag.endswith(suffix + '"'):
+            return tag[:-len(suffix) - 1] + '"'
+    return tag
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    return any(_strip_suffix(tag) == etag for tag in if_none_match.split(","))
+
+
+def _not_modified_since(if_modified_since: str, last_modified: float) -> bool:
+    try:
+        since = parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+    # Last-Modified tem resolução de segundos
+    return int(last_modified) <= since
+
+
+async def check(request: Request, response: Response, *namespaces: str):
+    """
+    Calcula ETag e Last-Modified a partir das versões de `namespaces`.
+    Retorna uma resposta 304 quando o cliente já tem a versão atual; senão
+    grava os cabeçalhos em `response` e retorna None (a rota segue normalmente).
+    """
+    versions = await cache.aversions(*namespaces)
+    etag = _etag(request, versions)
+    last_modified = max(modified_at for _, modified_at in versions)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": formatdate(last_modified, usegmt=True),
+        # O navegador pode guardar, mas sempre revalida (If-None-Match)
+        "Cache-Control": "no-cache",
+    }
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        not_modified = _matches(if_none_match, etag)
+    else:
+        if_modified_since = request.headers.get("if-modified-since")
+        not_modified = if_modified_since is not None and _not_modified_since(if_modified_since, last_modified)
+
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
@@ -1,7 +1,67 @@
-from sqlalchemy.orm import Session
-from app import models, schemas
-from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload, noload
+from app import models, schemas, rollup, cache, money, pricing, events
+from sqlalchemy import BigInteger, func, insert, select, tuple_, type_coerce
 from datetime import datetime  # ← ADICIONE ESTA LINHA
+from app.pagination import encode_cursor, decode_cursor
+from typing import List
+
+# Tamanho padrão dos lotes lidos pelas exportações em streaming
+EXPORT_BATCH_SIZE = 1000
+
+# --- Estratégias de carregamento ---
+# Os schemas de resposta embutem Product.category e Sale.product; sem carregar
+# as relações junto, cada linha serializada dispararia consultas extras (N+1).
+# No modo "slim" as relações não são carregadas e a resposta traz só os IDs.
+def _product_loading(slim: bool = False):
+    if slim:
+        return noload(models.Product.category)
+    return joinedload(models.Product.category)
+
+def _sale_loading(slim: bool = False):
+    if slim:
+        return noload(models.Sale.product)
+    return joinedload(models.Sale.product).joinedload(models.Product.category)
+
+# --- Colunas do caminho rápido (rows=True, ver app/fast_json.py) ---
+# Só as colunas da resposta, como tuplas; dinheiro em centavos, sem o tipo Money.
+def _cents(column, label: str):
+    return type_coerce(column, BigInteger).label(label)
+
+def _category_row_columns():
+    return [
+        models.Category.id.label("category_ref"),
+        models.Category.name.label("category_name"),
+        models.Category.discount_percentage.label("category_discount"),
+    ]
+
+def product_row_columns(slim: bool = False):
+    columns = [
+        models.Product.id.label("id"),
+        models.Product.name.label("name"),
+        _cents(models.Product.price, "price_cents"),
+        _cents(models.Product.cost, "cost_cents"),
+        models.Product.category_id.label("category_id"),
+    ]
+    return columns if slim else columns + _category_row_columns()
+
+def sale_row_columns(slim: bool = False):
+    columns = [
+        models.Sale.id.label("id"),
+        models.Sale.product_id.label("product_id"),
+        models.Sale.quantity.label("quantity"),
+        _cents(models.Sale.total_price, "total_price_cents"),
+        _cents(models.Sale.profit, "profit_cents"),
+        models.Sale.date.label("date"),
+    ]
+    if slim:
+        return columns
+    return columns + [
+        models.Product.id.label("product_ref"),
+        models.Product.name.label("product_name"),
+        _cents(models.Product.price, "product_price_cents"),
+        _cents(models.Product.cost, "product_cost_cents"),
+        models.Product.category_id.label("product_category_id"),
+    ] + _category_row_columns()
 
 # --- CRUD de Categorias ---
 def get_category_by_name(db: Session, name: str):
@@ -14,6 +74,7 @@ def create_category(db: Session, category: schemas.CategoryCreate):
     )
     db.add(db_category)
     db.commit()
+    cache.invalidate(cache.CATEGORIES)
     db.refresh(db_category)
     return db_category
 
@@ -28,94 +89,336 @@ def create_product(db: Session, product: schemas.ProductCreate):
         category_id=product.category_id
     )
     db.add(db_product)
+    db.flush()
+    events.stage_products(db, added=1, changed=[db_product.id])
     db.commit()
+    cache.invalidate(cache.PRODUCTS, cache.DASHBOARD)
+    pricing.invalidate()
     db.refresh(db_product)
     return db_product
 
 def get_products(db: Session):
-    return db.query(models.Product).all()
+    return db.query(models.Product).options(_product_loading()).all()
+
+def products_page_query(
+    limit: int = None,
+    cursor: str = None,
+    category_id: int = None,
+    name_prefix: str = None,
+    slim: bool = False,
+    rows: bool = False,
+):
+    """
+    Monta o SELECT de uma página de produtos (compartilhado com crud_async).
+    rows=True seleciona só as colunas da resposta (product_row_columns) em vez de objetos ORM.
+    """
+    if rows:
+        stmt = select(*product_row_columns(slim))
+        if not slim:
+            stmt = stmt.outerjoin(models.Category, models.Product.category_id == models.Category.id)
+    else:
+        stmt = select(models.Product).options(_product_loading(slim))
+    if category_id is not None:
+        stmt = stmt.where(models.Product.category_id == category_id)
+    if name_prefix:
+        escaped = name_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        stmt = stmt.where(models.Product.name.like(f"{escaped}%", escape="\\"))
+    if cursor:
+        _, last_id = decode_cursor(cursor, "id", False)
+        stmt = stmt.where(models.Product.id > last_id)
+
+    stmt = stmt.order_by(models.Product.id)
+    # Busca uma linha a mais para saber se existe próxima página
+    return stmt if limit is None else stmt.limit(limit + 1)
+
+def products_page_result(rows, limit: int = None):
+    """Corta a linha extra e gera o cursor da próxima página."""
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor("id", False, rows[-1].id, rows[-1].id)
+
+def get_products_page(db: Session, limit: int = None, rows: bool = False, **filters):
+    """
+    Lista produtos por ordem de ID com paginação por cursor e filtros
+    (cursor, category_id, name_prefix, slim).
+    Sem `limit`, retorna todos os produtos que atendem aos filtros.
+    Retorna (produtos, cursor_da_próxima_página ou None); com rows=True, tuplas em vez de objetos ORM.
+    """
+    result = db.execute(products_page_query(limit=limit, rows=rows, **filters))
+    return products_page_result(result.all() if rows else result.scalars().all(), limit)
 
 # --- CRUD de Vendas ---
-def create_sale(db: Session, sale: schemas.SaleCreate):
+def create_sale(db: Session, sale: schemas.SaleCreate) -> dict:
     """
-    Cria uma venda calculando automaticamente:
-    - total_price = preço do produto × quantidade
-    - profit = 30% do total_price
+    Cria uma venda pelo mesmo caminho do lote (create_sales_batch): total e
+    lucro vêm da tabela de preços (app/pricing.py), sem consultar produto e
+    categoria a cada venda. Retorna o item {"index", "sale", "error"}.
     """
-    # 1. Busca o produto para obter o preço
-    product = db.query(models.Product).filter(models.Product.id == sale.product_id).first()
-    
-    if not product:
-        # Produto não encontrado
-        return None
+    return create_sales_batch(db, [sale])[0]
 
-    # 2. Calcula valores automaticamente
-    total_price = product.price * sale.quantity
-    profit = total_price * 0.30  # Margem de lucro de 30%
+def create_sales_batch(db: Session, sales: List[schemas.SaleCreate]) -> List[dict]:
+    """
+    Cria várias vendas numa única transação: preços da tabela em memória
+    (produtos ausentes dela são buscados numa consulta), um INSERT em lote e
+    um único commit.
 
-    # 3. Usa a data fornecida ou a data atual
-    sale_date = sale.date if hasattr(sale, 'date') and sale.date else datetime.utcnow()
+    Retorna um item por venda, na ordem recebida: {"index", "sale", "error"}.
+    Itens com produto inexistente (ou sem preço) viram erro sem impedir os demais.
+    """
+    table = pricing.get_table(db, {sale.product_id for sale in sales})
 
-    # 4. Cria a venda
-    db_sale = models.Sale(
-        product_id=sale.product_id,
-        quantity=sale.quantity,
-        total_price=total_price,
-        profit=profit,
-        date=sale_date
-    )
-    
-    db.add(db_sale)
-    db.commit()
-    db.refresh(db_sale)
-    return db_sale
+    now = datetime.utcnow()
+    items = []
+    values = []
+    for index, sale in enumerate(sales):
+        if sale.product_id not in table:
+            items.append({"index": index, "sale": None, "error": "Produto não encontrado"})
+            continue
+        try:
+            total_price, profit = table.quote(sale.product_id, sale.quantity)
+        except ValueError as e:
+            items.append({"index": index, "sale": None, "error": str(e)})
+            continue
+        values.append({
+            "product_id": sale.product_id,
+            "quantity": sale.quantity,
+            "total_price": total_price,
+            "profit": profit,
+            "date": sale.date or now,
+        })
+        items.append({"index": index, "sale": values[-1], "error": None})
+
+    if not values:
+        return items
+
+    # Produtos serializados para a resposta (em memória depois da primeira venda)
+    product_data = table.products(db, {value["product_id"] for value in values})
+    try:
+        ids = db.execute(
+            insert(models.Sale).returning(models.Sale.id, sort_by_parameter_order=True), values
+        ).scalars().all()
+        rollup.apply_sales(db, values, table.categories)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    cache.invalidate(cache.DASHBOARD, cache.SALES)
+
+    for sale_id, sale_values in zip(ids, values):
+        sale_values["id"] = sale_id
+        sale_values["product"] = product_data[sale_values["product_id"]]
+    return items
 
 def get_sales(db: Session, skip: int = 0, limit: int = 100):
     """Lista todas as vendas com paginação"""
-    return db.query(models.Sale).offset(skip).limit(limit).all()
+    return db.query(models.Sale).options(_sale_loading()).offset(skip).limit(limit).all()
+
+def sales_page_query(
+    limit: int = 100,
+    cursor: str = None,
+    sort: str = "id",
+    descending: bool = True,
+    start_date: datetime = None,
+    end_date: datetime = None,
+    product_id: int = None,
+    category_id: int = None,
+    slim: bool = False,
+    rows: bool = False,
+):
+    """
+    Monta o SELECT de uma página de vendas (compartilhado com crud_async).
+    rows=True seleciona só as colunas da resposta (sale_row_columns) em vez de objetos ORM.
+    """
+    joined = rows and not slim
+    if rows:
+        stmt = select(*sale_row_columns(slim))
+        if joined:
+            stmt = (
+                stmt.outerjoin(models.Product, models.Sale.product_id == models.Product.id)
+                .outerjoin(models.Category, models.Product.category_id == models.Category.id)
+            )
+    else:
+        stmt = select(models.Sale).options(_sale_loading(slim))
+    if start_date is not None:
+        stmt = stmt.where(models.Sale.date >= start_date)
+    if end_date is not None:
+        stmt = stmt.where(models.Sale.date <= end_date)
+    if product_id is not None:
+        stmt = stmt.where(models.Sale.product_id == product_id)
+    if category_id is not None:
+        if not joined:
+            stmt = stmt.join(models.Product, models.Sale.product_id == models.Product.id)
+        stmt = stmt.where(models.Product.category_id == category_id)
+
+    if cursor:
+        last_value, last_id = decode_cursor(cursor, sort, descending)
+        if sort == "date":
+            key, last = tuple_(models.Sale.date, models.Sale.id), tuple_(last_value, last_id)
+        else:
+            key, last = models.Sale.id, last_id
+        stmt = stmt.where(key < last if descending else key > last)
+
+    if sort == "date":
+        order = [models.Sale.date.desc(), models.Sale.id.desc()] if descending else [models.Sale.date, models.Sale.id]
+    else:
+        order = [models.Sale.id.desc()] if descending else [models.Sale.id]
+
+    # Busca uma linha a mais para saber se existe próxima página
+    return stmt.order_by(*order).limit(limit + 1)
+
+def sales_page_result(rows, limit: int = 100, sort: str = "id", descending: bool = True):
+    """Corta a linha extra e gera o cursor da próxima página."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(sort, descending, last.date if sort == "date" else last.id, last.id)
+
+def get_sales_page(
+    db: Session, limit: int = 100, sort: str = "id", descending: bool = True, rows: bool = False, **filters
+):
+    """
+    Lista vendas com paginação por cursor, ordenadas por ID ou por data
+    (com ID como desempate), e filtros por período, produto e categoria
+    (cursor, start_date, end_date, product_id, category_id, slim).
+    Retorna (vendas, cursor_da_próxima_página ou None); com rows=True, tuplas em vez de objetos ORM.
+    """
+    stmt = sales_page_query(limit=limit, sort=sort, descending=descending, rows=rows, **filters)
+    result = db.execute(stmt)
+    return sales_page_result(result.all() if rows else result.scalars().all(), limit, sort, descending)
+
+# --- Leitura em lotes para Exportação ---
+def iter_products_export(db: Session, batch_size: int = EXPORT_BATCH_SIZE, since_id: int = None):
+    """
+    Percorre os produtos em lotes ordenados por ID (paginação por chave),
+    já com o nome da categoria. Cada lote é uma lista de tuplas:
+    (id, nome, preço, categoria_id, nome_categoria)
+    Com since_id, só os produtos com ID maior (exportação incremental).
+    """
+    last_id = since_id or 0
+    while True:
+        batch = db.execute(
+            select(
+                models.Product.id,
+                models.Product.name,
+                models.Product.price,
+                models.Product.category_id,
+                models.Category.name,
+            )
+            .outerjoin(models.Category, models.Product.category_id == models.Category.id)
+            .where(models.Product.id > last_id)
+            .order_by(models.Product.id)
+            .limit(batch_size)
+        ).all()
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1][0]
+
+def iter_sales_export(
+    db: Session,
+    batch_size: int = EXPORT_BATCH_SIZE,
+    since_id: int = None,
+    since_date: datetime = None,
+    before_date: datetime = None,
+):
+    """
+    Percorre todas as vendas (sem limite) em lotes ordenados por ID.
+    Cada lote é uma lista de tuplas:
+    (id, produto_id, nome_produto, quantidade, total, lucro, data)
+    Exportação incremental: since_id (ID maior que) e/ou since_date (data a partir de).
+    before_date (exclusivo) fecha o período; no Postgres particionado, só as
+    partições dos meses do período são lidas.
+    """
+    last_id = since_id or 0
+    while True:
+        query = (
+            select(
+                models.Sale.id,
+                models.Sale.product_id,
+                models.Product.name,
+                models.Sale.quantity,
+                models.Sale.total_price,
+                models.Sale.profit,
+                models.Sale.date,
+            )
+            .outerjoin(models.Product, models.Sale.product_id == models.Product.id)
+            .where(models.Sale.id > last_id)
+            .order_by(models.Sale.id)
+            .limit(batch_size)
+        )
+        if since_date is not None:
+            query = query.where(models.Sale.date >= since_date)
+        if before_date is not None:
+            query = query.where(models.Sale.date < before_date)
+        batch = db.execute(query).all()
+        if not batch:
+            return
+        yield batch
+        last_id = batch[-1][0]
+
+def get_sales_archives(db: Session):
+    """Meses arquivados (app/archive.py), do mais recente para o mais antigo."""
+    return db.query(models.SalesArchive).order_by(models.SalesArchive.month.desc()).all()
 
 # --- CRUD de Estatísticas (Dashboard) ---
-def get_dashboard_stats(db: Session):
+def dashboard_queries(start_date=None, end_date=None):
     """
-    Retorna estatísticas do dashboard:
-    - Total de produtos cadastrados
-    - Valor total de vendas
-    - Lucro total
-    - Dados agrupados por mês para gráficos
+    SELECTs do dashboard: total de produtos e totais por dia (sales_daily).
+    start_date/end_date (inclusivos) limitam os dias lidos pela chave primária.
     """
-    # 1. Totais Gerais
-    total_products = db.query(func.count(models.Product.id)).scalar()
-    
-    # Soma do valor total de vendas (trata None como 0)
-    total_sales_value = db.query(func.sum(models.Sale.total_price)).scalar() or 0.0
-    
-    # Soma do lucro total
-    total_profit = db.query(func.sum(models.Sale.profit)).scalar() or 0.0
-
-    # 2. Dados para o Gráfico (Agrupado por Mês)
-    # Formato da data no SQLite: '%Y-%m' (Ano-Mês)
-    sales_by_month = db.query(
-        func.strftime('%Y-%m', models.Sale.date).label('month'),
-        func.sum(models.Sale.total_price).label('total_sales'),
-        func.sum(models.Sale.profit).label('profit')
-    ).group_by('month').order_by('month').all()
-
-    # 3. Formatar dados do gráfico
-    chart_data = []
-    for row in sales_by_month:
-        chart_data.append({
-            "date": row.month,
-            "total_sales": float(row.total_sales or 0),
-            "profit": float(row.profit or 0)
-        })
+    total_products = select(func.count(models.Product.id))
+    sales_by_day = select(
+        models.DailySales.day,
+        func.sum(models.DailySales.total_sales).label('total_sales'),
+        func.sum(models.DailySales.profit).label('profit')
+    ).group_by(models.DailySales.day).order_by(models.DailySales.day)
+    if start_date is not None:
+        sales_by_day = sales_by_day.where(models.DailySales.day >= start_date)
+    if end_date is not None:
+        sales_by_day = sales_by_day.where(models.DailySales.day <= end_date)
+    return total_products, sales_by_day
+
+def dashboard_result(total_products, sales_by_day):
+    """Agrupa os totais diários por mês ('%Y-%m') e soma os totais gerais."""
+    # Soma em Decimal (centavos exatos); float só na resposta
+    months = {}
+    total_sales_value = money.ZERO
+    total_profit = money.ZERO
+    for row in sales_by_day:
+        month = row.day.strftime('%Y-%m')
+        bucket = months.setdefault(month, {"date": month, "total_sales": money.ZERO, "profit": money.ZERO})
+        bucket["total_sales"] += row.total_sales or 0
+        bucket["profit"] += row.profit or 0
+        total_sales_value += row.total_sales or 0
+        total_profit += row.profit or 0
 
     return {
         "total_products": total_products,
         "total_sales_value": float(total_sales_value),
         "total_profit": float(total_profit),
-        "chart_data": chart_data
+        "chart_data": [
+            {"date": b["date"], "total_sales": float(b["total_sales"]), "profit": float(b["profit"])}
+            for b in months.values()
+        ]
     }
 
+def get_dashboard_stats(db: Session, start_date=None, end_date=None):
+    """
+    Retorna estatísticas do dashboard:
+    - Total de produtos cadastrados
+    - Valor total de vendas
+    - Lucro total
+    - Dados agrupados por mês para gráficos
+
+    Os valores vêm da tabela de agregados diários (sales_daily), então o custo
+    depende do número de dias com vendas, não do número de vendas. Meses
+    arquivados continuam contando (os agregados deles são preservados).
+    """
+    total_products, sales_by_day = dashboard_queries(start_date, end_date)
+    return dashboard_result(db.execute(total_products).scalar(), db.execute(sales_by_day).all())
+
 def update_product(db: Session, product_id: int, product_data: schemas.ProductCreate):
     # 1. Busca o produto no banco
     db_product = db.query(models.Product).filter(models.Product.id == product_id).first()
@@ -129,7 +432,10 @@ def update_product(db: Session, product_id: int, product_data: schemas.ProductCr
     for key, value in product_data.dict().items():
         setattr(db_product, key, value)
 
-    # 4. Salva as mudanças
+    # 4. Salva as mudanças (preço/custo/categoria novos valem para as próximas vendas)
+    events.stage_products(db, changed=[product_id])
     db.commit()
+    cache.invalidate(cache.PRODUCTS)
+    pricing.invalidate()
     db.refresh(db_product)
     return db_product
\ No newline at end of file
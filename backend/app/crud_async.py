@@ -0,0 +1,97 @@
+# backend/app/crud_async.py
+"""
+Versões assíncronas das consultas de leitura do crud.
+
+Os SELECTs são os mesmos de app/crud.py. Com um AsyncSession (DB_ASYNC=true)
+eles rodam no driver assíncrono; com uma Session comum, a execução vai para o
+threadpool. Em nenhum dos casos o event loop fica bloqueado esperando o banco.
+"""
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app import analytics, crud, models, search
+
+
+async def _execute(db, stmt):
+    if isinstance(db, Session):
+        return await run_in_threadpool(db.execute, stmt)
+    return await db.execute(stmt)
+
+
+async def get_categories(db):
+    result = await _execute(db, select(models.Category))
+    return result.scalars().all()
+
+
+async def get_products_page(db, limit: int = None, rows: bool = False, **filters):
+    """Equivalente assíncrono de crud.get_products_page."""
+    result = await _execute(db, crud.products_page_query(limit=limit, rows=rows, **filters))
+    return crud.products_page_result(result.all() if rows else result.scalars().all(), limit)
+
+
+async def get_sales_page(db, limit: int = 100, sort: str = "id", descending: bool = True, rows: bool = False, **filters):
+    """Equivalente assíncrono de crud.get_sales_page."""
+    stmt = crud.sales_page_query(limit=limit, sort=sort, descending=descending, rows=rows, **filters)
+    result = await _execute(db, stmt)
+    return crud.sales_page_result(result.all() if rows else result.scalars().all(), limit, sort, descending)
+
+
+async def get_dashboard_stats(db, start_date=None, end_date=None):
+    """Equivalente assíncrono de crud.get_dashboard_stats."""
+    total_products, sales_by_day = crud.dashboard_queries(start_date, end_date)
+    total = (await _execute(db, total_products)).scalar()
+    rows = (await _execute(db, sales_by_day)).all()
+    return crud.dashboard_result(total, rows)
+
+
+async def get_sales_analytics(db, params: analytics.AnalyticsParams):
+    """Executa as consultas de app/analytics.py (totais, grupos, série e nomes)."""
+    queries = analytics.build_queries(params, db.get_bind().dialect.name)
+    totals = (await _execute(db, queries.totals)).one()
+    groups = (await _execute(db, queries.groups)).all() if queries.groups is not None else None
+    series = (await _execute(db, queries.series)).all()
+
+    names = {}
+    keys = analytics.group_keys(series, groups)
+    if keys:
+        names = dict((await _execute(db, analytics.names_query(params.group_by, keys))).all())
+    return analytics.analytics_result(params, totals, series, groups, names)
+
+
+async def search_products(db, params: search.SearchParams):
+    """
+    Executa a busca de app/search.py: termos como prefixos e, sem nenhum
+    resultado, a versão aproximada (quando params.fuzzy).
+    """
+    dialect = db.get_bind().dialect.name
+    backend = search.known_backend(dialect)
+    if backend is None:
+        query = search.backend_query(dialect)
+        available = (await _execute(db, query)).scalar() if query is not None else False
+        backend = search.set_backend(dialect, available)
+
+    words = search.terms(params.q)
+    if not words:
+        return search.search_result(params, backend, [], [])
+
+    groups = [[word] for word in words]
+    queries = search.build_queries(params, backend, groups)
+    facets = (await _execute(db, queries.facets)).all()
+
+    fuzzy = False
+    if not facets and params.fuzzy and backend != "like":
+        if backend == "fts5":
+            # Cada termo vira "termo OR parecidos do vocabulário do índice"
+            groups = []
+            for word in words:
+                vocabulary = (await _execute(db, search.vocabulary_query(word))).scalars().all()
+                groups.append([word] + [term for term in search.close_terms(word, vocabulary) if term != word])
+            queries = search.build_queries(params, backend, groups)
+        else:
+            queries = search.build_queries(params, backend, groups, fuzzy_text=" ".join(words))
+        facets = (await _execute(db, queries.facets)).all()
+        fuzzy = bool(facets)
+
+    rows = (await _execute(db, queries.page)).all() if facets else []
+    return search.search_result(params, backend, rows, facets, fuzzy)
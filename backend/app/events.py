@@ -0,0 +1,300 @@
+# backend/app/events.py
+"""
+Feed de alterações para dashboards ao vivo (SSE em GET /events/dashboard e
+WebSocket em /ws/dashboard).
+
+Os caminhos de escrita não publicam nada direto: rollup.apply_buckets (por
+onde passam venda avulsa, lote, gerador e os três importadores de vendas) e
+as escritas de produtos registram um delta na sessão (stage_*), e o delta só
+é publicado depois do commit (evento after_commit da Session); rollback
+descarta. Importações em segundo plano publicam a cada lote confirmado.
+
+O delta é compacto e aditivo, nos mesmos campos de /dashboard-stats/:
+{"kpis": {total_sales_value, total_profit, total_products, sale_count},
+ "chart": [{date: "YYYY-MM", total_sales, profit}],
+ "products": {added, changed: [ids], reload}}
+
+Cada assinante tem um único delta pendente: publicações que chegam enquanto
+o cliente ainda não leu são somadas a ele (coalescência), e o envio respeita
+um intervalo mínimo (EVENTS_MIN_INTERVAL_MS). Cliente lento recebe menos
+mensagens, maiores, sem fila crescendo na memória. Na conexão o cliente
+recebe um "snapshot" (o mesmo JSON de /dashboard-stats/, via cache) e, a cada
+EVENTS_RESYNC_SECONDS, um novo snapshot corrige o que um delta não cobre
+(escritas feitas por outros workers do uvicorn, já que o broadcaster é do processo).
+
+Sem assinantes, stage_* retorna na hora: nenhum custo para as escritas.
+"""
+import asyncio
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from app import cache, money
+
+EVENTS_MAX_SUBSCRIBERS = int(os.getenv("EVENTS_MAX_SUBSCRIBERS", "1000"))
+EVENTS_MIN_INTERVAL_MS = float(os.getenv("EVENTS_MIN_INTERVAL_MS", "250"))
+EVENTS_HEARTBEAT_SECONDS = float(os.getenv("EVENTS_HEARTBEAT_SECONDS", "15"))
+EVENTS_RESYNC_SECONDS = float(os.getenv("EVENTS_RESYNC_SECONDS", "300"))
+
+# Acima disso o delta não lista os IDs alterados e pede recarga da lista de produtos
+MAX_CHANGED_IDS = 500
+
+_SESSION_KEY = "events_delta"
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+class Delta:
+    """Alterações somáveis do dashboard (KPIs, meses do gráfico e produtos)."""
+
+    __slots__ = ("seq", "sale_count", "total_sales", "profit", "months", "products_added",
+                 "products_changed", "products_reload")
+
+    def __init__(self):
+        self.seq = 0
+        self.sale_count = 0
+        self.total_sales = money.ZERO
+        self.profit = money.ZERO
+        self.months = defaultdict(lambda: [money.ZERO, money.ZERO])
+        self.products_added = 0
+        self.products_changed = set()
+        self.products_reload = False
+
+    def __bool__(self) -> bool:
+        return bool(self.sale_count or self.months or self.products_added
+                    or self.products_changed or self.products_reload)
+
+    def add_buckets(self, buckets: dict) -> None:
+        """Soma os agregados do rollup: {(dia, product_id): (vendas, quantidade, total, lucro)}."""
+        for (day, _), (sale_count, _, total_sales, profit) in buckets.items():
+            month = self.months[day.strftime('%Y-%m')]
+            month[0] += total_sales
+            month[1] += profit
+            self.sale_count += sale_count
+            self.total_sales += total_sales
+            self.profit += profit
+
+    def add_products(self, added: int = 0, changed=(), reload: bool = False) -> None:
+        self.products_added += added
+        self.products_changed.update(changed)
+        if reload or len(self.products_changed) > MAX_CHANGED_IDS:
+            self.products_reload = True
+            self.products_changed.clear()
+
+    def merge(self, other: "Delta") -> None:
+        self.seq = max(self.seq, other.seq)
+        self.sale_count += other.sale_count
+        self.total_sales += other.total_sales
+        self.profit += other.profit
+        for month, (total_sales, profit) in other.months.items():
+            bucket = self.months[month]
+            bucket[0] += total_sales
+            bucket[1] += profit
+        self.add_products(other.products_added, other.products_changed, other.products_reload)
+
+    def to_dict(self) -> dict:
+        # Decimal (centavos exatos) na soma; float só na mensagem, como no dashboard
+        return {
+            "seq": self.seq,
+            "kpis": {
+                "total_sales_value": float(self.total_sales),
+                "total_profit": float(self.profit),
+                "total_products": self.products_added,
+                "sale_count": self.sale_count,
+            },
+            "chart": [
+                {"date": month, "total_sales": float(total_sales), "profit": float(profit)}
+                for month, (total_sales, profit) in sorted(self.months.items())
+            ],
+            "products": {
+                "added": self.products_added,
+                "changed": sorted(self.products_changed),
+                "reload": self.products_reload,
+            },
+        }
+
+
+class Subscriber:
+    """Um cliente conectado: um delta pendente e um sinal no event loop dele."""
+
+    def __init__(self, loop, counters):
+        self._loop = loop
+        self._lock = threading.Lock()
+        self._pending = None
+        self._ready = asyncio.Event()
+        self._counters = counters
+
+    def offer(self, delta: Delta) -> None:
+        """Chamado por qualquer thread (rotas síncronas, jobs de importação)."""
+        with self._lock:
+            if self._pending is None:
+                self._pending = Delta()
+                signal = True
+            else:
+                self._counters["coalesced"] += 1
+                signal = False
+            self._pending.merge(delta)
+        if signal:
+            try:
+                self._loop.call_soon_threadsafe(self._ready.set)
+            except RuntimeError:
+                pass  # event loop já encerrado (cliente saindo)
+
+    def take(self):
+        with self._lock:
+            delta, self._pending = self._pending, None
+            self._ready.clear()
+        if delta is not None:
+            self._counters["delivered"] += 1
+        return delta
+
+    def discard(self, upto: int) -> None:
+        """
+        Descarta o pendente se ele só tem publicações até `upto` (já cobertas
+        pelo snapshot). Um pendente com publicações posteriores fica inteiro:
+        melhor somar algo de novo (corrigido no próximo snapshot) do que perder.
+        """
+        with self._lock:
+            if self._pending is not None and self._pending.seq <= upto:
+                self._pending = None
+                self._ready.clear()
+
+    async def next(self, timeout: float):
+        """Próximo delta (coalescido) ou None após `timeout` segundos sem alterações."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        return self.take()
+
+
+class Broadcaster:
+    def __init__(self, max_subscribers: int):
+        self.max_subscribers = max_subscribers
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._counters = {"published": 0, "delivered": 0, "coalesced": 0}
+
+    def has_subscribers(self) -> bool:
+        return bool(self._subscribers)
+
+    @property
+    def seq(self) -> int:
+        """Número da última publicação."""
+        with self._lock:
+            return self._seq
+
+    def subscribe(self) -> Subscriber:
+        subscriber = Subscriber(asyncio.get_running_loop(), self._counters)
+        with self._lock:
+            if len(self._subscribers) >= self.max_subscribers:
+                raise TooManySubscribers(f"Limite de {self.max_subscribers} assinantes atingido.")
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def publish(self, delta: Delta) -> None:
+        if not delta:
+            return
+        with self._lock:
+            self._seq += 1
+            delta.seq = self._seq
+            self._counters["published"] += 1
+            subscribers = list(self._subscribers)
+        for subscriber in subscribers:
+            subscriber.offer(delta)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"subscribers": len(self._subscribers), **self._counters}
+
+
+broadcaster = Broadcaster(EVENTS_MAX_SUBSCRIBERS)
+
+
+# --- Registro nos caminhos de escrita (publicado no commit) ---
+def _staged(db) -> Delta:
+    delta = db.info.get(_SESSION_KEY)
+    if delta is None:
+        delta = db.info[_SESSION_KEY] = Delta()
+    return delta
+
+
+def stage_sales(db, buckets: dict) -> None:
+    """Agregados do rollup gravados nesta transação (chamado por rollup.apply_buckets)."""
+    if broadcaster.has_subscribers() and isinstance(db, Session):
+        _staged(db).add_buckets(buckets)
+
+
+def stage_products(db, added: int = 0, changed=(), reload: bool = False) -> None:
+    """Produtos criados/alterados nesta transação; reload quando os IDs não são conhecidos."""
+    if broadcaster.has_subscribers():
+        _staged(db).add_products(added, changed, reload)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_after_commit(session) -> None:
+    delta = session.info.pop(_SESSION_KEY, None)
+    if delta is not None:
+        # O cache do dashboard sai antes da publicação: um snapshot lido depois
+        # dela já vem do banco (o caminho de escrita invalida de novo em seguida)
+        cache.invalidate(cache.DASHBOARD)
+        broadcaster.publish(delta)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_after_rollback(session) -> None:
+    session.info.pop(_SESSION_KEY, None)
+
+
+# --- Entrega (SSE e WebSocket) ---
+async def feed(subscriber: Subscriber, load_snapshot, is_disconnected=None):
+    """
+    Gera (tipo, dados) para um assinante já inscrito: "snapshot" na conexão e a
+    cada EVENTS_RESYNC_SECONDS, "delta" coalescido e "ping" sem alterações.
+    """
+    interval = EVENTS_MIN_INTERVAL_MS / 1000
+    # Publicações anteriores à leitura já estão no snapshot; as que chegarem
+    # durante a leitura continuam pendentes
+    seq = broadcaster.seq
+    snapshot = await load_snapshot()
+    subscriber.discard(seq)
+    yield "snapshot", snapshot
+    resync_at = time.monotonic() + EVENTS_RESYNC_SECONDS
+
+    while True:
+        if is_disconnected is not None and await is_disconnected():
+            return
+        delta = await subscriber.next(EVENTS_HEARTBEAT_SECONDS)
+        if EVENTS_RESYNC_SECONDS > 0 and time.monotonic() >= resync_at:
+            seq = broadcaster.seq
+            snapshot = await load_snapshot()
+            subscriber.discard(seq)
+            yield "snapshot", snapshot
+            resync_at = time.monotonic() + EVENTS_RESYNC_SECONDS
+        elif delta is None:
+            yield "ping", None
+        else:
+            yield "delta", delta.to_dict()
+            # Publicações até o próximo envio são somadas num único delta
+            if interval > 0:
+                await asyncio.sleep(interval)
+
+
+def sse_message(kind: str, data) -> str:
+    if kind == "ping":
+        return ": ping\n\n"
+    body = json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+    seq = f"id: {data['seq']}\n" if kind == "delta" else ""
+    return f"event: {kind}\n{seq}data: {body}\n\n"
@@ -0,0 +1,328 @@
+# backend/app/exports.py
+"""
+Exportações em streaming de produtos e vendas.
+
+Formatos: csv (padrão, planilhas), ndjson (um objeto JSON por linha),
+parquet e arrow (Arrow IPC stream). Os formatos colunares são montados lote a
+lote direto das tuplas da consulta, sem passar por objetos ORM, e mantêm os
+tipos (inteiros, decimais com 2 casas e datas com hora) sem formatação textual.
+
+A exportação de vendas inclui os meses arquivados (app/archive.py), lidos
+dos arquivos Parquet; com since_date/before_date, só os meses do período são
+abertos, e no banco a consulta também fica restrita ao período.
+
+Parquet/Arrow dependem do pyarrow (opcional): pip install pyarrow
+"""
+import csv
+import io
+import itertools
+import json
+import os
+import zlib
+from datetime import time
+from decimal import Decimal
+
+from sqlalchemy import select
+
+from app import crud, models
+from app.database import SessionLocal
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.ipc
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - depende do ambiente
+    pa = pc = pq = None
+
+ARROW_AVAILABLE = pa is not None
+# Valores monetários saem como decimal exato (R$ com 2 casas), não float
+MONEY_TYPE = pa.decimal128(18, 2) if ARROW_AVAILABLE else None
+COLUMNAR_FORMATS = ("parquet", "arrow")
+
+# Content-Type e extensão de cada formato
+MEDIA_TYPES = {
+    "csv": ("text/csv", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrow"),
+}
+
+PRODUCTS_HEADER = ['ID', 'Nome', 'Preço', 'Categoria ID', 'Categoria']
+SALES_HEADER = ['ID', 'Produto ID', 'Produto', 'Quantidade', 'Total', 'Lucro', 'Data']
+
+# Nomes das colunas nos formatos para máquinas (ndjson/parquet/arrow), na ordem das tuplas
+PRODUCTS_COLUMNS = ['id', 'name', 'price', 'category_id', 'category_name']
+SALES_COLUMNS = ['id', 'product_id', 'product_name', 'quantity', 'total_price', 'profit', 'date']
+
+
+def _products_schema():
+    return pa.schema([
+        ('id', pa.int64()),
+        ('name', pa.string()),
+        ('price', MONEY_TYPE),
+        ('category_id', pa.int64()),
+        ('category_name', pa.string()),
+    ])
+
+
+def _sales_schema():
+    return pa.schema([
+        ('id', pa.int64()),
+        ('product_id', pa.int64()),
+        ('product_name', pa.string()),
+        ('quantity', pa.int64()),
+        ('total_price', MONEY_TYPE),
+        ('profit', MONEY_TYPE),
+        ('date', pa.timestamp('us')),
+    ])
+
+
+def _product_row(row):
+    product_id, name, price, category_id, category_name = row
+    return [product_id, name, price, category_id, category_name or '']
+
+
+def _sale_row(row):
+    sale_id, product_id, product_name, quantity, total_price, profit, date = row
+    return [
+        sale_id,
+        product_id,
+        product_name or '',
+        quantity,
+        total_price,
+        profit,
+        date.strftime('%Y-%m-%d') if date else ''
+    ]
+
+
+# --- Codificadores (cada um entrega bytes lote a lote) ---
+def _gzip(chunks):
+    """Comprime em gzip um fluxo de bytes, sem acumular a saída."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def _encode_csv(header, batches, format_row):
+    """
+    Codifica cada lote em CSV e entrega imediatamente (bytes).
+    Só um lote fica em memória por vez.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def drain():
+        chunk = buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+        return chunk
+
+    writer.writerow(header)
+    yield drain()
+
+    for batch in batches:
+        writer.writerows(format_row(row) for row in batch)
+        chunk = drain()
+        if chunk:
+            yield chunk
+
+
+def _json_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    return value.isoformat() if hasattr(value, "isoformat") else value
+
+
+def _encode_ndjson(columns, batches):
+    """Um objeto JSON por linha; datas em ISO 8601 com hora."""
+    for batch in batches:
+        lines = [
+            json.dumps(dict(zip(columns, map(_json_value, row))), ensure_ascii=False)
+            for row in batch
+        ]
+        if lines:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """
+    Destino de escrita para o pyarrow que só acumula o último trecho escrito.
+    tell() conta o total já escrito (o Parquet usa os offsets no rodapé).
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _record_batch(schema, batch):
+    """Transpõe as tuplas de um lote em colunas tipadas."""
+    columns = list(zip(*batch))
+    arrays = [pa.array(values, type=field.type) for values, field in zip(columns, schema)]
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def _encode_columnar(schema, batches, fmt: str, compress: bool):
+    """
+    Parquet (um row group por lote) ou Arrow IPC stream (um record batch por lote).
+    A compressão é a do próprio formato (zstd), não gzip.
+    """
+    sink = _ChunkSink()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(sink, schema, compression="zstd" if compress else "snappy")
+    else:
+        options = pa.ipc.IpcWriteOptions(compression="zstd" if compress else None)
+        writer = pa.ipc.new_stream(sink, schema, options=options)
+
+    try:
+        for batch in batches:
+            writer.write_batch(_record_batch(schema, batch))
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def _encode(fmt: str, compress: bool, header, columns, schema_fn, batches, format_row):
+    if fmt in COLUMNAR_FORMATS:
+        return _encode_columnar(schema_fn(), batches, fmt, compress)
+    if fmt == "ndjson":
+        stream = _encode_ndjson(columns, batches)
+    else:
+        stream = _encode_csv(header, batches, format_row)
+    return _gzip(stream) if compress else stream
+
+
+# --- Meses arquivados (arquivos Parquet, ver app/archive.py) ---
+def write_sales_parquet(path: str, batches, previous: str = None) -> dict:
+    """
+    Grava lotes de vendas (tuplas de crud.iter_sales_export) num arquivo Parquet
+    com o schema da exportação, um row group por lote. Com `previous`, os row
+    groups desse arquivo vêm antes (arquivamento de vendas que chegaram depois).
+    Retorna os totais gravados: sale_count, quantity, total_sales, profit, min_id, max_id.
+    """
+    schema = _sales_schema()
+    totals = {"sale_count": 0, "quantity": 0, "total_sales": Decimal("0.00"),
+              "profit": Decimal("0.00"), "min_id": None, "max_id": None}
+
+    def count(batch):
+        ids = [row[0] for row in batch]
+        totals["sale_count"] += len(batch)
+        totals["quantity"] += sum(row[3] or 0 for row in batch)
+        totals["total_sales"] += sum((row[4] or 0 for row in batch), Decimal("0.00"))
+        totals["profit"] += sum((row[5] or 0 for row in batch), Decimal("0.00"))
+        totals["min_id"] = min(ids + ([totals["min_id"]] if totals["min_id"] is not None else []))
+        totals["max_id"] = max(ids + ([totals["max_id"]] if totals["max_id"] is not None else []))
+
+    with pq.ParquetWriter(path, schema, compression="zstd") as writer:
+        if previous is not None:
+            for batch in iter_parquet_sales(previous):
+                writer.write_batch(_record_batch(schema, batch))
+                count(batch)
+        for batch in batches:
+            writer.write_batch(_record_batch(schema, batch))
+            count(batch)
+    return totals
+
+
+def iter_parquet_sales(path: str, since_id: int = None, since_date=None, before_date=None,
+                  batch_size: int = crud.EXPORT_BATCH_SIZE):
+    """Lotes de tuplas (mesma ordem de SALES_COLUMNS) de um arquivo, já filtrados."""
+    timestamp = pa.timestamp('us')
+    for record_batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+        mask = None
+        if since_id is not None:
+            mask = pc.greater(record_batch.column('id'), since_id)
+        if since_date is not None:
+            condition = pc.greater_equal(record_batch.column('date'), pa.scalar(since_date, timestamp))
+            mask = condition if mask is None else pc.and_(mask, condition)
+        if before_date is not None:
+            condition = pc.less(record_batch.column('date'), pa.scalar(before_date, timestamp))
+            mask = condition if mask is None else pc.and_(mask, condition)
+        if mask is not None:
+            record_batch = record_batch.filter(mask)
+        if record_batch.num_rows:
+            yield list(zip(*(column.to_pylist() for column in record_batch.columns)))
+
+
+def iter_archived_sales(db, archive_dir: str, since_id: int = None, since_date=None, before_date=None):
+    """
+    Percorre as vendas dos meses arquivados que cruzam o período (poda por mês
+    no catálogo sales_archives e por ID pelo max_id de cada arquivo).
+    """
+    archive = models.SalesArchive
+    query = select(archive.path).order_by(archive.month)
+    if since_date is not None:
+        query = query.where(archive.ends_before > since_date.date())
+    if before_date is not None:
+        # before_date é exclusivo: o mês que começa exatamente nele fica de fora
+        if before_date.time() == time.min:
+            query = query.where(archive.starts_on < before_date.date())
+        else:
+            query = query.where(archive.starts_on <= before_date.date())
+    if since_id is not None:
+        query = query.where(archive.max_id > since_id)
+
+    paths = db.execute(query).scalars().all()
+    if paths and not ARROW_AVAILABLE:
+        raise RuntimeError("Os meses arquivados estão em Parquet e requerem o pyarrow (pip install pyarrow).")
+    for path in paths:
+        yield from iter_parquet_sales(os.path.join(archive_dir, path), since_id, since_date, before_date)
+
+
+# --- Exportações ---
+def stream_products(fmt: str = "csv", compress: bool = False, since_id: int = None):
+    """Gera a exportação de produtos em streaming, com sessão própria."""
+    db = SessionLocal()
+    try:
+        batches = crud.iter_products_export(db, since_id=since_id)
+        yield from _encode(
+            fmt, compress, PRODUCTS_HEADER, PRODUCTS_COLUMNS, _products_schema, batches, _product_row
+        )
+    finally:
+        db.close()
+
+
+def stream_sales(
+    fmt: str = "csv", compress: bool = False, since_id: int = None, since_date=None, before_date=None
+):
+    """
+    Gera a exportação de todas as vendas (ou das novas, ou de um período) em
+    streaming, com sessão própria: primeiro os meses arquivados do período,
+    depois as vendas ainda no banco.
+    """
+    from app import archive
+
+    db = SessionLocal()
+    try:
+        filters = {"since_id": since_id, "since_date": since_date, "before_date": before_date}
+        archived = iter_archived_sales(db, archive.ARCHIVE_DIR, **filters)
+        batches = itertools.chain(archived, crud.iter_sales_export(db, **filters))
+        yield from _encode(
+            fmt, compress, SALES_HEADER, SALES_COLUMNS, _sales_schema, batches, _sale_row
+        )
+    finally:
+        db.close()
+
@@ -0,0 +1,106 @@
+# backend/app/fast_json.py
+"""
+Caminho rápido de serialização das listagens (/products/ e /sales/).
+
+Em vez de carregar objetos ORM e validar cada um (com produto e categoria
+aninhados) pelos schemas Pydantic, as rotas selecionam só as colunas da
+resposta como tuplas, montam os dicionários aqui e codificam tudo de uma vez
+com orjson. O JSON sai igual ao dos schemas (mesmas chaves, na mesma ordem,
+float nos valores monetários, datas ISO), e as rotas continuam declarando
+response_model, então o OpenAPI não muda: só a resposta é montada à mão.
+
+Valores monetários são lidos em centavos (sem passar pelo tipo Money) e
+divididos por 100: o float resultante é o mesmo de float(Decimal).
+
+orjson é opcional (pip install orjson); sem ele, json da biblioteca padrão.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+
+from fastapi import Response
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:  # pragma: no cover - depende do ambiente
+    orjson = None
+    ORJSON_AVAILABLE = False
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(value).__name__}")
+
+
+def dumps(content) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(content, default=_default)
+    return json.dumps(content, default=_default, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def money(cents):
+    return None if cents is None else cents / 100
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content) -> bytes:
+        # Conteúdo já codificado (ex.: vindo do cache) passa direto
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+def response(body: bytes, response: Response) -> FastJSONResponse:
+    """Resposta com os cabeçalhos já gravados pela rota (ETag, X-Next-Cursor)."""
+    return FastJSONResponse(body, headers=dict(response.headers))
+
+
+# --- Linhas → dicionários no formato dos schemas ---
+def category_dict(category_id, name, discount_percentage) -> dict:
+    """schemas.Category (None quando o produto não tem categoria)."""
+    if category_id is None:
+        return None
+    return {"name": name, "discount_percentage": discount_percentage, "id": category_id}
+
+
+def product_dict(row, slim: bool = False) -> dict:
+    """schemas.Product a partir de crud.product_row_columns."""
+    return {
+        "name": row.name,
+        "price": money(row.price_cents),
+        "category_id": row.category_id,
+        "cost": money(row.cost_cents),
+        "id": row.id,
+        "category": None if slim else category_dict(
+            row.category_ref, row.category_name, row.category_discount
+        ),
+    }
+
+
+def sale_dict(row, slim: bool = False) -> dict:
+    """schemas.Sale a partir de crud.sale_row_columns."""
+    product = None
+    if not slim and row.product_ref is not None:
+        product = {
+            "name": row.product_name,
+            "price": money(row.product_price_cents),
+            "category_id": row.product_category_id,
+            "cost": money(row.product_cost_cents),
+            "id": row.product_ref,
+            "category": category_dict(row.category_ref, row.category_name, row.category_discount),
+        }
+    return {
+        "product_id": row.product_id,
+        "quantity": row.quantity,
+        "id": row.id,
+        "total_price": money(row.total_price_cents),
+        "profit": money(row.profit_cents),
+        "date": row.date,
+        "product": product,
+    }
@@ -0,0 +1,665 @@
+# backend/app/importers.py
+import csv
+import io
+import time
+from datetime import datetime
+from decimal import Decimal
+from itertools import islice
+
+from sqlalchemy import insert, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app import models, rollup, cache, money, pricing, events
+
+# Quantidade de linhas inseridas por comando (executemany)
+IMPORT_CHUNK_SIZE = 1000
+# Bytes do início do arquivo usados para detectar o delimitador
+SNIFF_SIZE = 8192
+
+
+def detect_delimiter(sample: bytes) -> str:
+    """';' ou ',' — o que aparecer mais na amostra do início do arquivo."""
+    text = sample.decode("utf-8", errors="ignore")
+    return ";" if text.count(";") > text.count(",") else ","
+
+
+def _readable_stream(binary_file):
+    """
+    Devolve um objeto que o io.TextIOWrapper aceita.
+
+    Antes do Python 3.11, o SpooledTemporaryFile (usado pelo UploadFile do
+    Starlette) não implementa readable()/seekable(); nesse caso usamos o
+    arquivo subjacente (BytesIO ou arquivo temporário em disco).
+    """
+    if hasattr(binary_file, "readable"):
+        return binary_file
+    return binary_file._file
+
+
+def open_csv_stream(binary_file, sniff_size: int = SNIFF_SIZE) -> csv.DictReader:
+    """
+    Abre um CSV em modo streaming sobre o arquivo binário do upload.
+
+    O delimitador (';' ou ',') é detectado só nos primeiros `sniff_size` bytes;
+    a decodificação é incremental, então o arquivo nunca é lido inteiro.
+    """
+    binary_file = _readable_stream(binary_file)
+    delimiter = detect_delimiter(binary_file.read(sniff_size))
+    binary_file.seek(0)
+
+    text_stream = io.TextIOWrapper(binary_file, encoding="utf-8-sig", newline="")
+    csv_reader = csv.DictReader(text_stream, delimiter=delimiter)
+
+    # Normaliza cabeçalhos
+    if csv_reader.fieldnames:
+        csv_reader.fieldnames = [name.strip().lower() for name in csv_reader.fieldnames]
+    return csv_reader
+
+
+class RowError(ValueError):
+    """Erro de validação de uma linha, com a mensagem já pronta para o relatório."""
+
+
+def row_error_message(exc: Exception) -> str:
+    return str(exc) if isinstance(exc, RowError) else f"Erro: {str(exc)}"
+
+
+def parse_sale_date(date_str) -> datetime:
+    """Aceita '%Y-%m-%d' ou '%d/%m/%Y'; sem data válida usa o horário atual."""
+    if date_str:
+        for fmt in ("%Y-%m-%d", "%d/%m/%Y"):
+            try:
+                return datetime.strptime(date_str, fmt)
+            except ValueError:
+                pass
+    return datetime.utcnow()
+
+
+def parse_price(price_str) -> Decimal:
+    """Converte preços ('R$ 1.234,56', '1234.56'...) para Decimal com duas casas."""
+    return money.parse_money(price_str)
+
+
+def build_sale(row: dict, prices):
+    """
+    Valida e precifica uma linha do CSV de vendas com a tabela de preços
+    (pricing.PriceTable): total informado ou preço com desconto × quantidade.
+
+    Retorna o dicionário pronto para o INSERT, None para linhas sem produto ou
+    quantidade (ignoradas), ou levanta a exceção que vira erro da linha.
+    """
+    p_id = row.get("product_id")
+    qtd = row.get("quantity")
+
+    if not p_id or not qtd:
+        return None
+
+    product_id = int(p_id)
+    if product_id not in prices:
+        raise RowError(f"Produto ID {product_id} não encontrado.")
+
+    quantity = int(float(qtd))
+    price = row.get("total_price")
+    if not price and not prices.has_price(product_id):
+        raise RowError(f"Produto ID {product_id} sem preço cadastrado.")
+    total_price, profit = prices.quote(product_id, quantity, money.to_money(price) if price else None)
+
+    return {
+        "product_id": product_id,
+        "quantity": quantity,
+        "total_price": total_price,
+        "profit": profit,
+        "date": parse_sale_date(row.get("date")),
+    }
+
+
+def _chunked(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class CategoryResolver:
+    """
+    Mapa em memória de categorias (id e nome), carregado uma única vez.
+    Categorias que faltam são criadas em lote com create_missing().
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.ids = set()
+        self.by_name = {}
+        for cat_id, name in db.execute(select(models.Category.id, models.Category.name)):
+            self.ids.add(cat_id)
+            self.by_name[name] = cat_id
+        self._pending_ids = set()
+        self._pending_names = set()
+
+    def request(self, category_id=None, category_name=None):
+        """Registra a referência e retorna a chave usada para resolvê-la depois."""
+        if category_id:
+            cat_id = int(category_id)
+            if cat_id not in self.ids:
+                self._pending_ids.add(cat_id)
+            return ("id", cat_id)
+        if category_name:
+            if category_name not in self.by_name:
+                self._pending_names.add(category_name)
+            return ("name", category_name)
+        return None
+
+    def create_missing(self):
+        """Cria de uma vez todas as categorias pendentes (sem commit)."""
+        if self._pending_ids:
+            # Categoria placeholder (nome = ID) para ser corrigida depois
+            placeholders = [
+                {"id": cat_id, "name": str(cat_id), "discount_percentage": 0.0}
+                for cat_id in sorted(self._pending_ids)
+                if str(cat_id) not in self.by_name
+            ]
+            if placeholders:
+                self.db.execute(insert(models.Category), placeholders)
+                for row in placeholders:
+                    self.ids.add(row["id"])
+                    self.by_name[row["name"]] = row["id"]
+            self._pending_ids.clear()
+
+        if self._pending_names:
+            names = sorted(self._pending_names)
+            self.db.execute(
+                insert(models.Category),
+                [{"name": name, "discount_percentage": 0.0} for name in names]
+            )
+            created = self.db.execute(
+                select(models.Category.id, models.Category.name).where(models.Category.name.in_(names))
+            )
+            for cat_id, name in created:
+                self.ids.add(cat_id)
+                self.by_name[name] = cat_id
+            self._pending_names.clear()
+
+    def resolve(self, key):
+        if key is None:
+            return None
+        kind, value = key
+        if kind == "id":
+            return value if value in self.ids else None
+        return self.by_name.get(value)
+
+
+def import_products(
+    db: Session, rows, chunk_size: int = IMPORT_CHUNK_SIZE, start_line: int = 1, on_chunk=None
+) -> dict:
+    """
+    Importa produtos em massa numa única transação.
+
+    `rows` é um iterável de dicionários (cabeçalhos já normalizados).
+    A cada bloco: valida as linhas, resolve as categorias no mapa em memória,
+    cria as que faltam em lote e insere os produtos com um único executemany.
+
+    `on_chunk(linhas_processadas, erros)` é chamado ao fim de cada bloco
+    (usado pelos jobs em segundo plano para progresso e commits parciais).
+    """
+    started = time.perf_counter()
+    resolver = CategoryResolver(db)
+    products_added = 0
+    processed = 0
+    errors = []
+
+    try:
+        for chunk_index, chunk in enumerate(_chunked(rows, chunk_size)):
+            pending = []
+            chunk_errors = []
+            for offset, row in enumerate(chunk):
+                line = start_line + chunk_index * chunk_size + offset
+                try:
+                    name = row.get("name")
+                    price_str = row.get("price")
+
+                    if not name or not price_str:
+                        chunk_errors.append((line, "Nome ou preço faltando."))
+                        continue
+
+                    price = parse_price(price_str)
+                    cost = parse_price(row["cost"]) if row.get("cost") else None
+                    key = resolver.request(row.get("category_id"), row.get("category"))
+                    pending.append((line, name, price, cost, key))
+                except Exception as e:
+                    chunk_errors.append((line, f"Erro: {str(e)}"))
+
+            resolver.create_missing()
+
+            values = []
+            for line, name, price, cost, key in pending:
+                category_id = resolver.resolve(key)
+                if not category_id:
+                    chunk_errors.append((line, "Categoria não identificada."))
+                    continue
+                values.append({"name": name, "price": price, "cost": cost, "category_id": category_id})
+
+            if values:
+                db.execute(insert(models.Product), values)
+                events.stage_products(db, added=len(values), reload=True)
+                products_added += len(values)
+            processed += len(chunk)
+            errors.extend(f"Linha {line}: {message}" for line, message in sorted(chunk_errors))
+            if on_chunk:
+                on_chunk(processed, errors)
+
+        db.commit()
+        cache.invalidate(cache.PRODUCTS, cache.CATEGORIES, cache.DASHBOARD)
+        pricing.invalidate()
+    except Exception:
+        db.rollback()
+        raise
+
+    elapsed = time.perf_counter() - started
+    return {
+        "message": "Processamento de produtos concluído",
+        "products_added": products_added,
+        "errors": errors,
+        "rows_processed": processed,
+        "rows_per_second": round(processed / elapsed, 1) if elapsed > 0 else float(processed),
+    }
+
+
+def import_categories(
+    db: Session, rows, chunk_size: int = IMPORT_CHUNK_SIZE, start_line: int = 1, on_chunk=None
+) -> dict:
+    """
+    Importa categorias em lotes: um SELECT por lote para achar as existentes
+    (atualiza o nome) e um executemany para as novas. Commit único no final.
+    """
+    started = time.perf_counter()
+    created_count = 0
+    updated_count = 0
+    processed = 0
+    errors = []
+    seen = {}
+
+    try:
+        for chunk_index, chunk in enumerate(_chunked(rows, chunk_size)):
+            parsed = []
+            chunk_errors = []
+            for offset, row in enumerate(chunk):
+                line = start_line + chunk_index * chunk_size + offset
+                try:
+                    cat_id = row.get("id")
+                    name = row.get("name")
+                    discount = row.get("discount_percentage", 0.0)
+
+                    if not cat_id or not name:
+                        continue
+
+                    parsed.append((line, int(cat_id), name, float(discount or 0.0)))
+                except Exception as e:
+                    chunk_errors.append((line, f"Erro: {str(e)}"))
+
+            ids = {cat_id for _, cat_id, _, _ in parsed if cat_id not in seen}
+            if ids:
+                for category in db.query(models.Category).filter(models.Category.id.in_(ids)):
+                    seen[category.id] = category
+
+            new_values = {}
+            for line, cat_id, name, discount in parsed:
+                category = seen.get(cat_id)
+                if category is not None:
+                    category.name = name
+                    updated_count += 1
+                elif cat_id in new_values:
+                    new_values[cat_id]["name"] = name
+                    updated_count += 1
+                else:
+                    new_values[cat_id] = {"id": cat_id, "name": name, "discount_percentage": discount}
+                    created_count += 1
+
+            if new_values:
+                db.execute(insert(models.Category), list(new_values.values()))
+                db.flush()
+                for category in db.query(models.Category).filter(models.Category.id.in_(new_values)):
+                    seen[category.id] = category
+            processed += len(chunk)
+            errors.extend(f"Linha {line}: {message}" for line, message in sorted(chunk_errors))
+            if on_chunk:
+                on_chunk(processed, errors)
+
+        db.commit()
+        cache.invalidate(cache.CATEGORIES, cache.PRODUCTS)
+        # Descontos novos valem para as próximas vendas
+        pricing.invalidate()
+    except Exception:
+        db.rollback()
+        raise
+
+    elapsed = time.perf_counter() - started
+    return {
+        "message": "Categorias processadas",
+        "created": created_count,
+        "updated": updated_count,
+        "errors": errors,
+        "rows_processed": processed,
+        "rows_per_second": round(processed / elapsed, 1) if elapsed > 0 else float(processed),
+    }
+
+
+# ========== MODO UPSERT (REIMPORTAÇÃO IDEMPOTENTE DO CATÁLOGO) ==========
+
+def _upsert_by_id(db: Session, table, update_columns):
+    """INSERT ... ON CONFLICT (id) DO UPDATE do dialeto em uso (SQLite ou Postgres)."""
+    dialect = db.get_bind().dialect.name
+    stmt = (postgresql.insert(table) if dialect == "postgresql" else sqlite.insert(table))
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.id],
+        set_={column: stmt.excluded[column] for column in update_columns}
+    )
+
+
+def _upsert_report(message: str, counts: dict, errors: list, processed: int, started: float) -> dict:
+    elapsed = time.perf_counter() - started
+    return {
+        "message": message,
+        **counts,
+        "errors": errors,
+        "rows_processed": processed,
+        "rows_per_second": round(processed / elapsed, 1) if elapsed > 0 else float(processed),
+    }
+
+
+def upsert_categories(
+    db: Session, rows, chunk_size: int = IMPORT_CHUNK_SIZE, start_line: int = 1, on_chunk=None
+) -> dict:
+    """
+    Sincroniza categorias pela chave natural: `id` quando informado, senão `name`.
+
+    Por lote: um SELECT traz o estado atual das chaves do lote, as linhas são
+    comparadas em memória e só as novas/alteradas vão para um único
+    INSERT ... ON CONFLICT (id) DO UPDATE. Linhas iguais não geram escrita.
+    `discount_percentage` vazio mantém o desconto atual.
+    """
+    started = time.perf_counter()
+    table = models.Category.__table__
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    processed = 0
+    errors = []
+
+    try:
+        for chunk_index, chunk in enumerate(_chunked(rows, chunk_size)):
+            parsed = []
+            chunk_errors = []
+            for offset, row in enumerate(chunk):
+                line = start_line + chunk_index * chunk_size + offset
+                try:
+                    cat_id = row.get("id")
+                    name = (row.get("name") or "").strip()
+                    discount = row.get("discount_percentage")
+
+                    if not name:
+                        continue
+
+                    parsed.append((
+                        line, int(cat_id) if cat_id else None, name,
+                        float(discount) if discount else None
+                    ))
+                except Exception as e:
+                    chunk_errors.append((line, f"Erro: {str(e)}"))
+
+            # Estado atual das chaves do lote: {id: [nome, desconto]} e {nome: id}
+            ids = {cat_id for _, cat_id, _, _ in parsed if cat_id is not None}
+            names = {name for _, _, name, _ in parsed}
+            by_id = {}
+            by_name = {}
+            if parsed:
+                for cat_id, name, discount in db.execute(
+                    select(table.c.id, table.c.name, table.c.discount_percentage)
+                    .where(or_(table.c.id.in_(ids), table.c.name.in_(names)))
+                ):
+                    by_id[cat_id] = [name, discount or 0.0]
+                    by_name[name] = cat_id
+
+            changed_ids = set()
+            new_by_name = {}
+            for line, cat_id, name, discount in parsed:
+                if cat_id is None:
+                    cat_id = by_name.get(name)
+                    if cat_id is None:
+                        # Categoria nova sem ID: o banco gera o ID
+                        if name in new_by_name:
+                            if discount is not None and discount != new_by_name[name]:
+                                new_by_name[name] = discount
+                                counts["updated"] += 1
+                            else:
+                                counts["unchanged"] += 1
+                        else:
+                            new_by_name[name] = discount or 0.0
+                            counts["inserted"] += 1
+                        continue
+
+                owner = by_name.get(name)
+                if (owner is not None and owner != cat_id) or (owner is None and name in new_by_name):
+                    chunk_errors.append((line, f"Nome '{name}' já pertence a outra categoria."))
+                    continue
+
+                current = by_id.get(cat_id)
+                if current is None:
+                    by_id[cat_id] = [name, discount or 0.0]
+                    by_name[name] = cat_id
+                    changed_ids.add(cat_id)
+                    counts["inserted"] += 1
+                    continue
+
+                target = [name, current[1] if discount is None else discount]
+                if target == current:
+                    counts["unchanged"] += 1
+                    continue
+                if current[0] != name:
+                    by_name.pop(current[0], None)
+                    by_name[name] = cat_id
+                by_id[cat_id] = target
+                changed_ids.add(cat_id)
+                counts["updated"] += 1
+
+            if changed_ids:
+                db.execute(
+                    _upsert_by_id(db, table, ["name", "discount_percentage"]),
+                    [
+                        {"id": cat_id, "name": by_id[cat_id][0], "discount_percentage": by_id[cat_id][1]}
+                        for cat_id in sorted(changed_ids)
+                    ]
+                )
+            if new_by_name:
+                db.execute(insert(table), [
+                    {"name": name, "discount_percentage": discount}
+                    for name, discount in new_by_name.items()
+                ])
+            processed += len(chunk)
+            errors.extend(f"Linha {line}: {message}" for line, message in sorted(chunk_errors))
+            if on_chunk:
+                on_chunk(processed, errors)
+
+        db.commit()
+        if counts["inserted"] or counts["updated"]:
+            cache.invalidate(cache.CATEGORIES, cache.PRODUCTS)
+            pricing.invalidate()
+    except Exception:
+        db.rollback()
+        raise
+
+    return _upsert_report("Categorias sincronizadas", counts, errors, processed, started)
+
+
+def upsert_products(
+    db: Session, rows, chunk_size: int = IMPORT_CHUNK_SIZE, start_line: int = 1, on_chunk=None
+) -> dict:
+    """
+    Sincroniza produtos pela chave natural (nome + categoria).
+
+    Por lote: um SELECT pelos nomes do lote traz os produtos existentes; os
+    novos entram com um executemany e os de preço/custo alterado com um único
+    INSERT ... ON CONFLICT (id) DO UPDATE. Linhas iguais não geram escrita.
+    Produtos já duplicados no banco (mesma chave) são atualizados juntos.
+    """
+    started = time.perf_counter()
+    table = models.Product.__table__
+    resolver = CategoryResolver(db)
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+    processed = 0
+    errors = []
+
+    try:
+        for chunk_index, chunk in enumerate(_chunked(rows, chunk_size)):
+            pending = []
+            chunk_errors = []
+            for offset, row in enumerate(chunk):
+                line = start_line + chunk_index * chunk_size + offset
+                try:
+                    name = row.get("name")
+                    price_str = row.get("price")
+
+                    if not name or not price_str:
+                        chunk_errors.append((line, "Nome ou preço faltando."))
+                        continue
+
+                    price = parse_price(price_str)
+                    cost = parse_price(row["cost"]) if row.get("cost") else None
+                    key = resolver.request(row.get("category_id"), row.get("category"))
+                    pending.append((line, name, price, cost, key))
+                except Exception as e:
+                    chunk_errors.append((line, f"Erro: {str(e)}"))
+
+            resolver.create_missing()
+
+            # Estado atual: {(nome, categoria): [ids, (preço, custo)]}
+            existing = {}
+            names = {name for _, name, _, _, _ in pending}
+            if names:
+                for product_id, name, category_id, price, cost in db.execute(
+                    select(table.c.id, table.c.name, table.c.category_id, table.c.price, table.c.cost)
+                    .where(table.c.name.in_(names))
+                    .order_by(table.c.id)
+                ):
+                    entry = existing.setdefault((name, category_id), [[], (price, cost)])
+                    entry[0].append(product_id)
+                    if entry[1] != (price, cost):
+                        entry[1] = None  # duplicados divergentes: qualquer valor atualiza
+
+            changed = set()
+            new_values = {}
+            for line, name, price, cost, key in pending:
+                category_id = resolver.resolve(key)
+                if not category_id:
+                    chunk_errors.append((line, "Categoria não identificada."))
+                    continue
+
+                product_key = (name, category_id)
+                current = existing.get(product_key)
+                if current is None:
+                    existing[product_key] = [[], (price, cost)]
+                    new_values[product_key] = (price, cost)
+                    counts["inserted"] += 1
+                    continue
+
+                # Custo vazio no CSV mantém o custo atual
+                if cost is None and current[1] is not None:
+                    cost = current[1][1]
+                if current[1] == (price, cost):
+                    counts["unchanged"] += 1
+                else:
+                    current[1] = (price, cost)
+                    if current[0]:
+                        changed.add(product_key)
+                    else:
+                        new_values[product_key] = (price, cost)
+                    counts["updated"] += 1
+
+            if new_values:
+                db.execute(insert(table), [
+                    {"name": name, "price": price, "cost": cost, "category_id": category_id}
+                    for (name, category_id), (price, cost) in new_values.items()
+                ])
+            if new_values or changed:
+                events.stage_products(db, added=len(new_values), reload=True)
+            if changed:
+                db.execute(_upsert_by_id(db, table, ["price", "cost"]), [
+                    {"id": product_id, "name": name, "category_id": category_id,
+                     "price": existing[(name, category_id)][1][0],
+                     "cost": existing[(name, category_id)][1][1]}
+                    for name, category_id in sorted(changed)
+                    for product_id in existing[(name, category_id)][0]
+                ])
+            processed += len(chunk)
+            errors.extend(f"Linha {line}: {message}" for line, message in sorted(chunk_errors))
+            if on_chunk:
+                on_chunk(processed, errors)
+
+        db.commit()
+        # Sempre: categorias novas podem ter sido criadas mesmo sem produto alterado
+        cache.invalidate(cache.PRODUCTS, cache.CATEGORIES, cache.DASHBOARD)
+        pricing.invalidate()
+    except Exception:
+        db.rollback()
+        raise
+
+    return _upsert_report("Produtos sincronizados", counts, errors, processed, started)
+
+
+def import_sales(
+    db: Session, rows, chunk_size: int = IMPORT_CHUNK_SIZE, start_line: int = 1, on_chunk=None
+) -> dict:
+    """
+    Importa vendas em lotes: os preços vêm da tabela em memória (produtos
+    ausentes dela são buscados numa consulta por lote) e as vendas válidas
+    entram com um executemany. Commit único no final.
+    """
+    started = time.perf_counter()
+    sales_added = 0
+    processed = 0
+    errors = []
+
+    try:
+        for chunk_index, chunk in enumerate(_chunked(rows, chunk_size)):
+            product_ids = set()
+            for row in chunk:
+                try:
+                    product_ids.add(int(row.get("product_id")))
+                except (TypeError, ValueError):
+                    pass
+            prices = pricing.get_table(db, product_ids)
+
+            values = []
+            chunk_errors = []
+            for offset, row in enumerate(chunk):
+                line = start_line + chunk_index * chunk_size + offset
+                try:
+                    sale = build_sale(row, prices)
+                    if sale is not None:
+                        values.append(sale)
+                except Exception as e:
+                    chunk_errors.append((line, row_error_message(e)))
+
+            if values:
+                db.execute(insert(models.Sale), values)
+                rollup.apply_sales(db, values, prices.categories)
+                sales_added += len(values)
+            processed += len(chunk)
+            errors.extend(f"Linha {line}: {message}" for line, message in sorted(chunk_errors))
+            if on_chunk:
+                on_chunk(processed, errors)
+
+        db.commit()
+        cache.invalidate(cache.DASHBOARD, cache.SALES)
+    except Exception:
+        db.rollback()
+        raise
+
+    elapsed = time.perf_counter() - started
+    return {
+        "message": "Importação de vendas concluída",
+        "sales_added": sales_added,
+        "errors": errors,
+        "rows_processed": processed,
+        "rows_per_second": round(processed / elapsed, 1) if elapsed > 0 else float(processed),
+    }
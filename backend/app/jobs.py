@@ -0,0 +1,158 @@
+# backend/app/jobs.py
+"""
+Importações de CSV em segundo plano.
+
+O upload é copiado (em streaming) para um arquivo temporário, um registro em
+import_jobs é criado e a rota responde na hora com o ID do job. Um pool de
+threads processa os arquivos com os mesmos importadores de app/importers.py,
+fazendo commit a cada lote e atualizando o progresso no banco — assim qualquer
+worker do uvicorn consegue responder GET /import-jobs/{id}.
+
+Para não disputar o banco com o tráfego interativo, no máximo
+IMPORT_MAX_CONCURRENT_JOBS jobs rodam ao mesmo tempo por processo e cada lote
+é seguido de uma pausa de IMPORT_THROTTLE_MS.
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from app import cache, columnar_import, importers, metrics, models, parallel_import, pricing
+from app.database import SessionLocal
+
+IMPORT_WORKERS = int(os.getenv("IMPORT_WORKERS", "2"))
+IMPORT_MAX_CONCURRENT_JOBS = int(os.getenv("IMPORT_MAX_CONCURRENT_JOBS", "1"))
+IMPORT_THROTTLE_MS = int(os.getenv("IMPORT_THROTTLE_MS", "10"))
+# Quantos erros ficam visíveis no status enquanto o job roda
+ERRORS_SAMPLE_SIZE = 50
+
+IMPORTERS = {
+    "categories": importers.import_categories,
+    "products": importers.import_products,
+    "sales": importers.import_sales,
+}
+# Variantes escolhidas pelo `engine` do job (ex.: upsert idempotente do catálogo)
+ENGINE_IMPORTERS = {
+    ("categories", "upsert"): importers.upsert_categories,
+    ("products", "upsert"): importers.upsert_products,
+}
+# Importadores que recebem o caminho do arquivo em vez de um leitor CSV
+FILE_IMPORTERS = {
+    ("sales", "parallel"): parallel_import.import_sales_file,
+    ("sales", "columnar"): columnar_import.import_sales_file,
+}
+
+_executor = ThreadPoolExecutor(max_workers=IMPORT_WORKERS, thread_name_prefix="import-job")
+_slots = threading.BoundedSemaphore(IMPORT_MAX_CONCURRENT_JOBS)
+
+
+def submit(kind: str, source, filename: str, engine: str = "default") -> str:
+    """Copia o arquivo enviado, registra o job e agenda o processamento. Retorna o ID."""
+    fd, path = tempfile.mkstemp(prefix="apollo_import_", suffix=".csv")
+    with os.fdopen(fd, "wb") as target:
+        shutil.copyfileobj(source, target, 1024 * 1024)
+
+    job_id = uuid.uuid4().hex
+    db = SessionLocal()
+    try:
+        db.add(models.ImportJob(
+            id=job_id,
+            kind=kind,
+            filename=filename,
+            status="queued",
+            total_bytes=os.path.getsize(path),
+            created_at=datetime.utcnow(),
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+    _executor.submit(_run, job_id, kind, path, engine)
+    return job_id
+
+
+def _run(job_id: str, kind: str, path: str, engine: str = "default") -> None:
+    with _slots:
+        db = SessionLocal()        # sessão da importação
+        jobs_db = SessionLocal()   # sessão só para o progresso do job
+        job = jobs_db.get(models.ImportJob, job_id)
+        try:
+            job.status = "running"
+            job.started_at = job.updated_at = datetime.utcnow()
+            jobs_db.commit()
+
+            with open(path, "rb") as raw:
+                def on_chunk(rows_processed, errors, bytes_processed=None):
+                    # Commit por lote libera o lock de escrita para as outras requisições
+                    db.commit()
+                    job.rows_processed = rows_processed
+                    job.bytes_processed = raw.tell() if bytes_processed is None else bytes_processed
+                    job.errors_count = len(errors)
+                    job.errors_sample = json.dumps(errors[:ERRORS_SAMPLE_SIZE], ensure_ascii=False)
+                    job.updated_at = datetime.utcnow()
+                    jobs_db.commit()
+                    if IMPORT_THROTTLE_MS:
+                        time.sleep(IMPORT_THROTTLE_MS / 1000)
+
+                started = time.perf_counter()
+                file_importer = FILE_IMPORTERS.get((kind, engine))
+                if file_importer:
+                    result = file_importer(db, path, on_chunk=on_chunk)
+                else:
+                    import_fn = ENGINE_IMPORTERS.get((kind, engine), IMPORTERS[kind])
+                    result = import_fn(db, importers.open_csv_stream(raw), on_chunk=on_chunk)
+
+            metrics.record_import(kind, engine, result, time.perf_counter() - started)
+            job.status = "done"
+            job.bytes_processed = job.total_bytes
+            job.errors_count = len(result["errors"])
+            job.errors_sample = json.dumps(result["errors"][:ERRORS_SAMPLE_SIZE], ensure_ascii=False)
+            job.result = json.dumps(result, ensure_ascii=False)
+        except Exception as e:
+            db.rollback()
+            # Lotes anteriores já foram gravados
+            cache.invalidate(cache.PRODUCTS, cache.CATEGORIES, cache.DASHBOARD, cache.SALES)
+            pricing.invalidate()
+            job.status = "failed"
+            job.result = json.dumps({"detail": f"Erro ao processar arquivo: {str(e)}"}, ensure_ascii=False)
+        finally:
+            job.finished_at = job.updated_at = datetime.utcnow()
+            jobs_db.commit()
+            jobs_db.close()
+            db.close()
+            os.remove(path)
+
+
+def job_status(job: models.ImportJob) -> dict:
+    """Progresso do job com linhas/s e ETA estimado pelos bytes já lidos."""
+    rows_per_second = None
+    eta_seconds = None
+    if job.started_at and job.updated_at:
+        elapsed = (job.updated_at - job.started_at).total_seconds()
+        if elapsed > 0:
+            rows_per_second = round(job.rows_processed / elapsed, 1)
+            if job.status == "running" and job.bytes_processed:
+                remaining = max(job.total_bytes - job.bytes_processed, 0)
+                eta_seconds = round(elapsed * remaining / job.bytes_processed, 1)
+
+    return {
+        "id": job.id,
+        "kind": job.kind,
+        "filename": job.filename,
+        "status": job.status,
+        "rows_processed": job.rows_processed or 0,
+        "rows_per_second": rows_per_second,
+        "eta_seconds": eta_seconds,
+        "progress": round(job.bytes_processed / job.total_bytes, 4) if job.total_bytes else None,
+        "errors_count": job.errors_count or 0,
+        "errors": json.loads(job.errors_sample) if job.errors_sample else [],
+        "result": json.loads(job.result) if job.result else None,
+        "created_at": job.created_at,
+        "started_at": job.started_at,
+        "finished_at": job.finished_at,
+    }
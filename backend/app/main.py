@@ -1,17 +1,27 @@
-from fastapi import FastAPI, Depends
+from datetime import date, datetime, timedelta
+from typing import Literal, Optional
+
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
-import csv
-import io
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
-from app import models, crud
-from app.database import engine, get_db
+from app import migrations, exports, rollup, cache, metrics, events, archive
+from app.compression import CompressionMiddleware
+from app.database import engine, async_engine, SessionLocal
+from app.pagination import NEXT_CURSOR_HEADER
 # Importa todos os roteadores
-from app.routers import products, uploads, sales
+from app.routers import products, uploads, sales, analytics, events as events_router
+
+# Cria as tabelas no banco e aplica as migrações pendentes
+migrations.upgrade(engine)
 
-# Cria as tabelas no banco
-models.Base.metadata.create_all(bind=engine)
+# Bancos antigos: popula os agregados do dashboard na primeira execução
+with SessionLocal() as _db:
+    rollup.ensure_backfilled(_db)
+
+# Postgres particionado: partições do mês atual e dos próximos (ver app/archive.py)
+with engine.begin() as _conn:
+    archive.ensure_partitions(_conn)
 
 app = FastAPI()
 
@@ -29,68 +39,99 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, "ETag"],
 )
 
+# --- Compressão gzip/brotli de JSON e CSV (ver app/compression.py) ---
+app.add_middleware(CompressionMiddleware)
+
+# --- Métricas de desempenho (METRICS_ENABLED=true) ---
+if metrics.METRICS_ENABLED:
+    metrics.instrument(app, engine, async_engine)
+
 # Adiciona as rotas
 app.include_router(products.router, tags=["products"])
 app.include_router(uploads.router, tags=["uploads"])
 app.include_router(sales.router, tags=["sales"])
+app.include_router(analytics.router, tags=["analytics"])
+app.include_router(events_router.router, tags=["events"])
 
 @app.get("/")
 def read_root():
     return {"message": "API do Apollo Fullstack rodando!"}
 
-# --- Rotas de Exportação CSV ---
-@app.get("/export/products")
-async def export_products_csv(db: Session = Depends(get_db)):
-    """Exporta todos os produtos para CSV"""
-    products = crud.get_products(db)
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    writer.writerow(['ID', 'Nome', 'Preço', 'Categoria ID', 'Categoria'])
-    
-    for product in products:
-        writer.writerow([
-            product.id,
-            product.name,
-            product.price,
-            product.category_id,
-            product.category.name if product.category else ''
-        ])
-    
-    output.seek(0)
+@app.get("/cache-stats/")
+def read_cache_stats():
+    """Contadores de hit/miss do cache das rotas de leitura"""
+    return cache.stats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def read_metrics():
+    """Latência por rota, SQL por requisição, consultas lentas e importações (formato Prometheus)"""
+    if not metrics.METRICS_ENABLED:
+        raise HTTPException(status_code=404, detail="Métricas desativadas (METRICS_ENABLED=true)")
+    stats = cache.stats()
+    feed = events.broadcaster.stats()
+    return PlainTextResponse(
+        metrics.render(
+            extra_gauges={
+                "apollo_events_subscribers": ("Clientes conectados ao feed do dashboard (SSE/WebSocket)", feed["subscribers"]),
+            },
+            extra_counters={
+                "apollo_events_published_total": ("Deltas publicados pelo feed de alterações", feed["published"]),
+                "apollo_events_coalesced_total": ("Deltas somados a um pendente (clientes conectados)", feed["coalesced"]),
+                "apollo_cache_hits_total": ("Acertos do cache das rotas de leitura", stats["hits"]),
+                "apollo_cache_misses_total": ("Faltas do cache das rotas de leitura", stats["misses"]),
+                "apollo_cache_evictions_total": ("Entradas removidas pelo limite do LRU", stats["evictions"]),
+            },
+        ),
+        media_type="text/plain; version=0.0.4",
+    )
+
+# --- Rotas de Exportação (CSV, NDJSON, Parquet, Arrow) ---
+ExportFormat = Literal["csv", "ndjson", "parquet", "arrow"]
+
+def _export_response(stream, filename: str, fmt: str, compress: bool):
+    """Monta a resposta de download a partir de um gerador (gzip só para csv/ndjson)."""
+    media_type, extension = exports.MEDIA_TYPES[fmt]
+    filename = f"{filename}.{extension}"
+    if compress and fmt not in exports.COLUMNAR_FORMATS:
+        media_type = "application/gzip"
+        filename += ".gz"
     return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=produtos.csv"}
+        stream,
+        media_type=media_type,
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
 
+def _check_format(fmt: str):
+    if fmt in exports.COLUMNAR_FORMATS and not exports.ARROW_AVAILABLE:
+        raise HTTPException(
+            status_code=400, detail="Parquet/Arrow requerem o pyarrow (pip install pyarrow)."
+        )
+
+@app.get("/export/products")
+async def export_products_csv(
+    format: ExportFormat = "csv",
+    compress: bool = False,
+    since_id: Optional[int] = Query(None, description="Só produtos com ID maior (exportação incremental)"),
+):
+    """Exporta todos os produtos (streaming, opcionalmente comprimido)"""
+    _check_format(format)
+    stream = exports.stream_products(format, compress, since_id=since_id)
+    return _export_response(stream, "produtos", format, compress)
+
 @app.get("/export/sales")
-async def export_sales_csv(db: Session = Depends(get_db)):
-    """Exporta todas as vendas para CSV"""
-    sales = crud.get_sales(db, skip=0, limit=10000)
-    
-    output = io.StringIO()
-    writer = csv.writer(output)
-    
-    writer.writerow(['ID', 'Produto ID', 'Produto', 'Quantidade', 'Total', 'Lucro', 'Data'])
-    
-    for sale in sales:
-        writer.writerow([
-            sale.id,
-            sale.product_id,
-            sale.product.name if sale.product else '',
-            sale.quantity,
-            sale.total_price,
-            sale.profit,
-            sale.date.strftime('%Y-%m-%d') if sale.date else ''
-        ])
-    
-    output.seek(0)
-    return StreamingResponse(
-        iter([output.getvalue()]),
-        media_type="text/csv",
-        headers={"Content-Disposition": "attachment; filename=vendas.csv"}
-    )
\ No newline at end of file
+async def export_sales_csv(
+    format: ExportFormat = "csv",
+    compress: bool = False,
+    since_id: Optional[int] = Query(None, description="Só vendas com ID maior (exportação incremental)"),
+    since_date: Optional[date] = Query(None, description="Só vendas a partir desta data"),
+    until_date: Optional[date] = Query(None, description="Só vendas até esta data (inclusive)"),
+):
+    """Exporta todas as vendas (streaming, sem limite de linhas), inclusive as dos meses arquivados"""
+    _check_format(format)
+    since = datetime.combine(since_date, datetime.min.time()) if since_date else None
+    before = datetime.combine(until_date + timedelta(days=1), datetime.min.time()) if until_date else None
+    stream = exports.stream_sales(format, compress, since_id=since_id, since_date=since, before_date=before)
+    return _export_response(stream, "vendas", format, compress)
@@ -0,0 +1,238 @@
+# backend/app/metrics.py
+"""
+Instrumentação de desempenho exposta em GET /metrics (formato Prometheus).
+
+Com METRICS_ENABLED=true:
+- um middleware ASGI mede a latência de cada rota (pelo template, ex.
+  /import-jobs/{job_id}) e, por requisição, o número de consultas SQL e o
+  tempo gasto nelas. O cabeçalho Server-Timing separa banco (db) do restante
+  (app: Python, serialização), útil para ver onde /dashboard-stats/ gasta tempo;
+- eventos do SQLAlchemy cronometram cada comando; os que passam de
+  SLOW_QUERY_MS vão para o log "app.slow_query" com o texto do SQL;
+- as importações registram linhas processadas e tempo, por tipo e engine.
+
+Desligado (padrão), nada é instalado: nenhum middleware nem evento extra.
+"""
+import logging
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "false").lower() in ("1", "true", "yes")
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "200"))
+
+slow_query_logger = logging.getLogger("app.slow_query")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    """Histograma cumulativo com rótulos, no formato do Prometheus."""
+
+    def __init__(self, name: str, help_text: str, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: tuple, value: float) -> None:
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [[0] * len(self.buckets), 0, 0.0]
+            counts = series[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            series[1] += 1
+            series[2] += value
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = [(labels, list(s[0]), s[1], s[2]) for labels, s in self._series.items()]
+        for labels, counts, total, value_sum in sorted(items):
+            base = _labels(self.label_names, labels)
+            for bound, count in zip(self.buckets, counts):
+                yield f'{self.name}_bucket{_labels(self.label_names, labels, le=_number(bound))} {count}'
+            yield f'{self.name}_bucket{_labels(self.label_names, labels, le="+Inf")} {total}'
+            yield f"{self.name}_count{base} {total}"
+            yield f"{self.name}_sum{base} {_number(value_sum)}"
+
+
+class Counter:
+    """Contador (monotônico) com rótulos."""
+
+    def __init__(self, name: str, help_text: str, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: tuple = (), amount: float = 1) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        for labels, value in items:
+            yield f"{self.name}{_labels(self.label_names, labels)} {_number(value)}"
+
+
+def _number(value) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names, values, **extra) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs += [f'{name}="{value}"' for name, value in extra.items()]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+# --- Métricas ---
+REQUEST_SECONDS = Histogram(
+    "apollo_http_request_duration_seconds", "Latência das requisições por rota",
+    ("method", "route", "status"), LATENCY_BUCKETS,
+)
+REQUEST_SQL_QUERIES = Histogram(
+    "apollo_http_request_sql_queries", "Consultas SQL por requisição",
+    ("method", "route"), QUERY_COUNT_BUCKETS,
+)
+REQUEST_SQL_SECONDS = Histogram(
+    "apollo_http_request_sql_seconds", "Tempo gasto em SQL por requisição",
+    ("method", "route"), LATENCY_BUCKETS,
+)
+SQL_SECONDS = Histogram(
+    "apollo_sql_query_duration_seconds", "Duração de cada comando SQL",
+    ("operation",), LATENCY_BUCKETS,
+)
+SLOW_QUERIES = Counter("apollo_sql_slow_queries_total", "Comandos SQL acima de SLOW_QUERY_MS", ("operation",))
+IMPORT_ROWS = Counter("apollo_import_rows_total", "Linhas de CSV processadas", ("kind", "engine"))
+IMPORT_SECONDS = Counter("apollo_import_seconds_total", "Tempo gasto em importações", ("kind", "engine"))
+
+_ALL = (REQUEST_SECONDS, REQUEST_SQL_QUERIES, REQUEST_SQL_SECONDS, SQL_SECONDS, SLOW_QUERIES,
+        IMPORT_ROWS, IMPORT_SECONDS)
+
+# Contadores da requisição corrente: [nº de consultas, segundos em SQL].
+# O threadpool do Starlette copia o contexto, então as rotas síncronas também somam aqui.
+_request_sql = ContextVar("request_sql", default=None)
+
+
+# --- SQL ---
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else "OTHER"
+    SQL_SECONDS.observe((operation,), elapsed)
+
+    stats = _request_sql.get()
+    if stats is not None:
+        stats[0] += 1
+        stats[1] += elapsed
+
+    if elapsed * 1000 >= SLOW_QUERY_MS:
+        SLOW_QUERIES.inc((operation,))
+        slow_query_logger.warning(
+            "Consulta lenta (%.1f ms%s): %s", elapsed * 1000, ", executemany" if executemany else "",
+            " ".join(statement.split())
+        )
+
+
+def instrument_engine(engine) -> None:
+    """Cronometra os comandos de um Engine (ou do sync_engine de um AsyncEngine)."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# --- Requisições ---
+class MetricsMiddleware:
+    """Middleware ASGI puro (sem BaseHTTPMiddleware, não interfere no streaming)."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        stats = [0, 0.0]
+        token = _request_sql.set(stats)
+        status = [500]
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                # Até aqui a rota já consultou o banco e serializou a resposta
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                db_ms = stats[1] * 1000
+                headers = list(message.get("headers", []))
+                headers.append((
+                    b"server-timing",
+                    f"db;dur={db_ms:.1f};desc=\"{stats[0]} queries\", app;dur={elapsed_ms - db_ms:.1f}".encode()
+                ))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _request_sql.reset(token)
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope["method"]
+            REQUEST_SECONDS.observe((method, route, str(status[0])), time.perf_counter() - started)
+            REQUEST_SQL_QUERIES.observe((method, route), stats[0])
+            REQUEST_SQL_SECONDS.observe((method, route), stats[1])
+
+
+# --- Importações ---
+def record_import(kind: str, engine: str, result: dict, seconds: float) -> None:
+    if not METRICS_ENABLED:
+        return
+    IMPORT_ROWS.inc((kind, engine), result.get("rows_processed", 0))
+    IMPORT_SECONDS.inc((kind, engine), seconds)
+
+
+# --- Exposição ---
+def render(extra_gauges: dict = None, extra_counters: dict = None) -> str:
+    """
+    Texto no formato de exposição do Prometheus (0.0.4).
+    extra_gauges/extra_counters: {nome: (ajuda, valor)} de fora deste módulo;
+    contadores (totais que só crescem) devem terminar em _total.
+    """
+    lines = []
+    for metric in _ALL:
+        lines.extend(metric.render())
+    for kind, extra in (("gauge", extra_gauges), ("counter", extra_counters)):
+        for name, (help_text, value) in (extra or {}).items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.append(f"{name} {_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def instrument(app, *engines) -> None:
+    """Instala o middleware e os eventos SQL (chamado só com METRICS_ENABLED)."""
+    app.add_middleware(MetricsMiddleware)
+    for engine in engines:
+        if engine is not None:
+            instrument_engine(getattr(engine, "sync_engine", engine))
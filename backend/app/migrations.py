@@ -0,0 +1,195 @@
+# backend/app/migrations.py
+"""
+Migrações de esquema versionadas.
+
+Bancos novos são criados direto no esquema atual (create_all) e marcados com
+todas as versões. Bancos existentes (app.db antigo ou Postgres em produção)
+recebem só as migrações que faltam, sem recriar tabelas nem perder dados.
+Cada migração roda na sua própria transação e deve ser idempotente.
+
+Uso: python -m app.migrations [upgrade|status]
+"""
+import sqlite3
+import sys
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app import models, rollup, search
+
+_metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    _metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String, nullable=False),
+    Column("applied_at", DateTime, nullable=False),
+)
+
+# (versão, descrição, função(conn)), em ordem
+MIGRATIONS = []
+
+
+def migration(version: int, description: str):
+    def register(fn):
+        MIGRATIONS.append((version, description, fn))
+        MIGRATIONS.sort(key=lambda item: item[0])
+        return fn
+    return register
+
+
+# --- Utilitários para as migrações ---
+def create_index_if_missing(conn: Connection, table, index_name: str) -> None:
+    """Cria um índice declarado no modelo, caso ainda não exista no banco."""
+    index = next(ix for ix in table.indexes if ix.name == index_name)
+    existing = {ix["name"] for ix in inspect(conn).get_indexes(table.name)}
+    if index_name not in existing:
+        index.create(conn)
+
+
+def add_column_if_missing(conn: Connection, table, column_key: str) -> None:
+    """ALTER TABLE ... ADD COLUMN para uma coluna declarada no modelo (pela chave do atributo)."""
+    column = table.c[column_key]
+    existing = {col["name"] for col in inspect(conn).get_columns(table.name)}
+    if column.name in existing:
+        return
+    column_type = column.type.compile(dialect=conn.dialect)
+    conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+
+
+# ALTER TABLE ... DROP COLUMN só existe a partir do SQLite 3.35
+SQLITE_DROP_COLUMN = (3, 35, 0)
+
+
+def require_drop_column(conn: Connection) -> None:
+    """Falha antes de qualquer alteração se o SQLite do Python não tem DROP COLUMN."""
+    if conn.dialect.name == "sqlite" and sqlite3.sqlite_version_info < SQLITE_DROP_COLUMN:
+        raise RuntimeError(
+            "Esta migração usa ALTER TABLE ... DROP COLUMN, que requer SQLite 3.35+ "
+            f"(este Python usa o {sqlite3.sqlite_version}). Atualize o Python/SQLite e rode de novo; "
+            "o banco não foi alterado."
+        )
+
+
+def drop_column_if_exists(conn: Connection, table_name: str, column_name: str) -> None:
+    """ALTER TABLE ... DROP COLUMN (SQLite 3.35+ ou Postgres)."""
+    require_drop_column(conn)
+    existing = {col["name"] for col in inspect(conn).get_columns(table_name)}
+    if column_name in existing:
+        conn.execute(text(f'ALTER TABLE {table_name} DROP COLUMN {column_name}'))
+
+
+# --- Migrações ---
+@migration(1, "Índices sales(date), sales(product_id, date) e products(category_id)")
+def _sales_hot_path_indexes(conn: Connection) -> None:
+    create_index_if_missing(conn, models.Sale.__table__, "ix_sales_date")
+    create_index_if_missing(conn, models.Sale.__table__, "ix_sales_product_id_date")
+    create_index_if_missing(conn, models.Product.__table__, "ix_products_category_id")
+
+
+# (tabela, coluna antiga em float/REAL, chave da nova coluna em centavos)
+_MONEY_COLUMNS = [
+    (models.Product.__table__, "price"),
+    (models.Sale.__table__, "total_price"),
+    (models.Sale.__table__, "profit"),
+]
+_DAILY_MONEY_COLUMNS = ["total_sales", "profit"]
+
+
+@migration(2, "Valores monetários em centavos inteiros (products, sales e sales_daily)")
+def _money_in_cents(conn: Connection) -> None:
+    require_drop_column(conn)
+    for table, key in _MONEY_COLUMNS:
+        new_column = table.c[key].name
+        old_exists = key in {col["name"] for col in inspect(conn).get_columns(table.name)}
+        add_column_if_missing(conn, table, key)
+        if old_exists:
+            # NUMERIC antes do ROUND: arredonda meio centavo para cima também no Postgres
+            conn.execute(text(
+                f"UPDATE {table.name} SET {new_column} = CAST(ROUND(CAST({key} AS NUMERIC) * 100) AS BIGINT) "
+                f"WHERE {key} IS NOT NULL AND {new_column} IS NULL"
+            ))
+            drop_column_if_exists(conn, table.name, key)
+
+    # Os agregados são recalculados a partir das vendas já convertidas (somas exatas)
+    daily = models.DailySales.__table__
+    for key in _DAILY_MONEY_COLUMNS:
+        add_column_if_missing(conn, daily, key)
+        drop_column_if_exists(conn, daily.name, key)
+    rollup.refill(conn)
+
+
+@migration(3, "Custo por produto (products.cost_cents)")
+def _product_cost(conn: Connection) -> None:
+    add_column_if_missing(conn, models.Product.__table__, "cost")
+
+
+@migration(4, "Índice de busca de produtos (FTS5 no SQLite, tsvector/trigramas no Postgres)")
+def _product_search_index(conn: Connection) -> None:
+    # Bancos novos recebem o índice no create_all (evento after_create em app/search.py)
+    search.create_index(conn)
+
+
+# --- Execução ---
+def _applied_versions(conn: Connection) -> set:
+    return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def _mark_applied(conn: Connection, version: int, description: str) -> None:
+    conn.execute(schema_migrations.insert().values(
+        version=version, description=description, applied_at=datetime.utcnow()
+    ))
+
+
+def upgrade(engine: Engine) -> list:
+    """Cria tabelas novas e aplica as migrações pendentes. Retorna as versões aplicadas."""
+    with engine.begin() as conn:
+        inspector = inspect(conn)
+        fresh = not any(inspector.has_table(t.name) for t in models.Base.metadata.sorted_tables)
+        schema_migrations.create(conn, checkfirst=True)
+
+    # Tabelas que ainda não existem já nascem no esquema atual
+    models.Base.metadata.create_all(bind=engine)
+
+    applied = []
+    if fresh:
+        with engine.begin() as conn:
+            for version, description, _ in MIGRATIONS:
+                _mark_applied(conn, version, description)
+        return applied
+
+    with engine.connect() as conn:
+        done = _applied_versions(conn)
+
+    for version, description, fn in MIGRATIONS:
+        if version in done:
+            continue
+        with engine.begin() as conn:
+            fn(conn)
+            _mark_applied(conn, version, description)
+        applied.append(version)
+    return applied
+
+
+def status(engine: Engine) -> list:
+    """Lista (versão, descrição, aplicada?) de todas as migrações conhecidas."""
+    with engine.begin() as conn:
+        schema_migrations.create(conn, checkfirst=True)
+        done = _applied_versions(conn)
+    return [(version, description, version in done) for version, description, _ in MIGRATIONS]
+
+
+if __name__ == "__main__":
+    from app.database import engine
+
+    command = sys.argv[1] if len(sys.argv) > 1 else "upgrade"
+    if command == "upgrade":
+        versions = upgrade(engine)
+        print(f"Migrações aplicadas: {versions or 'nenhuma (banco atualizado)'}")
+    elif command == "status":
+        for version, description, done in status(engine):
+            print(f"[{'x' if done else ' '}] {version:03d} {description}")
+    else:
+        print("Uso: python -m app.migrations [upgrade|status]")
+        sys.exit(1)
@@ -1,8 +1,9 @@
 # backend/app/models.py
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime, Date, Index, Text
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from .database import Base
+from .money import Money
 
 class Category(Base):
     __tablename__ = "categories"
@@ -19,8 +20,10 @@ class Product(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, index=True)
-    price = Column(Float) # Preço base
-    category_id = Column(Integer, ForeignKey("categories.id"))
+    price = Column("price_cents", Money, key="price")  # Preço base (centavos no banco)
+    # Custo unitário; sem custo, o lucro usa a margem padrão (app/pricing.py)
+    cost = Column("cost_cents", Money, key="cost", nullable=True)
+    category_id = Column(Integer, ForeignKey("categories.id"), index=True)
 
     category = relationship("Category", back_populates="products")
     sales = relationship("Sale", back_populates="product")
@@ -31,8 +34,68 @@ class Sale(Base):
     id = Column(Integer, primary_key=True, index=True)
     product_id = Column(Integer, ForeignKey("products.id"))
     quantity = Column(Integer)
-    total_price = Column(Float)  # Valor total da venda
-    profit = Column(Float)       # Lucro da venda
+    total_price = Column("total_price_cents", Money, key="total_price")  # Valor total da venda
+    profit = Column("profit_cents", Money, key="profit")                   # Lucro da venda
     date = Column(DateTime, default=datetime.utcnow)
 
-    product = relationship("Product", back_populates="sales")
\ No newline at end of file
+    product = relationship("Product", back_populates="sales")
+
+    # Índices das consultas quentes: listagem por data e filtro por produto + período.
+    # Bancos existentes recebem os índices pela migração 1 (app/migrations.py).
+    __table_args__ = (
+        Index("ix_sales_date", "date"),
+        Index("ix_sales_product_id_date", "product_id", "date"),
+    )
+
+class DailySales(Base):
+    """Agregado diário de vendas por produto, mantido a cada venda (ver app/rollup.py)."""
+    __tablename__ = "sales_daily"
+
+    day = Column(Date, primary_key=True)
+    product_id = Column(Integer, primary_key=True)
+    category_id = Column(Integer, index=True)  # Categoria do produto no momento da venda
+    sale_count = Column(Integer, default=0)
+    quantity = Column(Integer, default=0)
+    total_sales = Column("total_sales_cents", Money, key="total_sales", default=0)
+    profit = Column("profit_cents", Money, key="profit", default=0)
+
+class ImportJob(Base):
+    """Importação de CSV em segundo plano (ver app/jobs.py). Consultável por qualquer worker."""
+    __tablename__ = "import_jobs"
+
+    id = Column(String, primary_key=True)
+    kind = Column(String)                        # categories | products | sales
+    filename = Column(String)
+    status = Column(String, default="queued")    # queued | running | done | failed
+    total_bytes = Column(Integer, default=0)
+    bytes_processed = Column(Integer, default=0)
+    rows_processed = Column(Integer, default=0)
+    errors_count = Column(Integer, default=0)
+    errors_sample = Column(Text)                 # JSON: primeiros erros encontrados
+    result = Column(Text)                        # JSON: relatório final do importador
+    created_at = Column(DateTime, default=datetime.utcnow, index=True)
+    started_at = Column(DateTime)
+    updated_at = Column(DateTime)
+    finished_at = Column(DateTime)
+
+class SalesArchive(Base):
+    """
+    Mês de vendas arquivado (ver app/archive.py): as vendas saíram de `sales`
+    para um arquivo Parquet e o dashboard segue lendo os agregados de sales_daily,
+    que ficam congelados para o mês.
+    """
+    __tablename__ = "sales_archives"
+
+    month = Column(String, primary_key=True)     # 'YYYY-MM'
+    starts_on = Column(Date, nullable=False)     # primeiro dia do mês
+    ends_before = Column(Date, nullable=False)   # primeiro dia do mês seguinte
+    path = Column(String, nullable=False)        # arquivo Parquet (relativo a ARCHIVE_DIR)
+    sale_count = Column(Integer, default=0)
+    quantity = Column(Integer, default=0)
+    total_sales = Column("total_sales_cents", Money, key="total_sales", default=0)
+    profit = Column("profit_cents", Money, key="profit", default=0)
+    min_id = Column(Integer)
+    max_id = Column(Integer)
+    size_bytes = Column(Integer, default=0)
+    sha256 = Column(String)
+    archived_at = Column(DateTime, default=datetime.utcnow)
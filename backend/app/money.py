@@ -0,0 +1,77 @@
+# backend/app/money.py
+"""
+Valores monetários em centavos inteiros.
+
+No banco, preços, totais e lucros são BIGINT em centavos (colunas *_cents),
+então SUM/ORDER BY são exatos e baratos. No Python os valores circulam como
+Decimal com duas casas (R$), convertidos pelo tipo Money na entrada e na
+saída; a API continua expondo números (float) no JSON.
+
+Arredondamento: meio centavo para cima (ROUND_HALF_UP), como no varejo.
+"""
+from decimal import ROUND_HALF_UP, Decimal, InvalidOperation
+
+from sqlalchemy import BigInteger
+from sqlalchemy.types import TypeDecorator
+
+CENT = Decimal("0.01")
+ZERO = Decimal("0.00")
+
+
+def to_money(value) -> Decimal:
+    """Converte int/float/str/Decimal para Decimal com duas casas."""
+    if isinstance(value, Decimal):
+        amount = value
+    elif isinstance(value, float):
+        # repr evita levar o erro binário do float para o Decimal (19.99 e não 19.989999...)
+        amount = Decimal(repr(value))
+    else:
+        try:
+            amount = Decimal(str(value).strip())
+        except InvalidOperation:
+            raise ValueError(f"Valor monetário inválido: {value!r}") from None
+    if not amount.is_finite():
+        raise ValueError(f"Valor monetário inválido: {value!r}")
+    return amount.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def to_cents(value) -> int:
+    return int(to_money(value).scaleb(2))
+
+
+def from_cents(cents) -> Decimal:
+    return Decimal(cents).scaleb(-2)
+
+
+def parse_money(text) -> Decimal:
+    """
+    Lê preços de CSV: 'R$ 1.234,56', '1234,56', '1,234.56' ou '1234.56'.
+    O último separador seguido de 1-2 dígitos é o decimal; os demais são milhares
+    (um único '.' seguido de 3 dígitos, como em '1.234', também é milhar).
+    """
+    clean = str(text).replace("R$", "").strip().replace(" ", "")
+    last = max(clean.rfind(","), clean.rfind("."))
+    if last >= 0 and 1 <= len(clean) - last - 1 <= 2:
+        integer, fraction = clean[:last], clean[last + 1:]
+    else:
+        integer, fraction = clean, ""
+    integer = integer.replace(".", "").replace(",", "")
+    return to_money(f"{integer}.{fraction}" if fraction else integer)
+
+
+class Money(TypeDecorator):
+    """BIGINT em centavos no banco, Decimal (R$) no Python."""
+
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return to_cents(value)
+
+    def process_result_value(self, value, dialect):
+        if value is None:
+            return None
+        # SUM/AVG podem voltar como float ou Decimal, dependendo do banco
+        return from_cents(value if isinstance(value, int) else Decimal(value))
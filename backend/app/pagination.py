@@ -0,0 +1,43 @@
+# backend/app/pagination.py
+"""
+Paginação por chave (keyset) com cursores opacos.
+
+O cursor guarda a ordenação usada e os valores da última linha entregue
+(coluna de ordenação + id para desempate). A próxima página começa com um
+WHERE (coluna, id) < (valor, id) em vez de OFFSET, então o custo de uma
+página não cresce com a profundidade.
+"""
+import base64
+import json
+from datetime import datetime
+
+# Cabeçalho de resposta com o cursor da próxima página
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(sort: str, descending: bool, value, last_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps({"s": sort, "d": descending, "v": value, "id": last_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, sort: str, descending: bool):
+    """Retorna (valor, id) da última linha; o cursor precisa ser da mesma ordenação."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if payload["s"] != sort or payload["d"] != descending:
+            raise InvalidCursor("Cursor não corresponde à ordenação pedida.")
+        value = payload["v"]
+        if sort == "date" and value is not None:
+            value = datetime.fromisoformat(value)
+        return value, int(payload["id"])
+    except InvalidCursor:
+        raise
+    except Exception:
+        raise InvalidCursor("Cursor inválido.")
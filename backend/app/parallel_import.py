@@ -0,0 +1,157 @@
+# backend/app/parallel_import.py
+"""
+Importação de vendas com parsing/validação em paralelo (vários núcleos).
+
+O arquivo é dividido em faixas de bytes alinhadas a quebras de linha. Cada
+faixa é lida, parseada e validada num processo do pool contra a tabela de
+preços (app/pricing.py), recarregada do banco uma única vez e enviada a cada
+processo na inicialização. Os lotes validados voltam na ordem do arquivo
+e um único escritor (este processo) faz os INSERTs.
+
+Limitação: campos entre aspas com quebra de linha dentro não são suportados
+(a divisão por bytes assume um registro por linha, o que vale para o CSV de vendas).
+"""
+import csv
+import io
+import multiprocessing
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app import cache, models, pricing, rollup
+from app.importers import SNIFF_SIZE, build_sale, detect_delimiter, row_error_message
+
+IMPORT_PROCESSES = int(os.getenv("IMPORT_PROCESSES", str(os.cpu_count() or 2)))
+# Tamanho de cada faixa de bytes enviada a um processo
+PARALLEL_CHUNK_BYTES = int(os.getenv("PARALLEL_CHUNK_BYTES", str(4 * 1024 * 1024)))
+
+# Tabela de preços no processo filho (preenchida por _init_worker)
+_prices = None
+
+
+def _init_worker(prices) -> None:
+    global _prices
+    _prices = prices
+
+
+def read_header(path: str):
+    """Retorna (cabeçalhos normalizados, delimitador, offset do 1º registro)."""
+    with open(path, "rb") as f:
+        delimiter = detect_delimiter(f.read(SNIFF_SIZE))
+        f.seek(0)
+        header_line = f.readline()
+        data_start = f.tell()
+
+    header_text = header_line.decode("utf-8-sig")
+    fieldnames = next(csv.reader([header_text], delimiter=delimiter), [])
+    return [name.strip().lower() for name in fieldnames], delimiter, data_start
+
+
+def split_ranges(path: str, start: int, chunk_bytes: int = PARALLEL_CHUNK_BYTES):
+    """Divide [start, fim do arquivo) em faixas que terminam numa quebra de linha."""
+    size = os.path.getsize(path)
+    ranges = []
+    with open(path, "rb") as f:
+        position = start
+        while position < size:
+            end = min(position + chunk_bytes, size)
+            if end < size:
+                f.seek(end)
+                f.readline()  # avança até o fim da linha corrente
+                end = f.tell()
+            ranges.append((position, end))
+            position = end
+    return ranges
+
+
+def _parse_range(path: str, start: int, end: int, fieldnames, delimiter: str):
+    """
+    Roda no processo filho: valida os registros da faixa.
+    Retorna (vendas válidas, [(índice_local, mensagem)], nº de registros).
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        text = f.read(end - start).decode("utf-8")
+
+    reader = csv.DictReader(io.StringIO(text, newline=""), fieldnames=fieldnames, delimiter=delimiter)
+    values = []
+    errors = []
+    count = 0
+    for index, row in enumerate(reader):
+        count += 1
+        try:
+            sale = build_sale(row, _prices)
+            if sale is not None:
+                values.append(sale)
+        except Exception as e:
+            errors.append((index, row_error_message(e)))
+    return values, errors, count
+
+
+def import_sales_file(db: Session, path: str, processes: int = None, on_chunk=None) -> dict:
+    """
+    Importa o CSV de vendas em `path` usando um pool de processos.
+    Mesmo relatório (e mesma numeração de linhas) de importers.import_sales.
+    """
+    started = time.perf_counter()
+    processes = processes or IMPORT_PROCESSES
+    fieldnames, delimiter, data_start = read_header(path)
+    ranges = split_ranges(path, data_start)
+
+    # Recarregada: o arquivo pode citar produtos criados por outros workers
+    prices = pricing.get_table(db, fresh=True)
+
+    sales_added = 0
+    processed = 0
+    errors = []
+
+    # spawn: seguro mesmo com o servidor rodando threads
+    context = multiprocessing.get_context("spawn")
+    try:
+        with ProcessPoolExecutor(
+            max_workers=processes, mp_context=context, initializer=_init_worker, initargs=(prices,)
+        ) as pool:
+            # Janela limitada de faixas em andamento: memória não cresce com o arquivo
+            pending = deque()
+            queue = iter(ranges)
+            for start, end in queue:
+                pending.append((end, pool.submit(_parse_range, path, start, end, fieldnames, delimiter)))
+                if len(pending) >= processes * 2:
+                    break
+
+            while pending:
+                end, future = pending.popleft()
+                values, range_errors, count = future.result()
+                next_range = next(queue, None)
+                if next_range:
+                    pending.append((next_range[1], pool.submit(
+                        _parse_range, path, next_range[0], next_range[1], fieldnames, delimiter
+                    )))
+
+                if values:
+                    db.execute(insert(models.Sale), values)
+                    rollup.apply_sales(db, values, prices.categories)
+                    sales_added += len(values)
+                errors.extend(f"Linha {processed + index + 1}: {message}" for index, message in range_errors)
+                processed += count
+                if on_chunk:
+                    on_chunk(processed, errors, end)
+
+        db.commit()
+        cache.invalidate(cache.DASHBOARD, cache.SALES)
+    except Exception:
+        db.rollback()
+        raise
+
+    elapsed = time.perf_counter() - started
+    return {
+        "message": "Importação de vendas concluída",
+        "sales_added": sales_added,
+        "errors": errors,
+        "rows_processed": processed,
+        "rows_per_second": round(processed / elapsed, 1) if elapsed > 0 else float(processed),
+    }
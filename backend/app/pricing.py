@@ -0,0 +1,197 @@
+# backend/app/pricing.py
+"""
+Precificação das vendas: total e lucro a partir do preço do produto, do
+desconto da categoria e do custo do produto.
+
+- preço unitário = preço × (1 − desconto da categoria), arredondado no centavo;
+- total = preço unitário × quantidade (ou o total informado no CSV);
+- lucro = total − custo × quantidade; produtos sem custo usam a margem
+  padrão PRICING_DEFAULT_MARGIN (30%) sobre o total.
+
+As contas por venda são feitas em centavos inteiros. A tabela de preços
+(produto → preço unitário, custo e categoria) fica em memória: é carregada
+com uma única consulta, recarregada depois de PRICING_TTL_SECONDS (outros
+workers também alteram preços) e descartada por invalidate() nos caminhos de
+escrita de produtos e categorias. Produtos que ainda não estão na tabela são
+buscados em lote na primeira venda. Vendas avulsas, lotes, o gerador de
+vendas e os três importadores usam as mesmas regras (quote_cents e, no
+importador colunar, price_arrays).
+"""
+import os
+import threading
+import time
+from decimal import ROUND_HALF_UP, Decimal
+
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+
+from app import models, money, schemas
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - depende do ambiente
+    np = None
+
+PRICING_DEFAULT_MARGIN = Decimal(os.getenv("PRICING_DEFAULT_MARGIN", "0.30"))
+PRICING_TTL_SECONDS = float(os.getenv("PRICING_TTL_SECONDS", "60"))
+
+# Margem em pontos-base: o lucro padrão sai de uma conta só com inteiros
+_MARGIN_BP = int((PRICING_DEFAULT_MARGIN * 10000).to_integral_value(ROUND_HALF_UP))
+
+
+def margin_cents(total_cents: int) -> int:
+    """Lucro pela margem padrão, com meio centavo arredondado para longe do zero."""
+    amount = (abs(total_cents) * _MARGIN_BP + 5000) // 10000
+    return amount if total_cents >= 0 else -amount
+
+
+def unit_cents(price, discount_percentage) -> int:
+    """Preço unitário em centavos com o desconto da categoria (None sem preço)."""
+    if price is None:
+        return None
+    if not discount_percentage:
+        return money.to_cents(price)
+    factor = (Decimal(100) - Decimal(str(discount_percentage))) / 100
+    return money.to_cents(money.to_money(price) * factor)
+
+
+def _catalog_query():
+    return (
+        select(
+            models.Product.id,
+            models.Product.price,
+            models.Product.cost,
+            models.Product.category_id,
+            models.Category.discount_percentage,
+        )
+        .outerjoin(models.Category, models.Product.category_id == models.Category.id)
+    )
+
+
+class PriceTable:
+    """
+    Preços de venda em centavos por produto. Picklable (sem os produtos
+    serializados nem os arrays), para ser enviada aos processos do importador paralelo.
+    """
+
+    def __init__(self):
+        self.units = {}        # product_id -> preço unitário com desconto (None sem preço)
+        self.costs = {}        # product_id -> custo unitário (None sem custo)
+        self.categories = {}   # product_id -> category_id
+        self.loaded_at = time.monotonic()
+        self._products = {}    # product_id -> schemas.Product serializado (respostas da API)
+        self._arrays = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        return {"units": self.units, "costs": self.costs, "categories": self.categories}
+
+    def __setstate__(self, state):
+        self.__init__()
+        self.__dict__.update(state)
+
+    def __contains__(self, product_id) -> bool:
+        return product_id in self.units
+
+    def load(self, db, product_ids=None) -> None:
+        """Carrega todo o catálogo (product_ids=None) ou só os produtos informados."""
+        stmt = _catalog_query()
+        if product_ids is not None:
+            stmt = stmt.where(models.Product.id.in_(product_ids))
+        rows = db.execute(stmt).all()
+        with self._lock:
+            for product_id, price, cost, category_id, discount in rows:
+                self.units[product_id] = unit_cents(price, discount)
+                self.costs[product_id] = None if cost is None else money.to_cents(cost)
+                self.categories[product_id] = category_id
+            self._arrays = None
+
+    def has_price(self, product_id) -> bool:
+        return self.units.get(product_id) is not None
+
+    def quote_cents(self, product_id: int, quantity: int, total_cents: int = None):
+        """(total, lucro) em centavos; total_cents informado substitui preço × quantidade."""
+        if total_cents is None:
+            unit = self.units[product_id]
+            if unit is None:
+                raise ValueError(f"Produto ID {product_id} sem preço cadastrado.")
+            total_cents = unit * quantity
+        cost = self.costs.get(product_id)
+        profit = margin_cents(total_cents) if cost is None else total_cents - cost * quantity
+        return total_cents, profit
+
+    def quote(self, product_id: int, quantity: int, total=None):
+        """(total, lucro) em Decimal (R$)."""
+        total_cents, profit = self.quote_cents(
+            product_id, quantity, None if total is None else money.to_cents(total)
+        )
+        return money.from_cents(total_cents), money.from_cents(profit)
+
+    def products(self, db, product_ids) -> dict:
+        """Produtos serializados (com a categoria) para as respostas; busca só os que faltam."""
+        missing = [product_id for product_id in product_ids if product_id not in self._products]
+        if missing:
+            loaded = db.execute(
+                select(models.Product)
+                .options(joinedload(models.Product.category))
+                .where(models.Product.id.in_(missing))
+            ).scalars().all()
+            with self._lock:
+                for product in loaded:
+                    self._products[product.id] = schemas.Product.model_validate(product).model_dump()
+        return {product_id: self._products.get(product_id) for product_id in product_ids}
+
+    def arrays(self):
+        """(ids ordenados, preço unitário, custo) em arrays NumPy; sem preço/custo vira NaN."""
+        if self._arrays is None:
+            ids = np.array(sorted(self.units), dtype=np.int64)
+            units = np.array([self.units[i] for i in ids.tolist()], dtype=np.float64)
+            costs = np.array([self.costs[i] for i in ids.tolist()], dtype=np.float64)
+            self._arrays = (ids, units, costs)
+        return self._arrays
+
+
+def price_arrays(unit, cost, quantity, given_total, has_given):
+    """
+    Versão vetorizada de PriceTable.quote_cents para um bloco inteiro (centavos
+    em float64, NaN = sem preço/custo). Retorna (total, lucro) em int64; linhas
+    sem preço e sem total ficam com total 0 e devem ser filtradas antes.
+    """
+    total = np.nan_to_num(np.where(has_given, given_total, unit * quantity)).astype(np.int64)
+    margin = np.sign(total) * ((np.abs(total) * _MARGIN_BP + 5000) // 10000)
+    by_cost = total - np.nan_to_num(cost).astype(np.int64) * quantity
+    return total, np.where(np.isnan(cost), margin, by_cost)
+
+
+# --- Tabela compartilhada do processo ---
+_table = None
+_table_lock = threading.Lock()
+
+
+def get_table(db, product_ids=None, fresh: bool = False) -> PriceTable:
+    """
+    Tabela de preços atual. Carrega o catálogo na primeira chamada, após o TTL
+    ou com fresh=True; product_ids ausentes da tabela são buscados numa consulta.
+    """
+    global _table
+    table = _table
+    if fresh or table is None or time.monotonic() - table.loaded_at > PRICING_TTL_SECONDS:
+        with _table_lock:
+            if fresh or _table is None or _table is table:
+                table = PriceTable()
+                table.load(db)
+                _table = table
+            else:
+                table = _table
+
+    if product_ids:
+        missing = {product_id for product_id in product_ids if product_id not in table}
+        if missing:
+            table.load(db, missing)
+    return table
+
+
+def invalidate() -> None:
+    """Descarta a tabela (preço, custo, desconto ou nome de produto/categoria mudou)."""
+    global _table
+    _table = None
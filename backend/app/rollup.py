@@ -0,0 +1,167 @@
+# backend/app/rollup.py
+"""
+Tabela de agregados diários (sales_daily) usada pelo dashboard.
+
+Cada caminho de escrita de vendas chama apply_sales() na mesma transação do
+INSERT, então o dashboard lê O(dias) linhas em vez de varrer a tabela sales.
+Para backfill ou correção: python -m app.rollup rebuild
+
+Meses arquivados (app/archive.py) já não têm as vendas em `sales`: os
+agregados desses meses são o resumo do arquivo e o recálculo os preserva.
+"""
+import sys
+from collections import defaultdict
+from datetime import datetime, time
+
+from sqlalchemy import and_, delete, func, insert, not_, or_, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+
+from app import events, models, money
+
+
+def _upsert(db: Session):
+    """INSERT ... ON CONFLICT do dialeto em uso (SQLite ou Postgres)."""
+    dialect = db.get_bind().dialect.name
+    table = models.DailySales.__table__
+    stmt = (postgresql.insert(table) if dialect == "postgresql" else sqlite.insert(table))
+    return stmt.on_conflict_do_update(
+        index_elements=[table.c.day, table.c.product_id],
+        set_={
+            "sale_count": table.c.sale_count + stmt.excluded.sale_count,
+            "quantity": table.c.quantity + stmt.excluded.quantity,
+            "total_sales": table.c.total_sales + stmt.excluded.total_sales,
+            "profit": table.c.profit + stmt.excluded.profit,
+        }
+    )
+
+
+def apply_sales(db: Session, sales, categories: dict = None) -> None:
+    """
+    Soma um lote de vendas aos agregados diários (sem commit).
+
+    `sales` é um iterável de dicionários com product_id, quantity,
+    total_price, profit e date — o mesmo formato usado nos INSERTs.
+    `categories` ({product_id: category_id}, ex. da tabela de preços) evita
+    a consulta das categorias.
+    """
+    buckets = defaultdict(lambda: [0, 0, money.ZERO, money.ZERO])
+    for sale in sales:
+        key = (sale["date"].date(), sale["product_id"] or 0)
+        bucket = buckets[key]
+        bucket[0] += 1
+        bucket[1] += sale["quantity"] or 0
+        bucket[2] += sale["total_price"] or 0
+        bucket[3] += sale["profit"] or 0
+
+    apply_buckets(db, buckets, categories)
+
+
+def apply_buckets(db: Session, buckets: dict, categories: dict = None) -> None:
+    """
+    Grava agregados já calculados (sem commit):
+    {(dia, product_id): (nº de vendas, quantidade, total, lucro)}.
+    Os mesmos valores vão para o feed de alterações depois do commit (app/events.py).
+    """
+    if not buckets:
+        return
+    events.stage_sales(db, buckets)
+
+    if categories is None:
+        product_ids = {product_id for _, product_id in buckets}
+        categories = dict(db.execute(
+            select(models.Product.id, models.Product.category_id).where(models.Product.id.in_(product_ids))
+        ).all())
+
+    db.execute(_upsert(db), [
+        {
+            "day": day,
+            "product_id": product_id,
+            "category_id": categories.get(product_id),
+            "sale_count": sale_count,
+            "quantity": quantity,
+            "total_sales": total_sales,
+            "profit": profit,
+        }
+        for (day, product_id), (sale_count, quantity, total_sales, profit) in buckets.items()
+    ])
+
+
+def _archived_months(db):
+    """Filtros (dias de sales_daily, datas de sales) dos meses arquivados, ou (None, None)."""
+    archive = models.SalesArchive
+    ranges = db.execute(select(archive.starts_on, archive.ends_before)).all()
+    if not ranges:
+        return None, None
+    days = or_(*[
+        and_(models.DailySales.day >= start, models.DailySales.day < end) for start, end in ranges
+    ])
+    dates = or_(*[
+        and_(models.Sale.date >= datetime.combine(start, time.min), models.Sale.date < datetime.combine(end, time.min))
+        for start, end in ranges
+    ])
+    return days, dates
+
+
+def refill(db) -> None:
+    """
+    Apaga e recalcula os agregados com um INSERT ... SELECT (Session ou Connection, sem commit).
+    Os dias dos meses arquivados ficam como estão (as vendas deles não estão mais em sales).
+    """
+    archived_days, archived_dates = _archived_months(db)
+    day = func.date(models.Sale.date)
+    product_id = func.coalesce(models.Sale.product_id, 0)
+    source = (
+        select(
+            day,
+            product_id,
+            func.max(models.Product.category_id),
+            func.count(models.Sale.id),
+            func.coalesce(func.sum(models.Sale.quantity), 0),
+            func.coalesce(func.sum(models.Sale.total_price), 0),
+            func.coalesce(func.sum(models.Sale.profit), 0),
+        )
+        .outerjoin(models.Product, models.Sale.product_id == models.Product.id)
+        .where(models.Sale.date.is_not(None))
+        .group_by(day, product_id)
+    )
+
+    table = models.DailySales.__table__
+    cleanup = delete(table)
+    if archived_days is not None:
+        source = source.where(not_(archived_dates))
+        cleanup = cleanup.where(not_(archived_days))
+    db.execute(cleanup)
+    db.execute(insert(table).from_select(
+        ["day", "product_id", "category_id", "sale_count", "quantity", "total_sales", "profit"],
+        source
+    ))
+
+
+def rebuild(db: Session) -> int:
+    """Recalcula toda a tabela de agregados a partir de sales. Retorna o nº de linhas."""
+    refill(db)
+    db.commit()
+    return db.query(func.count()).select_from(models.DailySales).scalar()
+
+
+def ensure_backfilled(db: Session) -> None:
+    """Popula os agregados em bancos antigos que já têm vendas mas nunca tiveram o rollup."""
+    has_rollup = db.query(models.DailySales.day).first() is not None
+    if not has_rollup and db.query(models.Sale.id).first() is not None:
+        rebuild(db)
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["rebuild"]:
+        print("Uso: python -m app.rollup rebuild")
+        sys.exit(1)
+
+    from app import migrations
+    from app.database import SessionLocal, engine
+    migrations.upgrade(engine)
+    session = SessionLocal()
+    try:
+        print(f"Agregados recalculados: {rebuild(session)} linhas")
+    finally:
+        session.close()
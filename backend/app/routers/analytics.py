@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from typing import Literal, Optional
+from datetime import date
+from app import analytics, cache, conditional, crud_async, schemas
+from app.database import get_read_db
+
+router = APIRouter()
+
+# ========== ANALYTICS DE VENDAS ==========
+# Agregações no banco sobre sales_daily: o custo depende do número de períodos × grupos
+@router.get("/analytics/sales", response_model=schemas.AnalyticsData)
+async def read_sales_analytics(
+    request: Request,
+    response: Response,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = Query(None, description="Inclusivo"),
+    granularity: Literal["day", "week", "month"] = "month",
+    group_by: Literal["none", "product", "category"] = "none",
+    metric: Literal["total_sales", "profit", "quantity", "sale_count"] = Query(
+        "total_sales", description="Métrica usada no ranking (top) e na média móvel"
+    ),
+    top: Optional[int] = Query(None, ge=1, le=100, description="Só os N maiores grupos"),
+    moving_average: Optional[int] = Query(
+        None, ge=2, le=365, description="Janela da média móvel, em períodos (sem vendas contam como zero)"
+    ),
+    source: Literal["rollup", "sales"] = Query(
+        "rollup", description="rollup: agregados diários (padrão); sales: tabela de vendas"
+    ),
+    db=Depends(get_read_db),
+):
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="start_date deve ser anterior a end_date")
+    # Nomes de produtos/categorias também aparecem nos grupos
+    not_modified = await conditional.check(
+        request, response, cache.DASHBOARD, cache.PRODUCTS, cache.CATEGORIES
+    )
+    if not_modified:
+        return not_modified
+
+    params = analytics.AnalyticsParams(
+        start_date=start_date,
+        end_date=end_date,
+        granularity=granularity,
+        group_by=group_by,
+        metric=metric,
+        top=top,
+        moving_average=moving_average,
+        source=source,
+    )
+    # As versões de produtos/categorias entram na chave: renomear um deles
+    # não invalida o DASHBOARD, mas muda os nomes no resultado
+    names_version = [token for token, _ in await cache.aversions(cache.PRODUCTS, cache.CATEGORIES)]
+    key = repr((sorted(vars(params).items()), names_version))
+    return await cache.aget_or_set(
+        cache.DASHBOARD, f"analytics:{key}", lambda: crud_async.get_sales_analytics(db, params)
+    )
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from app import cache, crud_async, events
+from app.database import get_read_db
+
+router = APIRouter()
+
+async def _load_dashboard():
+    """Mesmo JSON (e a mesma entrada de cache) de GET /dashboard-stats/, numa sessão curta."""
+    async def load():
+        async for db in get_read_db():
+            return await crud_async.get_dashboard_stats(db)
+
+    return await cache.aget_or_set(cache.DASHBOARD, "stats", load)
+
+# ========== DASHBOARD AO VIVO (SSE) ==========
+# Um snapshot na conexão e depois só deltas coalescidos: ver app/events.py
+@router.get("/events/dashboard")
+async def stream_dashboard(request: Request):
+    try:
+        subscriber = events.broadcaster.subscribe()
+    except events.TooManySubscribers as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    async def stream():
+        try:
+            async for kind, data in events.feed(subscriber, _load_dashboard, request.is_disconnected):
+                yield events.sse_message(kind, data)
+        finally:
+            events.broadcaster.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(events.broadcaster.unsubscribe, subscriber),
+    )
+
+# ========== DASHBOARD AO VIVO (WebSocket) ==========
+# Mensagens {"event": "snapshot" | "delta" | "ping", "data": ...}
+@router.websocket("/ws/dashboard")
+async def websocket_dashboard(websocket: WebSocket):
+    await websocket.accept()
+    try:
+        subscriber = events.broadcaster.subscribe()
+    except events.TooManySubscribers as e:
+        await websocket.close(code=1013, reason=str(e))
+        return
+
+    try:
+        async for kind, data in events.feed(subscriber, _load_dashboard):
+            await websocket.send_json({"event": kind, "data": data})
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        events.broadcaster.unsubscribe(subscriber)
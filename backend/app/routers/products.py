@@ -1,8 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from typing import List
-from app import crud, schemas
-from app.database import get_db
+from typing import List, Optional
+from app import crud, crud_async, schemas, cache, conditional, fast_json, search
+from app.database import get_db, get_read_db
+from app.pagination import InvalidCursor, NEXT_CURSOR_HEADER
 
 # Cria o roteador. O prefixo '/products' significa que todas as rotas aqui começam assim.
 router = APIRouter()
@@ -18,8 +19,18 @@ def create_category(category: schemas.CategoryCreate, db: Session = Depends(get_
     return crud.create_category(db=db, category=category)
 
 @router.get("/categories/", response_model=List[schemas.Category])
-def read_categories(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_categories(db)
+async def read_categories(
+    request: Request, response: Response, skip: int = 0, limit: int = 100, db=Depends(get_read_db)
+):
+    not_modified = await conditional.check(request, response, cache.CATEGORIES)
+    if not_modified:
+        return not_modified
+
+    async def load():
+        categories = await crud_async.get_categories(db)
+        return [schemas.Category.model_validate(c).model_dump() for c in categories]
+
+    return await cache.aget_or_set(cache.CATEGORIES, "all", load)
 
 # --- Rotas de PRODUTOS ---
 
@@ -29,8 +40,67 @@ def create_product(product: schemas.ProductCreate, db: Session = Depends(get_db)
     return crud.create_product(db=db, product=product)
 
 @router.get("/products/", response_model=List[schemas.Product])
-def read_products(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    return crud.get_products(db)
+async def read_products(
+    request: Request,
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Tamanho da página (sem valor: todos)"),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor da página anterior"),
+    category_id: Optional[int] = None,
+    name_prefix: Optional[str] = Query(None, description="Filtra produtos cujo nome começa com o texto"),
+    slim: bool = Query(False, description="Não embute a categoria (apenas category_id)"),
+    db=Depends(get_read_db),
+):
+    # Nada mudou desde a última resposta: 304 sem consultar o banco
+    not_modified = await conditional.check(request, response, cache.PRODUCTS)
+    if not_modified:
+        return not_modified
+
+    # Caminho rápido: só as colunas da resposta, JSON já codificado no cache (app/fast_json.py)
+    async def load():
+        rows, next_cursor = await crud_async.get_products_page(
+            db, limit=limit, cursor=cursor, category_id=category_id, name_prefix=name_prefix, slim=slim,
+            rows=True,
+        )
+        return {
+            "body": fast_json.dumps([fast_json.product_dict(row, slim) for row in rows]),
+            "next_cursor": next_cursor,
+        }
+
+    key = f"rows:{limit}:{cursor}:{category_id}:{name_prefix}:{slim}"
+    try:
+        page = await cache.aget_or_set(cache.PRODUCTS, key, load)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if page["next_cursor"]:
+        response.headers[NEXT_CURSOR_HEADER] = page["next_cursor"]
+    return fast_json.response(page["body"], response)
+
+# Busca no índice do banco (FTS5 no SQLite, tsvector/trigramas no Postgres): ver app/search.py
+@router.get("/products/search", response_model=schemas.ProductSearchResult)
+async def search_products(
+    request: Request,
+    response: Response,
+    q: str = Query(..., min_length=1, max_length=200, description="Termos (prefixos, sem diferenciar acentos)"),
+    category_id: Optional[int] = Query(None, description="Filtra os itens; as facetas continuam com todas as categorias"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    fuzzy: bool = Query(True, description="Sem resultados exatos, tenta termos parecidos"),
+    db=Depends(get_read_db),
+):
+    not_modified = await conditional.check(request, response, cache.PRODUCTS)
+    if not_modified:
+        return not_modified
+
+    params = search.SearchParams(q=q, category_id=category_id, limit=limit, offset=offset, fuzzy=fuzzy)
+
+    async def load():
+        result = await crud_async.search_products(db, params)
+        result["items"] = [schemas.Product.model_validate(p).model_dump() for p in result["items"]]
+        return result
+
+    key = repr(sorted(vars(params).items()))
+    return await cache.aget_or_set(cache.PRODUCTS, f"search:{key}", load)
 
 # ... imports anteriores
 
@@ -1,61 +1,149 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
-from app import crud, schemas, models
-from app.database import get_db
+from app import crud, crud_async, schemas, models, rollup, cache, conditional, fast_json, group_commit, pricing
+from app.database import get_db, get_read_db
+from app.pagination import InvalidCursor, NEXT_CURSOR_HEADER
+import os
 import random
-from datetime import datetime, timedelta
-from typing import List
+from datetime import date, datetime, timedelta
+from typing import List, Literal, Optional
 
 router = APIRouter()
 
+SALES_BATCH_MAX_ITEMS = int(os.getenv("SALES_BATCH_MAX_ITEMS", "1000"))
+
 # ========== DASHBOARD STATS ==========
+# start_date/end_date (opcionais) limitam os dias lidos de sales_daily
 @router.get("/dashboard-stats/", response_model=schemas.DashboardData)
-def get_stats(db: Session = Depends(get_db)):
-    return crud.get_dashboard_stats(db)
+async def get_stats(
+    request: Request,
+    response: Response,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db=Depends(get_read_db),
+):
+    not_modified = await conditional.check(request, response, cache.DASHBOARD)
+    if not_modified:
+        return not_modified
+    # Sem período, a mesma entrada do snapshot do feed (app/routers/events.py)
+    key = "stats" if start_date is None and end_date is None else f"stats:{start_date}:{end_date}"
+    return await cache.aget_or_set(
+        cache.DASHBOARD, key, lambda: crud_async.get_dashboard_stats(db, start_date, end_date)
+    )
 
 # ========== LISTAR VENDAS ==========
+# Paginação por cursor: o próximo cursor vem no cabeçalho X-Next-Cursor
 @router.get("/sales/", response_model=List[schemas.Sale])
-def read_sales(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    sales = db.query(models.Sale).offset(skip).limit(limit).all()
-    return sales
+async def read_sales(
+    request: Request,
+    response: Response,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="Valor de X-Next-Cursor da página anterior"),
+    sort: Literal["id", "date"] = "id",
+    order: Literal["asc", "desc"] = "desc",
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None,
+    product_id: Optional[int] = None,
+    category_id: Optional[int] = None,
+    slim: bool = Query(False, description="Não embute produto/categoria (apenas product_id)"),
+    skip: Optional[int] = Query(None, deprecated=True, description="Removido: use cursor (X-Next-Cursor)"),
+    db=Depends(get_read_db),
+):
+    # Paginação por OFFSET não existe mais: ignorar skip devolveria sempre a primeira página
+    if skip is not None:
+        raise HTTPException(
+            status_code=422,
+            detail="O parâmetro skip foi removido: pagine com cursor (cabeçalho X-Next-Cursor). "
+                   "A ordem padrão agora é id decrescente (order=asc para a ordem antiga).",
+        )
+
+    # Vendas embutem produto e categoria: a versão de produtos também conta
+    not_modified = await conditional.check(request, response, cache.SALES, cache.PRODUCTS)
+    if not_modified:
+        return not_modified
+
+    # Caminho rápido: tuplas + orjson, sem objetos ORM nem validação por item (app/fast_json.py)
+    try:
+        rows, next_cursor = await crud_async.get_sales_page(
+            db,
+            limit=limit,
+            cursor=cursor,
+            sort=sort,
+            descending=order == "desc",
+            start_date=start_date,
+            end_date=end_date,
+            product_id=product_id,
+            category_id=category_id,
+            slim=slim,
+            rows=True,
+        )
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return fast_json.response(fast_json.dumps([fast_json.sale_dict(row, slim) for row in rows]), response)
+
+# ========== MESES ARQUIVADOS ==========
+# Vendas fora de sales, em Parquet (app/archive.py); continuam no dashboard e nas exportações
+@router.get("/sales/archives", response_model=List[schemas.SalesArchive])
+def read_sales_archives(db: Session = Depends(get_db)):
+    return crud.get_sales_archives(db)
 
 # ========== CRIAR VENDA ==========
 # ✅ CORRIGIDO: Mudei de "/" para "/sales/"
 @router.post("/sales/", response_model=schemas.Sale)
 def create_sale(sale: schemas.SaleCreate, db: Session = Depends(get_db)):
-    db_sale = crud.create_sale(db, sale=sale)
-    if db_sale is None:
-        raise HTTPException(status_code=404, detail="Produto não encontrado")
-    return db_sale
+    if group_commit.enabled():
+        # Divide o commit com as vendas que chegarem na mesma janela
+        item = group_commit.committer.submit(sale)
+    else:
+        item = crud.create_sale(db, sale=sale)
+    if item["error"]:
+        raise HTTPException(status_code=404, detail=item["error"])
+    return item["sale"]
+
+# ========== CRIAR VENDAS EM LOTE ==========
+# Uma consulta de produtos, um INSERT em lote e um commit para todo o lote
+@router.post("/sales/batch", response_model=schemas.SaleBatchResult)
+def create_sales_batch(sales: List[schemas.SaleCreate], db: Session = Depends(get_db)):
+    if len(sales) > SALES_BATCH_MAX_ITEMS:
+        raise HTTPException(
+            status_code=413, detail=f"Máximo de {SALES_BATCH_MAX_ITEMS} vendas por lote"
+        )
+    items = crud.create_sales_batch(db, sales)
+    failed = sum(1 for item in items if item["error"])
+    return {"created": len(items) - failed, "failed": failed, "items": items}
 
 # ========== GERADOR DE DADOS FALSOS ==========
 @router.post("/generate-fake-sales/")
 def generate_fake_sales(db: Session = Depends(get_db)):
-    products = crud.get_products(db)
-    if not products:
+    # Mesmas regras de preço, desconto e custo das vendas reais
+    table = pricing.get_table(db)
+    product_ids = [product_id for product_id in table.units if table.has_price(product_id)]
+    if not product_ids:
         return {"message": "Cadastre produtos antes de gerar vendas!"}
 
+    fake_sales = []
     for _ in range(50):  # Gera 50 vendas aleatórias
-        product = random.choice(products)
+        product_id = random.choice(product_ids)
         quantity = random.randint(1, 5)
-        
-        # Simula custo como 70% do preço (lucro de 30%)
-        cost_price = product.price * 0.7 
-        total_price = product.price * quantity
-        profit = (product.price - cost_price) * quantity
+        total_price, profit = table.quote(product_id, quantity)
         
         # Data aleatória nos últimos 365 dias
         days_ago = random.randint(0, 365)
         sale_date = datetime.utcnow() - timedelta(days=days_ago)
 
-        fake_sale = models.Sale(
-            product_id=product.id,
-            quantity=quantity,
-            total_price=total_price,
-            profit=profit,
-            date=sale_date
-        )
-        db.add(fake_sale)
-    
+        fake_sales.append({
+            "product_id": product_id,
+            "quantity": quantity,
+            "total_price": total_price,
+            "profit": profit,
+            "date": sale_date
+        })
+
+    db.add_all(models.Sale(**values) for values in fake_sales)
+    rollup.apply_sales(db, fake_sales, table.categories)
     db.commit()  # ✅ MOVIDO PARA FORA DO LOOP
+    cache.invalidate(cache.DASHBOARD, cache.SALES)
     return {"message": "50 vendas falsas geradas com sucesso!"}
\ No newline at end of file
@@ -1,230 +1,144 @@
-from fastapi import APIRouter, UploadFile, File, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
-from app import crud, schemas, models
+from typing import List, Literal
+from app import importers, jobs, metrics, models, schemas, parallel_import, columnar_import
 from app.database import get_db
 import csv
-import io
-from datetime import datetime
+import os
+import shutil
+import tempfile
+import time
 
 router = APIRouter()
 
-# --- ROTA 1: UPLOAD DE CATEGORIAS ---
-@router.post("/upload-categories-csv/")
-def upload_categories_csv(file: UploadFile = File(...), db: Session = Depends(get_db)):
+
+def _open_upload(file: UploadFile) -> csv.DictReader:
+    """Valida a extensão e abre o upload como CSV em streaming."""
     if not file.filename.endswith(".csv"):
         raise HTTPException(status_code=400, detail="O arquivo deve ser um CSV.")
 
-    content = file.file.read()
-    
     try:
-        decoded_content = content.decode("utf-8")
-        # Detecta delimitador
-        delimiter = ";" if decoded_content.count(";") > decoded_content.count(",") else ","
-        csv_file = io.StringIO(decoded_content)
-        csv_reader = csv.DictReader(csv_file, delimiter=delimiter)
-        
-        # Normaliza cabeçalhos
-        if csv_reader.fieldnames:
-            csv_reader.fieldnames = [name.strip().lower() for name in csv_reader.fieldnames]
-
+        return importers.open_csv_stream(file.file)
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Erro ao ler arquivo: {str(e)}")
 
-    updated_count = 0
-    created_count = 0
-    errors = []
-
-    for index, row in enumerate(csv_reader):
-        try:
-            cat_id = row.get("id")
-            name = row.get("name")
-            discount = row.get("discount_percentage", 0.0)
-
-            if not cat_id or not name:
-                continue
-
-            # Busca categoria existente
-            category = db.query(models.Category).filter(models.Category.id == int(cat_id)).first()
-
-            if category:
-                category.name = name
-                updated_count += 1
-            else:
-                new_category = models.Category(
-                    id=int(cat_id),
-                    name=name,
-                    discount_percentage=float(discount)
-                )
-                db.add(new_category)
-                created_count += 1
-
-        except Exception as e:
-            errors.append(f"Linha {index + 1}: Erro: {str(e)}")
 
-    db.commit()
+def _schedule_import(kind: str, file: UploadFile, response: Response, engine: str = "default") -> dict:
+    """Agenda a importação em segundo plano e responde 202 com o ID do job."""
+    if not file.filename.endswith(".csv"):
+        raise HTTPException(status_code=400, detail="O arquivo deve ser um CSV.")
 
+    job_id = jobs.submit(kind, file.file, file.filename, engine=engine)
+    response.status_code = 202
     return {
-        "message": "Categorias processadas",
-        "created": created_count,
-        "updated": updated_count,
-        "errors": errors
+        "message": "Importação agendada",
+        "job_id": job_id,
+        "status_url": f"/import-jobs/{job_id}",
     }
 
 
-# --- ROTA 2: UPLOAD DE PRODUTOS ---
-@router.post("/upload-csv/")
-def upload_products_csv(file: UploadFile = File(...), db: Session = Depends(get_db)):
+def _run_import(import_fn, db: Session, csv_reader: csv.DictReader, kind: str, engine: str = "default") -> dict:
+    """Executa o importador; erros de leitura no meio do arquivo viram 400."""
+    started = time.perf_counter()
+    try:
+        result = import_fn(db, csv_reader)
+    except (UnicodeDecodeError, csv.Error) as e:
+        raise HTTPException(status_code=400, detail=f"Erro ao ler arquivo: {str(e)}")
+    metrics.record_import(kind, engine, result, time.perf_counter() - started)
+    return result
+
+
+def _run_file_import(import_fn, db: Session, file: UploadFile, kind: str, engine: str) -> dict:
+    """Copia o upload para um arquivo temporário e roda um importador baseado em caminho."""
     if not file.filename.endswith(".csv"):
         raise HTTPException(status_code=400, detail="O arquivo deve ser um CSV.")
 
-    content = file.file.read()
-    
+    fd, path = tempfile.mkstemp(prefix="apollo_upload_", suffix=".csv")
     try:
-        decoded_content = content.decode("utf-8")
-        delimiter = ";" if decoded_content.count(";") > decoded_content.count(",") else ","
-        csv_file = io.StringIO(decoded_content)
-        csv_reader = csv.DictReader(csv_file, delimiter=delimiter)
-        
-        if csv_reader.fieldnames:
-            csv_reader.fieldnames = [name.strip().lower() for name in csv_reader.fieldnames]
-
-    except Exception as e:
+        with os.fdopen(fd, "wb") as target:
+            shutil.copyfileobj(file.file, target, 1024 * 1024)
+        started = time.perf_counter()
+        result = import_fn(db, path)
+        metrics.record_import(kind, engine, result, time.perf_counter() - started)
+        return result
+    except (UnicodeDecodeError, csv.Error) as e:
         raise HTTPException(status_code=400, detail=f"Erro ao ler arquivo: {str(e)}")
+    finally:
+        os.remove(path)
 
-    products_added = 0
-    errors = []
-
-    for index, row in enumerate(csv_reader):
-        try:
-            name = row.get("name")
-            price_str = row.get("price")
-            category_id = row.get("category_id")
-            category_name = row.get("category")
-
-            if not name or not price_str:
-                errors.append(f"Linha {index+1}: Nome ou preço faltando.")
-                continue
-
-            clean_price = str(price_str).replace("R$", "").strip().replace(".", "").replace(",", ".")
-            price = float(clean_price)
-
-            final_category_id = None
-            
-            if category_id:
-                cat_id_int = int(category_id)
-                db_category = db.query(models.Category).filter(models.Category.id == cat_id_int).first()
-                if not db_category:
-                    # Cria categoria placeholder (nome = ID) para ser corrigida depois
-                    new_cat = models.Category(id=cat_id_int, name=str(cat_id_int), discount_percentage=0.0)
-                    db.add(new_cat)
-                    db.commit()
-                    db.refresh(new_cat)
-                    final_category_id = new_cat.id
-                else:
-                    final_category_id = db_category.id
-            
-            elif category_name:
-                db_category = crud.get_category_by_name(db, category_name)
-                if not db_category:
-                    new_cat = schemas.CategoryCreate(name=category_name, discount_percentage=0.0)
-                    db_cat_obj = crud.create_category(db, new_cat)
-                    final_category_id = db_cat_obj.id
-                else:
-                    final_category_id = db_category.id
-
-            if not final_category_id:
-                errors.append(f"Linha {index+1}: Categoria não identificada.")
-                continue
-
-            new_prod = schemas.ProductCreate(
-                name=name,
-                price=price,
-                category_id=final_category_id
-            )
-            crud.create_product(db, new_prod)
-            products_added += 1
-
-        except Exception as e:
-            errors.append(f"Linha {index + 1}: Erro: {str(e)}")
 
-    return {
-        "message": "Processamento de produtos concluído",
-        "products_added": products_added,
-        "errors": errors
-    }
+_MODE_DESCRIPTION = "upsert: reimportação idempotente pela chave natural (insere, atualiza ou ignora)"
 
 
-# --- ROTA 3: UPLOAD DE VENDAS ---
-@router.post("/upload-sales-csv/")
-def upload_sales_csv(file: UploadFile = File(...), db: Session = Depends(get_db)):
-    if not file.filename.endswith(".csv"):
-        raise HTTPException(status_code=400, detail="O arquivo deve ser um CSV.")
+# --- ROTA 1: UPLOAD DE CATEGORIAS ---
+@router.post("/upload-categories-csv/")
+def upload_categories_csv(
+    response: Response,
+    file: UploadFile = File(...),
+    background: bool = Query(False, description="Processa em segundo plano e retorna o ID do job"),
+    mode: Literal["insert", "upsert"] = Query("insert", description=_MODE_DESCRIPTION),
+    db: Session = Depends(get_db),
+):
+    if background:
+        return _schedule_import("categories", file, response, engine=mode)
+    csv_reader = _open_upload(file)
+    import_fn = importers.upsert_categories if mode == "upsert" else importers.import_categories
+    return _run_import(import_fn, db, csv_reader, "categories", mode)
 
-    content = file.file.read()
-    
-    try:
-        decoded_content = content.decode("utf-8")
-        delimiter = ";" if decoded_content.count(";") > decoded_content.count(",") else ","
-        csv_file = io.StringIO(decoded_content)
-        csv_reader = csv.DictReader(csv_file, delimiter=delimiter)
-        
-        if csv_reader.fieldnames:
-            csv_reader.fieldnames = [name.strip().lower() for name in csv_reader.fieldnames]
 
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Erro ao ler arquivo: {str(e)}")
+# --- ROTA 2: UPLOAD DE PRODUTOS ---
+@router.post("/upload-csv/")
+def upload_products_csv(
+    response: Response,
+    file: UploadFile = File(...),
+    background: bool = Query(False, description="Processa em segundo plano e retorna o ID do job"),
+    mode: Literal["insert", "upsert"] = Query("insert", description=_MODE_DESCRIPTION),
+    db: Session = Depends(get_db),
+):
+    if background:
+        return _schedule_import("products", file, response, engine=mode)
+    csv_reader = _open_upload(file)
+    import_fn = importers.upsert_products if mode == "upsert" else importers.import_products
+    return _run_import(import_fn, db, csv_reader, "products", mode)
 
-    sales_added = 0
-    errors = []
-
-    for index, row in enumerate(csv_reader):
-        try:
-            p_id = row.get("product_id")
-            qtd = row.get("quantity")
-            price = row.get("total_price")
-            date_str = row.get("date")
-
-            if not p_id or not qtd:
-                continue 
-
-            product_id = int(p_id)
-            db_product = db.query(models.Product).filter(models.Product.id == product_id).first()
-            
-            if not db_product:
-                errors.append(f"Linha {index + 1}: Produto ID {product_id} não encontrado.")
-                continue
-
-            quantity = int(float(qtd))
-            total_price = float(price) if price else (db_product.price * quantity)
-            profit = total_price * 0.30 
-
-            # Processamento de Data
-            sale_date = datetime.utcnow()
-            if date_str:
-                for fmt in ("%Y-%m-%d", "%d/%m/%Y"):
-                    try:
-                        sale_date = datetime.strptime(date_str, fmt)
-                        break
-                    except ValueError:
-                        pass
-
-            new_sale = models.Sale(
-                product_id=product_id,
-                quantity=quantity,
-                total_price=total_price,
-                profit=profit,
-                date=sale_date
-            )
-            db.add(new_sale)
-            sales_added += 1
-
-        except Exception as e:
-            errors.append(f"Linha {index + 1}: Erro: {str(e)}")
-
-    db.commit()
 
-    return {
-        "message": "Importação de vendas concluída",
-        "sales_added": sales_added,
-        "errors": errors
-    }
\ No newline at end of file
+# --- ROTA 3: UPLOAD DE VENDAS ---
+@router.post("/upload-sales-csv/")
+def upload_sales_csv(
+    response: Response,
+    file: UploadFile = File(...),
+    background: bool = Query(False, description="Processa em segundo plano e retorna o ID do job"),
+    engine: Literal["default", "parallel", "columnar"] = Query(
+        "default",
+        description="parallel: parsing e validação distribuídos entre processos; "
+                    "columnar: validação vetorizada (requer numpy e pyarrow)"
+    ),
+    db: Session = Depends(get_db),
+):
+    if engine == "columnar" and not columnar_import.COLUMNAR_AVAILABLE:
+        raise HTTPException(
+            status_code=400, detail="O modo colunar requer numpy e pyarrow (pip install numpy pyarrow)."
+        )
+    if background:
+        return _schedule_import("sales", file, response, engine=engine)
+    if engine == "columnar":
+        return _run_file_import(columnar_import.import_sales_file, db, file, "sales", engine)
+    if engine == "parallel":
+        return _run_file_import(parallel_import.import_sales_file, db, file, "sales", engine)
+    csv_reader = _open_upload(file)
+    return _run_import(importers.import_sales, db, csv_reader, "sales")
+
+
+# --- STATUS DAS IMPORTAÇÕES EM SEGUNDO PLANO ---
+@router.get("/import-jobs/", response_model=List[schemas.ImportJobStatus])
+def list_import_jobs(limit: int = Query(20, ge=1, le=100), db: Session = Depends(get_db)):
+    recent = db.query(models.ImportJob).order_by(models.ImportJob.created_at.desc()).limit(limit).all()
+    return [jobs.job_status(job) for job in recent]
+
+
+@router.get("/import-jobs/{job_id}", response_model=schemas.ImportJobStatus)
+def read_import_job(job_id: str, db: Session = Depends(get_db)):
+    job = db.get(models.ImportJob, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job não encontrado")
+    return jobs.job_status(job)
@@ -1,6 +1,6 @@
-from typing import List, Optional
+from typing import Any, List, Optional
 from pydantic import BaseModel
-from datetime import datetime
+from datetime import date, datetime
 
 # --- Schemas de Categoria ---
 class CategoryBase(BaseModel):
@@ -20,6 +20,7 @@ class ProductBase(BaseModel):
     name: str
     price: float
     category_id: int
+    cost: Optional[float] = None  # Custo unitário (opcional)
 
 class ProductCreate(ProductBase):
     pass
@@ -31,6 +32,21 @@ class Product(ProductBase):
     class Config:
         from_attributes = True
 
+# --- Schemas da Busca de Produtos (/products/search) ---
+class CategoryFacet(BaseModel):
+    category_id: Optional[int] = None
+    name: Optional[str] = None
+    count: int
+
+class ProductSearchResult(BaseModel):
+    q: str
+    backend: str                  # fts5 | postgres | like
+    fuzzy: bool                   # True quando só a busca aproximada encontrou resultados
+    total: int
+    items: List[Product]
+    facets: List[CategoryFacet]   # contagem por categoria, sem o filtro de categoria
+    next_offset: Optional[int] = None
+
 # --- Schemas de Venda ---
 class SaleBase(BaseModel):
     product_id: int
@@ -51,6 +67,17 @@ class Sale(SaleBase):
     class Config:
         from_attributes = True
 
+# --- Schemas de Venda em lote (POST /sales/batch) ---
+class SaleBatchItem(BaseModel):
+    index: int                    # posição do item na requisição
+    sale: Optional[Sale] = None   # venda criada (None quando houve erro)
+    error: Optional[str] = None
+
+class SaleBatchResult(BaseModel):
+    created: int
+    failed: int
+    items: List[SaleBatchItem]
+
 # --- Schemas para o DASHBOARD ---
 class ChartData(BaseModel):
     date: str  # Formato: "2026-01" (ano-mês)
@@ -61,4 +88,65 @@ class DashboardData(BaseModel):
     total_products: int
     total_sales_value: float
     total_profit: float
-    chart_data: List[ChartData]
\ No newline at end of file
+    chart_data: List[ChartData]
+
+# --- Meses de vendas arquivados (app/archive.py) ---
+class SalesArchive(BaseModel):
+    month: str                    # "2025-01"
+    starts_on: date
+    ends_before: date
+    sale_count: int
+    quantity: int
+    total_sales: float
+    profit: float
+    min_id: Optional[int] = None
+    max_id: Optional[int] = None
+    size_bytes: int
+    archived_at: datetime
+    class Config:
+        from_attributes = True
+
+# --- Schemas de Analytics (/analytics/sales) ---
+class AnalyticsMetrics(BaseModel):
+    sale_count: int
+    quantity: int
+    total_sales: float
+    profit: float
+
+class AnalyticsGroup(AnalyticsMetrics):
+    key: Optional[int] = None     # ID do produto ou da categoria
+    name: Optional[str] = None
+
+class AnalyticsPoint(AnalyticsMetrics):
+    period: str                   # Início do período: "2026-01-05"
+    key: Optional[int] = None
+    name: Optional[str] = None
+    moving_average: Optional[float] = None
+
+class AnalyticsData(BaseModel):
+    start_date: Optional[date] = None
+    end_date: Optional[date] = None
+    granularity: str
+    group_by: str
+    metric: str
+    source: str
+    totals: AnalyticsMetrics
+    groups: List[AnalyticsGroup]
+    series: List[AnalyticsPoint]
+
+# --- Schemas de Importação em segundo plano ---
+class ImportJobStatus(BaseModel):
+    id: str
+    kind: str
+    filename: Optional[str] = None
+    status: str
+    rows_processed: int
+    rows_per_second: Optional[float] = None
+    eta_seconds: Optional[float] = None
+    progress: Optional[float] = None
+    errors_count: int
+    errors: List[str]
+    result: Optional[Any] = None
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
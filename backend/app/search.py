@@ -0,0 +1,290 @@
+# backend/app/search.py
+"""
+Busca de produtos pelo nome, com índice no banco.
+
+- SQLite: tabela virtual FTS5 `products_fts` (tokenizer unicode61 com
+  remove_diacritics, prefixos de 2 a 4 letras indexados) espelhando
+  products.name. Gatilhos AFTER INSERT/UPDATE OF name/DELETE em products
+  mantêm o índice em dia em todos os caminhos de escrita (rotas, importadores,
+  upsert), sem código extra na aplicação. A ordem é a do bm25.
+- Postgres: índices GIN de expressão sobre products_search_text(name)
+  (unaccent + lower): tsvector ('simple') para termos e prefixos e pg_trgm
+  para a busca aproximada. Índices de expressão se atualizam sozinhos.
+- Outros bancos (ou SQLite sem FTS5): LIKE '%termo%' sem índice.
+
+Cada termo da consulta vira um prefixo ("sams" acha "Samsung") e todos os
+termos precisam aparecer. Sem nenhum resultado, a busca tenta a versão
+aproximada: no SQLite os termos são trocados pelos termos parecidos do
+vocabulário do índice (fts5vocab + difflib); no Postgres, word_similarity do
+pg_trgm. As facetas contam os resultados por categoria sem o filtro de
+categoria, para a tela mostrar as alternativas.
+
+Como em app/analytics.py, as funções aqui só montam os SELECTs e o resultado;
+quem executa é app/crud_async.py.
+"""
+import difflib
+import logging
+import re
+import unicodedata
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import Float, Integer, and_, event, func, literal, select, text
+from sqlalchemy.orm import joinedload
+
+from app import models
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = "products_fts"
+FTS_VOCAB_TABLE = "products_fts_vocab"
+PG_SEARCH_FUNCTION = "products_search_text"
+
+# Termos por consulta e candidatos aproximados por termo
+MAX_TERMS = 8
+FUZZY_CANDIDATES = 5
+FUZZY_CUTOFF = 0.75
+
+_TERM_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+@dataclass
+class SearchParams:
+    q: str
+    category_id: Optional[int] = None
+    limit: int = 20
+    offset: int = 0
+    fuzzy: bool = True
+
+
+@dataclass
+class SearchQueries:
+    page: object
+    facets: object
+
+
+# --- Termos ---
+def fold(value: str) -> str:
+    """Minúsculas e sem acentos, como o unicode61 (remove_diacritics) e o unaccent."""
+    decomposed = unicodedata.normalize("NFKD", value.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def terms(q: str) -> list:
+    """Palavras da consulta já normalizadas (sem duplicatas, no máximo MAX_TERMS)."""
+    found = []
+    for term in _TERM_PATTERN.findall(fold(q or "")):
+        if term not in found:
+            found.append(term)
+    return found[:MAX_TERMS]
+
+
+def fts_match(groups) -> str:
+    """
+    Expressão MATCH do FTS5: cada grupo é uma lista de alternativas de um termo.
+    Alternativas são unidas por OR e grupos por AND; todo termo é prefixo.
+    """
+    parts = []
+    for alternatives in groups:
+        options = " OR ".join(f'"{term}"*' for term in alternatives)
+        parts.append(f"({options})" if len(alternatives) > 1 else options)
+    return " AND ".join(parts)
+
+
+# --- Índice (DDL) ---
+_SQLITE_DDL = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"name, content='products', content_rowid='id', "
+    f"tokenize='unicode61 remove_diacritics 2', prefix='2 3 4')",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_VOCAB_TABLE} USING fts5vocab({FTS_TABLE}, 'row')",
+    f"CREATE TRIGGER IF NOT EXISTS products_fts_ai AFTER INSERT ON products BEGIN "
+    f"INSERT INTO {FTS_TABLE}(rowid, name) VALUES (new.id, new.name); END",
+    f"CREATE TRIGGER IF NOT EXISTS products_fts_ad AFTER DELETE ON products BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name) VALUES ('delete', old.id, old.name); END",
+    f"CREATE TRIGGER IF NOT EXISTS products_fts_au AFTER UPDATE OF name ON products BEGIN "
+    f"INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name) VALUES ('delete', old.id, old.name); "
+    f"INSERT INTO {FTS_TABLE}(rowid, name) VALUES (new.id, new.name); END",
+]
+
+_POSTGRES_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS unaccent",
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    # unaccent() não é IMMUTABLE; o wrapper com dicionário fixo pode ir para índices
+    f"CREATE OR REPLACE FUNCTION {PG_SEARCH_FUNCTION}(value text) RETURNS text "
+    f"LANGUAGE sql IMMUTABLE PARALLEL SAFE AS "
+    f"$$ SELECT lower(public.unaccent('public.unaccent'::regdictionary, coalesce(value, ''))) $$",
+    f"CREATE INDEX IF NOT EXISTS ix_products_name_tsv ON products "
+    f"USING gin (to_tsvector('simple', {PG_SEARCH_FUNCTION}(name)))",
+    f"CREATE INDEX IF NOT EXISTS ix_products_name_trgm ON products "
+    f"USING gin ({PG_SEARCH_FUNCTION}(name) gin_trgm_ops)",
+]
+
+
+def create_index(conn) -> None:
+    """
+    Cria o índice de busca do dialeto (idempotente) e o preenche com os
+    produtos existentes. Sem FTS5/extensões disponíveis, a busca usa LIKE.
+    """
+    dialect = conn.dialect.name
+    if dialect not in ("sqlite", "postgresql"):
+        return
+    statements = _SQLITE_DDL if dialect == "sqlite" else _POSTGRES_DDL
+    try:
+        # SAVEPOINT: uma extensão indisponível não derruba a transação da migração
+        with conn.begin_nested():
+            for statement in statements:
+                conn.execute(text(statement))
+            if dialect == "sqlite":
+                conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    except Exception as e:
+        logger.warning("Índice de busca indisponível (%s); usando LIKE: %s", dialect, e)
+    _backends.clear()
+
+
+def _create_index_after_table(target, connection, **kw):
+    create_index(connection)
+
+
+# Bancos novos: o índice nasce junto com products no create_all
+event.listen(models.Product.__table__, "after_create", _create_index_after_table)
+
+
+# --- Qual índice está disponível ---
+_backends = {}
+
+
+def backend_query(dialect: str):
+    """SELECT que confirma o índice do dialeto (None: não há o que verificar)."""
+    if dialect == "sqlite":
+        return text("SELECT count(*) FROM sqlite_master WHERE name = :name").bindparams(name=FTS_TABLE)
+    if dialect == "postgresql":
+        return text("SELECT to_regproc(:name) IS NOT NULL").bindparams(name=f"public.{PG_SEARCH_FUNCTION}")
+    return None
+
+
+def known_backend(dialect: str) -> Optional[str]:
+    return _backends.get(dialect)
+
+
+def set_backend(dialect: str, available) -> str:
+    """Guarda o resultado de backend_query: 'fts5', 'postgres' ou 'like'."""
+    if available:
+        backend = "fts5" if dialect == "sqlite" else "postgres"
+    else:
+        backend = "like"
+    _backends[dialect] = backend
+    return backend
+
+
+# --- Consultas ---
+def _matches(backend: str, groups, fuzzy_text: str = None):
+    """
+    Subconsulta (id, score) dos produtos encontrados; score menor = mais relevante.
+    fuzzy_text (só Postgres) troca a busca por termos pela similaridade de trigramas.
+    """
+    if backend == "fts5":
+        return (
+            text(f"SELECT rowid AS id, bm25({FTS_TABLE}) AS score FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :match")
+            .bindparams(match=fts_match(groups))
+            .columns(id=Integer, score=Float)
+            .subquery("matches")
+        )
+
+    product = models.Product
+    if backend == "postgres":
+        document = func.products_search_text(product.name)
+        if fuzzy_text is not None:
+            needle = func.products_search_text(fuzzy_text)
+            return (
+                select(product.id.label("id"), (-func.word_similarity(needle, document)).label("score"))
+                .where(needle.op("<%")(document))
+                .subquery("matches")
+            )
+        vector = func.to_tsvector("simple", document)
+        query = func.to_tsquery(
+            "simple", func.products_search_text(" & ".join(f"{alternatives[0]}:*" for alternatives in groups))
+        )
+        return (
+            select(product.id.label("id"), (-func.ts_rank_cd(vector, query)).label("score"))
+            .where(vector.op("@@")(query))
+            .subquery("matches")
+        )
+
+    # LIKE: sem ranking, só o filtro (a ordem fica pelo ID)
+    filters = []
+    for alternatives in groups:
+        escaped = alternatives[0].replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        filters.append(product.name.ilike(f"%{escaped}%", escape="\\"))
+    return select(product.id.label("id"), literal(0.0).label("score")).where(and_(*filters)).subquery("matches")
+
+
+def build_queries(params: SearchParams, backend: str, groups, fuzzy_text: str = None) -> SearchQueries:
+    """Página ranqueada (com a categoria embutida) e contagem por categoria."""
+    matches = _matches(backend, groups, fuzzy_text)
+    product = models.Product
+
+    page = (
+        select(product, matches.c.score)
+        .join(matches, matches.c.id == product.id)
+        .options(joinedload(product.category))
+        .order_by(matches.c.score, product.id)
+        .limit(params.limit)
+        .offset(params.offset)
+    )
+    if params.category_id is not None:
+        page = page.where(product.category_id == params.category_id)
+
+    facets = (
+        select(product.category_id, models.Category.name, func.count().label("count"))
+        .join(matches, matches.c.id == product.id)
+        .outerjoin(models.Category, product.category_id == models.Category.id)
+        .group_by(product.category_id, models.Category.name)
+        .order_by(func.count().desc(), product.category_id)
+    )
+    return SearchQueries(page=page, facets=facets)
+
+
+def vocabulary_query(term: str):
+    """Termos do índice FTS5 com a mesma inicial (candidatos da busca aproximada)."""
+    following = term[0] + "\U0010ffff"
+    return (
+        text(f"SELECT term FROM {FTS_VOCAB_TABLE} WHERE term >= :low AND term < :high")
+        .bindparams(low=term[0], high=following)
+    )
+
+
+def close_terms(term: str, vocabulary) -> list:
+    """
+    Termos do vocabulário parecidos com `term`. Compara também com o começo
+    de cada termo, para que erros de digitação em prefixos ("smasu") achem "samsung".
+    """
+    scored = []
+    for candidate in vocabulary:
+        ratio = max(
+            difflib.SequenceMatcher(None, term, candidate).ratio(),
+            difflib.SequenceMatcher(None, term, candidate[:len(term)]).ratio(),
+        )
+        if ratio >= FUZZY_CUTOFF:
+            scored.append((-ratio, candidate))
+    return [candidate for _, candidate in sorted(scored)[:FUZZY_CANDIDATES]]
+
+
+# --- Resultado ---
+def search_result(params: SearchParams, backend: str, rows, facet_rows, fuzzy: bool = False) -> dict:
+    """Monta a resposta: total (das facetas), página, facetas e próximo offset."""
+    facets = [{"category_id": cat_id, "name": name, "count": count} for cat_id, name, count in facet_rows]
+    if params.category_id is None:
+        total = sum(facet["count"] for facet in facets)
+    else:
+        total = next((facet["count"] for facet in facets if facet["category_id"] == params.category_id), 0)
+
+    next_offset = params.offset + len(rows)
+    return {
+        "q": params.q,
+        "backend": backend,
+        "fuzzy": fuzzy,
+        "total": total,
+        "items": [row[0] for row in rows],
+        "facets": facets,
+        "next_offset": next_offset if next_offset < total else None,
+    }
@@ -0,0 +1,125 @@
+# backend/bench/query_plans.py
+"""
+Planos de execução das consultas quentes antes e depois das migrações de índices.
+
+Cria um SQLite temporário no esquema antigo (sem os índices da migração 1),
+popula com dados sintéticos, captura EXPLAIN QUERY PLAN, aplica as migrações
+e captura de novo.
+
+Uso (dentro de backend/):
+    python -m bench.query_plans [--sales 200000] [--output plans.json]
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, insert, select, text
+
+from app import migrations, models
+
+NEW_INDEXES = ["ix_sales_date", "ix_sales_product_id_date", "ix_products_category_id"]
+
+
+def _queries():
+    """Consultas equivalentes às da API (listagem, filtros e exportação)."""
+    since = datetime(2025, 6, 1)
+    until = datetime(2025, 6, 30)
+    sale = models.Sale
+    return {
+        "sales_latest_by_date": select(sale).order_by(sale.date.desc(), sale.id.desc()).limit(100),
+        "sales_by_date_range": select(sale).where(sale.date >= since, sale.date <= until)
+            .order_by(sale.id.desc()).limit(100),
+        "sales_by_product_and_range": select(sale).where(
+            sale.product_id == 7, sale.date >= since, sale.date <= until
+        ).order_by(sale.date.desc(), sale.id.desc()).limit(100),
+        "products_by_category": select(models.Product).where(models.Product.category_id == 3)
+            .order_by(models.Product.id),
+    }
+
+
+def _seed(engine, n_sales: int, n_products: int = 500, n_categories: int = 20) -> None:
+    rng = random.Random(42)
+    start = datetime(2023, 1, 1)
+    with engine.begin() as conn:
+        conn.execute(insert(models.Category), [
+            {"id": i, "name": f"Categoria {i}", "discount_percentage": 0.0}
+            for i in range(1, n_categories + 1)
+        ])
+        conn.execute(insert(models.Product), [
+            {"id": i, "name": f"Produto {i}", "price": rng.randint(1000, 500000) / 100,
+             "category_id": rng.randint(1, n_categories)}
+            for i in range(1, n_products + 1)
+        ])
+        batch = []
+        for _ in range(n_sales):
+            quantity = rng.randint(1, 5)
+            total = rng.randint(1000, 500000) / 100 * quantity
+            batch.append({
+                "product_id": rng.randint(1, n_products),
+                "quantity": quantity,
+                "total_price": total,
+                "profit": total * 0.30,
+                "date": start + timedelta(minutes=rng.randint(0, 3 * 365 * 24 * 60)),
+            })
+            if len(batch) == 10000:
+                conn.execute(insert(models.Sale), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(models.Sale), batch)
+
+
+def _explain(engine) -> dict:
+    plans = {}
+    with engine.connect() as conn:
+        for name, stmt in _queries().items():
+            sql = str(stmt.compile(engine, compile_kwargs={"literal_binds": True}))
+            plan = [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"))]
+            started = time.perf_counter()
+            conn.execute(stmt).fetchall()
+            plans[name] = {"plan": plan, "ms": round((time.perf_counter() - started) * 1000, 2)}
+    return plans
+
+
+def run(n_sales: int) -> dict:
+    path = os.path.join(tempfile.mkdtemp(prefix="apollo_plans_"), "plans.db")
+    engine = create_engine(f"sqlite:///{path}")
+    try:
+        # Esquema "antigo": tabelas atuais sem os índices introduzidos pela migração 1
+        models.Base.metadata.create_all(bind=engine)
+        with engine.begin() as conn:
+            for index_name in NEW_INDEXES:
+                conn.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+        _seed(engine, n_sales)
+
+        before = _explain(engine)
+        applied = migrations.upgrade(engine)
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+        after = _explain(engine)
+    finally:
+        engine.dispose()
+        os.remove(path)
+
+    return {
+        "sales": n_sales,
+        "migrations_applied": applied,
+        "queries": {name: {"before": before[name], "after": after[name]} for name in before},
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sales", type=int, default=200000)
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: stdout)")
+    args = parser.parse_args()
+
+    report = json.dumps(run(args.sales), indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    else:
+        print(report)
@@ -0,0 +1,411 @@
+# backend/bench/run.py
+"""
+Benchmarks da API em processo (TestClient) contra um SQLite semeado por bench.seed.
+
+Casos: /dashboard-stats/ (cache frio e quente), paginação de /sales/ por
+cursor, /products/search (prefixo e aproximada), /export/* em vários formatos e cada rota de upload de CSV (modos e
+engines). Para cada caso: latência p50/p90/p95/p99, média, vazão e pico de
+RSS do processo. O resultado é um JSON com metadados (commit, versões,
+argumentos), para comparar commits com --compare.
+
+O banco é copiado para um diretório temporário antes de rodar: os uploads
+não alteram o arquivo original e rodadas seguidas partem do mesmo estado.
+
+Uso (dentro de backend/):
+    python -m bench.seed --db bench.db --sales 1000000
+    python -m bench.run --db bench.db --output bench-<commit>.json
+    python -m bench.run --compare bench-antigo.json bench-novo.json [--threshold 10]
+"""
+import argparse
+import csv
+import io
+import json
+import math
+import os
+import platform
+import random
+import resource
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+SALES_ENGINES = ("default", "parallel", "columnar")
+IMPORT_MODES = ("insert", "upsert")
+EXPORT_FORMATS = ("csv", "ndjson", "parquet", "arrow")
+
+# Métricas comparadas em --compare: (chave, maior é melhor)
+COMPARED = [("p50_ms", False), ("p95_ms", False), ("p99_ms", False), ("throughput", True)]
+
+
+# --- Estatísticas ---
+def _percentile(values, q: float) -> float:
+    """Percentil com interpolação linear (values já ordenados)."""
+    if not values:
+        return 0.0
+    position = (len(values) - 1) * q
+    low, high = math.floor(position), math.ceil(position)
+    return values[low] + (values[high] - values[low]) * (position - low)
+
+
+def _peak_rss_mb() -> float:
+    """Pico de RSS do processo (e dos filhos, ex. engine parallel) até agora, em MB."""
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    unit = 1 if sys.platform == "darwin" else 1024
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * unit
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * unit
+    return round(own / 1024 / 1024, 1), round(children / 1024 / 1024, 1)
+
+
+def _summary(latencies, units: float, unit_name: str) -> dict:
+    ordered = sorted(latencies)
+    total = sum(ordered)
+    rss, children_rss = _peak_rss_mb()
+    return {
+        "iterations": len(ordered),
+        "p50_ms": round(_percentile(ordered, 0.50) * 1000, 3),
+        "p90_ms": round(_percentile(ordered, 0.90) * 1000, 3),
+        "p95_ms": round(_percentile(ordered, 0.95) * 1000, 3),
+        "p99_ms": round(_percentile(ordered, 0.99) * 1000, 3),
+        "mean_ms": round(total / len(ordered) * 1000, 3),
+        "min_ms": round(ordered[0] * 1000, 3),
+        "max_ms": round(ordered[-1] * 1000, 3),
+        # Vazão: requisições, linhas ou MB por segundo (ver throughput_unit)
+        "throughput": round(units / total, 2) if total > 0 else None,
+        "throughput_unit": unit_name,
+        "peak_rss_mb": rss,
+        "peak_children_rss_mb": children_rss,
+    }
+
+
+def _measure(name: str, request, iterations: int, warmup: int = 1, before=None, unit_name: str = "req/s") -> dict:
+    """
+    Executa `request()` warmup + iterations vezes e cronometra só as iterações.
+    `request` retorna a quantidade de unidades processadas (1 requisição,
+    linhas importadas ou MB exportados); `before()` roda fora do cronômetro.
+    """
+    for _ in range(warmup):
+        if before:
+            before()
+        request()
+
+    latencies = []
+    units = 0.0
+    for _ in range(iterations):
+        if before:
+            before()
+        started = time.perf_counter()
+        units += request()
+        latencies.append(time.perf_counter() - started)
+
+    result = _summary(latencies, units, unit_name)
+    print(f"  {name:<32} p50={result['p50_ms']:>10.2f} ms  p95={result['p95_ms']:>10.2f} ms  "
+          f"{result['throughput']} {unit_name}", file=sys.stderr)
+    return result
+
+
+def _check(response):
+    if response.status_code >= 400:
+        raise RuntimeError(f"{response.request.method} {response.request.url}: {response.status_code} {response.text[:300]}")
+    return response
+
+
+# --- Casos ---
+def _bench_dashboard(client, cache, args) -> dict:
+    def request():
+        _check(client.get("/dashboard-stats/"))
+        return 1
+
+    return {
+        "dashboard_cold": _measure("dashboard_cold", request, args.iterations, before=cache.clear),
+        "dashboard_warm": _measure("dashboard_warm", request, args.iterations * 10),
+    }
+
+
+def _bench_sales_paging(client, args) -> dict:
+    results = {}
+    for name, params in (
+        ("sales_page_first", {"limit": args.page_size}),
+        ("sales_page_first_slim", {"limit": args.page_size, "slim": "true"}),
+        ("sales_page_date_desc", {"limit": args.page_size, "sort": "date"}),
+    ):
+        def request(params=params):
+            _check(client.get("/sales/", params=params))
+            return 1
+        results[name] = _measure(name, request, args.iterations)
+
+    # Caminha --pages páginas seguindo X-Next-Cursor (cada página é uma amostra)
+    state = {"cursor": None}
+
+    def next_page():
+        params = {"limit": args.page_size}
+        if state["cursor"]:
+            params["cursor"] = state["cursor"]
+        response = _check(client.get("/sales/", params=params))
+        state["cursor"] = response.headers.get("x-next-cursor")
+        return 1
+
+    results["sales_cursor_walk"] = _measure("sales_cursor_walk", next_page, args.pages, warmup=0)
+    return results
+
+
+def _bench_search(client, cache, args) -> dict:
+    # Cache limpo a cada amostra: mede o índice (FTS5), não o cache de rotas
+    results = {}
+    for name, params in (
+        ("search_prefix", {"q": "sams mod"}),
+        ("search_prefix_category", {"q": "modelo", "category_id": 1}),
+        ("search_fuzzy", {"q": "smasung"}),
+    ):
+        def request(params=params):
+            _check(client.get("/products/search", params=params))
+            return 1
+        results[name] = _measure(name, request, args.iterations, before=cache.clear)
+    return results
+
+
+def _bench_exports(client, args, formats) -> dict:
+    results = {}
+    cases = [("products", fmt, False) for fmt in formats]
+    cases += [("sales", fmt, False) for fmt in formats] + [("sales", "csv", True)]
+    for kind, fmt, compress in cases:
+        name = f"export_{kind}_{fmt}" + ("_gzip" if compress else "")
+        params = {"format": fmt, "compress": str(compress).lower()}
+
+        def request(kind=kind, params=params):
+            response = _check(client.get(f"/export/{kind}", params=params))
+            return len(response.content) / 1024 / 1024
+
+        results[name] = _measure(name, request, args.export_iterations, warmup=0, unit_name="MB/s")
+    return results
+
+
+def _csv_bytes(header, rows) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(header)
+    writer.writerows(rows)
+    return buffer.getvalue().encode("utf-8")
+
+
+def _sales_csv(rng: random.Random, product_ids, n_rows: int) -> bytes:
+    """Vendas com preço do cadastro, total informado, datas ISO/BR e algumas linhas inválidas."""
+    start = datetime(2025, 1, 1)
+    rows = []
+    for i in range(n_rows):
+        day = start + timedelta(days=rng.randrange(365))
+        date = day.strftime("%Y-%m-%d") if i % 3 else day.strftime("%d/%m/%Y")
+        total = f"{rng.randint(1000, 500000) / 100:.2f}" if i % 5 == 0 else ""
+        product_id = rng.choice(product_ids) if i % 200 else 999999999
+        rows.append([product_id, rng.randint(1, 5), total, date])
+    return _csv_bytes(["product_id", "quantity", "total_price", "date"], rows)
+
+
+def _bench_uploads(client, args, product_ids, columnar_available: bool) -> dict:
+    rng = random.Random(args.seed)
+    n_rows = args.upload_rows
+    results = {}
+
+    def upload(url, params, payload, rows):
+        def request():
+            files = {"file": ("bench.csv", payload() if callable(payload) else payload, "text/csv")}
+            _check(client.post(url, params=params, files=files))
+            return rows
+        return request
+
+    # Categorias/produtos em modo insert: nomes novos a cada iteração (name é único em categorias)
+    counter = {"round": 0}
+
+    def categories_insert():
+        counter["round"] += 1
+        base = 10_000_000 + counter["round"] * n_rows
+        return _csv_bytes(
+            ["id", "name", "discount_percentage"],
+            [[base + i, f"Bench {base + i}", i % 15] for i in range(n_rows)],
+        )
+
+    categories_upsert = _csv_bytes(
+        ["name", "discount_percentage"], [[f"Bench upsert {i}", i % 15] for i in range(n_rows)]
+    )
+    products = _csv_bytes(
+        ["name", "price", "category_id"],
+        [
+            [f"Bench produto {i}", f"R$ {i % 5000},{i % 100:02d}" if i % 2 else f"{i % 5000}.{i % 100:02d}",
+             1 + i % 10]
+            for i in range(n_rows)
+        ],
+    )
+    sales = _sales_csv(rng, product_ids, n_rows)
+
+    for mode in IMPORT_MODES:
+        payload = categories_insert if mode == "insert" else categories_upsert
+        name = f"upload_categories_{mode}"
+        results[name] = _measure(
+            name, upload("/upload-categories-csv/", {"mode": mode}, payload, n_rows),
+            args.upload_iterations, warmup=0, unit_name="rows/s",
+        )
+    for mode in IMPORT_MODES:
+        name = f"upload_products_{mode}"
+        results[name] = _measure(
+            name, upload("/upload-csv/", {"mode": mode}, products, n_rows),
+            args.upload_iterations, warmup=0, unit_name="rows/s",
+        )
+    for engine in SALES_ENGINES:
+        if engine == "columnar" and not columnar_available:
+            continue
+        name = f"upload_sales_{engine}"
+        results[name] = _measure(
+            name, upload("/upload-sales-csv/", {"engine": engine}, sales, n_rows),
+            args.upload_iterations, warmup=0, unit_name="rows/s",
+        )
+    return results
+
+
+# --- Metadados ---
+def _git(*command) -> str:
+    try:
+        return subprocess.run(
+            ["git", *command], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _version(module_name: str):
+    try:
+        module = __import__(module_name)
+    except ImportError:
+        return None
+    return getattr(module, "__version__", None)
+
+
+def _meta(args, db_path: str) -> dict:
+    with sqlite3.connect(db_path) as conn:
+        counts = {
+            table: conn.execute(f"SELECT count(*) FROM {table}").fetchone()[0]
+            for table in ("categories", "products", "sales", "sales_daily")
+        }
+    return {
+        "started_at": datetime.utcnow().isoformat(timespec="seconds") + "Z",
+        "git_commit": _git("rev-parse", "HEAD"),
+        "git_dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "sqlite": sqlite3.sqlite_version,
+        "versions": {name: _version(name) for name in ("fastapi", "sqlalchemy", "pydantic", "numpy", "pyarrow")},
+        "db_rows": counts,
+        "args": {key: value for key, value in vars(args).items() if key != "compare"},
+    }
+
+
+# --- Execução ---
+def run(args) -> dict:
+    if not os.path.exists(args.db):
+        raise SystemExit(f"Banco {args.db} não encontrado. Gere com: python -m bench.seed --db {args.db}")
+
+    workdir = tempfile.mkdtemp(prefix="apollo_bench_")
+    db_path = os.path.join(workdir, "bench.db")
+    shutil.copyfile(args.db, db_path)
+    meta = _meta(args, db_path)
+
+    # A URL precisa estar definida antes de importar o app (app.database lê no import)
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    from fastapi.testclient import TestClient
+
+    from app import cache, columnar_import, exports
+    from app.main import app
+
+    with sqlite3.connect(db_path) as conn:
+        product_ids = [row[0] for row in conn.execute("SELECT id FROM products ORDER BY id")]
+    formats = [fmt for fmt in EXPORT_FORMATS if fmt not in exports.COLUMNAR_FORMATS or exports.ARROW_AVAILABLE]
+    groups = set(args.only or ("dashboard", "sales", "search", "exports", "uploads"))
+
+    results = {}
+    started = time.perf_counter()
+    try:
+        with TestClient(app) as client:
+            if "dashboard" in groups:
+                results.update(_bench_dashboard(client, cache, args))
+            if "sales" in groups:
+                results.update(_bench_sales_paging(client, args))
+            if "search" in groups:
+                results.update(_bench_search(client, cache, args))
+            if "exports" in groups:
+                results.update(_bench_exports(client, args, formats))
+            # Uploads por último: alteram o banco (cópia) usado pelos demais casos
+            if "uploads" in groups:
+                results.update(_bench_uploads(client, args, product_ids, columnar_import.COLUMNAR_AVAILABLE))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    rss, children_rss = _peak_rss_mb()
+    meta["seconds"] = round(time.perf_counter() - started, 2)
+    meta["peak_rss_mb"] = rss
+    meta["peak_children_rss_mb"] = children_rss
+    return {"meta": meta, "results": results}
+
+
+def compare(old_path: str, new_path: str, threshold: float) -> int:
+    """Imprime a variação de cada caso; retorna 1 se alguma métrica piorou além de threshold (%)."""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+
+    print(f"antes:  {old['meta'].get('git_commit')}  ({old['meta'].get('started_at')})")
+    print(f"depois: {new['meta'].get('git_commit')}  ({new['meta'].get('started_at')})")
+    regressions = []
+    for name, result in new["results"].items():
+        previous = old["results"].get(name)
+        if previous is None:
+            print(f"{name:<32} (novo)")
+            continue
+        cells = []
+        for key, higher_is_better in COMPARED:
+            before, after = previous.get(key), result.get(key)
+            if not before or after is None:
+                continue
+            change = (after - before) / before * 100
+            worse = -change if higher_is_better else change
+            flag = " !" if worse > threshold else ""
+            if flag:
+                regressions.append(f"{name}.{key}")
+            cells.append(f"{key}={before:g}->{after:g} ({change:+.1f}%){flag}")
+        print(f"{name:<32} " + "  ".join(cells))
+
+    if regressions:
+        print(f"\nRegressões acima de {threshold:g}%: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default="bench.db", help="Banco gerado por bench.seed (não é alterado)")
+    parser.add_argument("--output", help="Arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument("--only", nargs="+", choices=("dashboard", "sales", "search", "exports", "uploads"))
+    parser.add_argument("--iterations", type=int, default=50, help="Amostras por caso de leitura")
+    parser.add_argument("--pages", type=int, default=200, help="Páginas percorridas no cursor walk")
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--export-iterations", type=int, default=3)
+    parser.add_argument("--upload-rows", type=int, default=20000)
+    parser.add_argument("--upload-iterations", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--compare", nargs=2, metavar=("ANTES", "DEPOIS"), help="Compara dois JSONs")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Piora (%%) que conta como regressão")
+    args = parser.parse_args()
+
+    if args.compare:
+        sys.exit(compare(*args.compare, args.threshold))
+
+    report = json.dumps(run(args), indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report)
+    else:
+        print(report)
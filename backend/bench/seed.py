@@ -0,0 +1,208 @@
+# backend/bench/seed.py
+"""
+Gera um banco SQLite com catálogo e histórico de vendas realistas para benchmarks.
+
+- categorias e produtos com preços log-normais (terminados em ,90/,99);
+- popularidade dos produtos em Zipf (poucos produtos concentram as vendas);
+- sazonalidade: fim de semana, novembro/dezembro e crescimento ao longo do período;
+- vendas em ordem cronológica (IDs crescem com a data, como em produção).
+
+A carga usa executemany em lotes grandes com valores já em centavos, cria os
+índices de sales só depois da carga e reconstrói sales_daily no final.
+Mesma --seed, mesmo banco: os resultados são comparáveis entre commits.
+
+Uso (dentro de backend/):
+    python -m bench.seed --db bench.db [--products 2000] [--sales 1000000] [--days 730]
+"""
+import argparse
+import json
+import math
+import os
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from sqlalchemy import (
+    BigInteger, Column, DateTime, Integer, MetaData, String, Table, create_engine, event, insert, text
+)
+from sqlalchemy.orm import Session
+
+from app import migrations, models, pricing, rollup
+
+BATCH_ROWS = 50000
+
+CATEGORY_NAMES = [
+    "Smartphones", "TVs", "Laptops", "Refrigerators", "Tablets", "Headphones", "Monitors",
+    "Cameras", "Consoles", "Printers", "Smartwatches", "Speakers", "Routers", "Projectors",
+]
+BRANDS = ["Samsung", "LG", "Apple", "Sony", "Dell", "Lenovo", "Motorola", "Philips", "Xiaomi", "Asus"]
+
+# Quantidade por venda: a maioria leva 1 unidade
+QUANTITIES = [1, 2, 3, 4, 5]
+QUANTITY_WEIGHTS = [60, 20, 10, 6, 4]
+
+# Colunas físicas (centavos) de sales: a carga não passa pelo tipo Money a cada linha
+_raw_metadata = MetaData()
+_raw_sales = Table(
+    "sales", _raw_metadata,
+    Column("product_id", Integer),
+    Column("quantity", Integer),
+    Column("total_price_cents", BigInteger),
+    Column("profit_cents", BigInteger),
+    Column("date", DateTime),
+)
+_raw_products = Table(
+    "products", _raw_metadata,
+    Column("id", Integer),
+    Column("name", String),
+    Column("price_cents", BigInteger),
+    Column("category_id", Integer),
+)
+SALES_INDEXES = [index.name for index in models.Sale.__table__.indexes]
+
+
+def _bulk_pragmas(dbapi_connection, connection_record):
+    # Banco descartável: sem journal nem fsync durante a carga
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode = OFF")
+    cursor.execute("PRAGMA synchronous = OFF")
+    cursor.execute("PRAGMA cache_size = -262144")
+    cursor.execute("PRAGMA temp_store = MEMORY")
+    cursor.close()
+
+
+def _price_cents(rng: random.Random) -> int:
+    """Preço log-normal entre ~R$ 20 e ~R$ 20.000, terminado em ,90 ou ,99."""
+    reais = min(max(int(rng.lognormvariate(6.5, 1.1)), 19), 19999)
+    return reais * 100 + rng.choice((90, 99))
+
+
+def _day_weights(start: datetime, days: int):
+    """Peso relativo de cada dia: dia da semana × mês × tendência de crescimento."""
+    weekday = [0.9, 0.85, 0.9, 0.95, 1.1, 1.35, 1.2]
+    month = [0.8, 0.75, 0.9, 0.9, 1.0, 0.95, 1.0, 1.0, 0.95, 1.0, 1.6, 1.8]
+    weights = []
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        trend = 1 + 0.5 * offset / max(days - 1, 1)
+        weights.append(weekday[day.weekday()] * month[day.month - 1] * trend)
+    return weights
+
+
+def _sales_per_day(rng: random.Random, total: int, weights) -> list:
+    """Distribui `total` vendas entre os dias proporcionalmente aos pesos (soma exata)."""
+    scale = total / sum(weights)
+    counts = [int(w * scale) for w in weights]
+    for index in rng.choices(range(len(weights)), weights=weights, k=total - sum(counts)):
+        counts[index] += 1
+    return counts
+
+
+def seed(path: str, n_products: int = 2000, n_categories: int = 40, n_sales: int = 1000000,
+         days: int = 730, zipf: float = 1.1, seed_value: int = 42, start: datetime = None) -> dict:
+    """Cria (ou recria) o banco em `path` e retorna um resumo da carga."""
+    rng = random.Random(seed_value)
+    start = start or datetime(2024, 1, 1)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+
+    started = time.perf_counter()
+    engine = create_engine(f"sqlite:///{path}")
+    event.listen(engine, "connect", _bulk_pragmas)
+    migrations.upgrade(engine)
+
+    # --- Catálogo ---
+    categories = [
+        {"id": i, "name": f"{CATEGORY_NAMES[(i - 1) % len(CATEGORY_NAMES)]} {(i - 1) // len(CATEGORY_NAMES) + 1}",
+         "discount_percentage": rng.choice((0.0, 0.0, 5.0, 10.0))}
+        for i in range(1, n_categories + 1)
+    ]
+    products = [
+        {"id": i, "name": f"{rng.choice(BRANDS)} Modelo {i:05d}",
+         "price_cents": _price_cents(rng), "category_id": rng.randint(1, n_categories)}
+        for i in range(1, n_products + 1)
+    ]
+    prices = [product["price_cents"] for product in products]
+
+    # Popularidade Zipf sobre uma ordem aleatória dos produtos
+    ranked = list(range(1, n_products + 1))
+    rng.shuffle(ranked)
+    popularity = list(accumulate(1 / math.pow(rank, zipf) for rank in range(1, n_products + 1)))
+
+    with engine.begin() as conn:
+        conn.execute(insert(models.Category), categories)
+        conn.execute(insert(_raw_products), products)
+        # Índices de sales são recriados depois da carga (inserção sem manutenção de árvore)
+        for index_name in SALES_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {index_name}"))
+
+    # --- Vendas, dia a dia ---
+    catalog_seconds = time.perf_counter() - started
+    counts = _sales_per_day(rng, n_sales, _day_weights(start, days))
+    batch = []
+    with engine.begin() as conn:
+        for offset, count in enumerate(counts):
+            if not count:
+                continue
+            day = start + timedelta(days=offset)
+            product_ids = rng.choices(ranked, cum_weights=popularity, k=count)
+            quantities = rng.choices(QUANTITIES, weights=QUANTITY_WEIGHTS, k=count)
+            seconds = sorted(rng.randrange(86400) for _ in range(count))
+            for product_id, quantity, second in zip(product_ids, quantities, seconds):
+                total = prices[product_id - 1] * quantity
+                batch.append({
+                    "product_id": product_id,
+                    "quantity": quantity,
+                    "total_price_cents": total,
+                    # Sem custo cadastrado: margem padrão, como pricing.margin_cents
+                    "profit_cents": pricing.margin_cents(total),
+                    "date": day + timedelta(seconds=second),
+                })
+            if len(batch) >= BATCH_ROWS:
+                conn.execute(insert(_raw_sales), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(_raw_sales), batch)
+    sales_seconds = time.perf_counter() - started - catalog_seconds
+
+    with engine.begin() as conn:
+        for index_name in SALES_INDEXES:
+            migrations.create_index_if_missing(conn, models.Sale.__table__, index_name)
+    with Session(engine) as db:
+        daily_rows = rollup.rebuild(db)
+    with engine.begin() as conn:
+        conn.execute(text("ANALYZE"))
+    engine.dispose()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "db": path,
+        "categories": n_categories,
+        "products": n_products,
+        "sales": n_sales,
+        "sales_daily": daily_rows,
+        "days": days,
+        "seed": seed_value,
+        "seconds": round(elapsed, 2),
+        "sales_insert_seconds": round(sales_seconds, 2),
+        "sales_per_second": round(n_sales / sales_seconds, 1) if sales_seconds > 0 else None,
+        "size_mb": round(os.path.getsize(path) / 1024 / 1024, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default="bench.db", help="Arquivo SQLite (recriado)")
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--categories", type=int, default=40)
+    parser.add_argument("--sales", type=int, default=1000000)
+    parser.add_argument("--days", type=int, default=730, help="Dias de histórico a partir de --start")
+    parser.add_argument("--start", type=lambda s: datetime.strptime(s, "%Y-%m-%d"), default=datetime(2024, 1, 1))
+    parser.add_argument("--zipf", type=float, default=1.1, help="Expoente da popularidade dos produtos")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    summary = seed(args.db, args.products, args.categories, args.sales, args.days, args.zipf, args.seed, args.start)
+    print(json.dumps(summary, indent=2, ensure_ascii=False))
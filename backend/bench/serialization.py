@@ -0,0 +1,122 @@
+# backend/bench/serialization.py
+"""
+Compara os dois caminhos de serialização das listagens, sem HTTP:
+
+- orm: SELECT de objetos ORM (com joinedload de produto/categoria) +
+  validação por item nos schemas (from_attributes) + json.dumps, como o
+  FastAPI faz ao receber objetos com response_model;
+- rows: SELECT só das colunas (rows=True) + dicionários + orjson
+  (app/fast_json.py), o caminho atual de /products/ e /sales/.
+
+Para cada caminho e tamanho de página: tempo da consulta, da serialização e
+total (mediana de --repeat rodadas) e linhas/s. Também confere se os dois
+JSONs são iguais.
+
+Uso (dentro de backend/):
+    python -m bench.serialization --db bench.db [--rows 1000 10000] [--repeat 5]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import List
+
+
+def _median_ms(values) -> float:
+    return round(statistics.median(values) * 1000, 2)
+
+
+def _run_case(db, kind: str, limit: int, repeat: int, slim: bool) -> dict:
+    from pydantic import TypeAdapter
+
+    from app import crud, fast_json, schemas
+
+    if kind == "sales":
+        adapter = TypeAdapter(List[schemas.Sale])
+        page = lambda rows: crud.get_sales_page(db, limit=limit, slim=slim, rows=rows)[0]
+        to_dict = fast_json.sale_dict
+    else:
+        adapter = TypeAdapter(List[schemas.Product])
+        page = lambda rows: crud.get_products_page(db, limit=limit, slim=slim, rows=rows)[0]
+        to_dict = fast_json.product_dict
+
+    def orm_path():
+        started = time.perf_counter()
+        objects = page(False)
+        queried = time.perf_counter()
+        validated = adapter.validate_python(objects, from_attributes=True)
+        body = json.dumps(
+            adapter.dump_python(validated, mode="json"), ensure_ascii=False, separators=(",", ":")
+        ).encode()
+        db.expunge_all()
+        return queried - started, time.perf_counter() - queried, body
+
+    def rows_path():
+        started = time.perf_counter()
+        rows = page(True)
+        queried = time.perf_counter()
+        body = fast_json.dumps([to_dict(row, slim) for row in rows])
+        return queried - started, time.perf_counter() - queried, body
+
+    result = {}
+    bodies = {}
+    for name, path in (("orm", orm_path), ("rows", rows_path)):
+        path()  # aquecimento (cache do SQLite e compilação das consultas)
+        query_times, serialize_times = [], []
+        for _ in range(repeat):
+            query_seconds, serialize_seconds, body = path()
+            query_times.append(query_seconds)
+            serialize_times.append(serialize_seconds)
+        bodies[name] = body
+        rows = len(json.loads(body))
+        total = statistics.median(q + s for q, s in zip(query_times, serialize_times))
+        result[name] = {
+            "rows": rows,
+            "query_ms": _median_ms(query_times),
+            "serialize_ms": _median_ms(serialize_times),
+            "total_ms": round(total * 1000, 2),
+            "rows_per_second": round(rows / total, 1) if total > 0 else None,
+            "bytes": len(body),
+        }
+        print(f"  {kind:<8} limit={limit:<6} slim={str(slim):<5} {name:<4} "
+              f"query={result[name]['query_ms']:>8.2f} ms  serialize={result[name]['serialize_ms']:>8.2f} ms  "
+              f"total={result[name]['total_ms']:>8.2f} ms", file=sys.stderr)
+
+    result["same_json"] = bodies["orm"] == bodies["rows"]
+    result["speedup"] = round(result["orm"]["total_ms"] / result["rows"]["total_ms"], 2) if result["rows"]["total_ms"] else None
+    return result
+
+
+def run(args) -> dict:
+    if not os.path.exists(args.db):
+        raise SystemExit(f"Banco {args.db} não encontrado. Gere com: python -m bench.seed --db {args.db}")
+    # A URL precisa estar definida antes de importar o app (app.database lê no import)
+    os.environ["DATABASE_URL"] = f"sqlite:///{args.db}"
+    from app import fast_json
+    from app.database import SessionLocal
+
+    results = {}
+    with SessionLocal() as db:
+        for kind in ("sales", "products"):
+            for limit in args.rows:
+                for slim in (False, True):
+                    results[f"{kind}_{limit}{'_slim' if slim else ''}"] = _run_case(db, kind, limit, args.repeat, slim)
+    return {"meta": {"db": args.db, "orjson": fast_json.ORJSON_AVAILABLE, "repeat": args.repeat}, "results": results}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--db", default="bench.db")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000], help="Tamanhos de página")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Grava o JSON do resultado neste arquivo")
+    args = parser.parse_args()
+
+    report = run(args)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
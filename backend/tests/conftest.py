@@ -0,0 +1,105 @@
+# backend/tests/conftest.py
+"""
+Fixtures comuns: um banco SQLite temporário (DATABASE_URL precisa estar
+definida antes de importar o app, que cria as tabelas no import), o cliente
+HTTP e um contador de comandos SQL.
+
+Cada teste começa com as tabelas vazias e o cache limpo.
+"""
+import itertools
+import os
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+_TMP_DIR = tempfile.mkdtemp(prefix="apollo-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TMP_DIR, 'test.db')}"
+os.environ["CACHE_BACKEND"] = "memory"
+os.environ["ARCHIVE_DIR"] = os.path.join(_TMP_DIR, "archive")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, event
+
+from app import cache, crud, models, pricing, schemas
+from app.database import SessionLocal, engine
+from app.main import app
+
+_names = itertools.count()
+
+# Ordem de limpeza (filhas antes das tabelas referenciadas)
+_TABLES = [
+    models.SalesArchive, models.DailySales, models.Sale, models.Product, models.Category, models.ImportJob,
+]
+
+
+@pytest.fixture(autouse=True)
+def clean_database():
+    with SessionLocal() as db:
+        for model in _TABLES:
+            db.execute(delete(model))
+        db.commit()
+    cache.clear()
+    pricing.invalidate()
+    yield
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@contextmanager
+def _count_queries():
+    """Conta os comandos SQL enviados ao banco dentro do bloco (lista com um contador)."""
+    counter = [0]
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        counter[0] += 1
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def _seed(db, products: int, sales_per_product: int, categories: int = 3, start=None) -> list:
+    """Cria categorias, produtos e vendas pelos caminhos normais do crud. Retorna os IDs dos produtos."""
+    start = start or datetime(2025, 1, 1, 12, 0)
+    category_ids = [
+        crud.create_category(db, schemas.CategoryCreate(name=f"Categoria {next(_names)}", discount_percentage=0)).id
+        for _ in range(categories)
+    ]
+    product_ids = [
+        crud.create_product(db, schemas.ProductCreate(
+            name=f"Produto {next(_names)}", price=10 + i, category_id=category_ids[i % categories]
+        )).id
+        for i in range(products)
+    ]
+    crud.create_sales_batch(db, [
+        schemas.SaleCreate(product_id=product_id, quantity=1 + n % 3, date=start + timedelta(days=n * 7))
+        for product_id in product_ids
+        for n in range(sales_per_product)
+    ])
+    return product_ids
+
+
+@pytest.fixture
+def count_queries():
+    return _count_queries
+
+
+@pytest.fixture
+def seed(db):
+    return lambda *args, **kwargs: _seed(db, *args, **kwargs)
@@ -0,0 +1,105 @@
+# backend/tests/test_analytics.py
+"""Média móvel de /analytics/sales conferida contra a própria série da resposta."""
+from datetime import date, datetime
+
+import pytest
+
+from app import crud, models, schemas
+
+WINDOW = 3
+
+
+def _month(period: str) -> int:
+    return int(period[:4]) * 12 + int(period[5:7])
+
+
+def _expected(series, metric: str):
+    """Média dos últimos WINDOW meses de cada grupo (key); meses sem vendas contam como zero."""
+    first = min(_month(point["period"]) for point in series)
+    values = {(point.get("key"), _month(point["period"])): point[metric] for point in series}
+    expected = []
+    for point in series:
+        month = _month(point["period"])
+        window = range(max(first, month - WINDOW + 1), month + 1)
+        expected.append(sum(values.get((point.get("key"), m), 0) for m in window) / len(window))
+    return expected
+
+
+@pytest.mark.parametrize("metric", ["total_sales", "profit", "quantity", "sale_count"])
+@pytest.mark.parametrize("source", ["rollup", "sales"])
+@pytest.mark.parametrize("group_by", ["none", "product"])
+def test_moving_average_matches_series(client, seed, metric, source, group_by):
+    seed(products=3, sales_per_product=20)
+    response = client.get("/analytics/sales", params={
+        "metric": metric, "source": source, "group_by": group_by, "moving_average": WINDOW,
+    })
+    assert response.status_code == 200, response.text
+    series = response.json()["series"]
+    assert len(series) > WINDOW
+
+    actual = [point["moving_average"] for point in series]
+    assert actual == pytest.approx(_expected(series, metric), abs=0.005)
+
+
+def test_moving_average_in_reais(client, seed):
+    # Uma única venda de R$ 10,00: a média sai em reais (10.0), não em centavos (1000.0)
+    seed(products=1, sales_per_product=1)
+    series = client.get("/analytics/sales", params={"moving_average": WINDOW}).json()["series"]
+    assert series[0]["moving_average"] == pytest.approx(series[0]["total_sales"])
+    assert series[0]["moving_average"] < 100
+
+
+@pytest.mark.parametrize("granularity, dates", [
+    ("day", ["2025-01-01", "2025-01-03"]),
+    ("week", ["2025-01-06", "2025-01-20"]),
+    ("month", ["2025-01-15", "2025-03-15"]),
+])
+@pytest.mark.parametrize("source", ["rollup", "sales"])
+def test_moving_average_counts_empty_periods(client, seed, db, granularity, dates, source):
+    # R$ 10,00 no 1º e no 3º período: com janela 2, o período vazio do meio vale zero
+    product_id = seed(products=1, sales_per_product=0)[0]
+    crud.create_sales_batch(db, [
+        schemas.SaleCreate(product_id=product_id, quantity=1, date=datetime.fromisoformat(day))
+        for day in dates
+    ])
+    series = client.get("/analytics/sales", params={
+        "granularity": granularity, "source": source, "moving_average": 2,
+    }).json()["series"]
+    assert [point["moving_average"] for point in series] == pytest.approx([10.0, 5.0])
+
+
+def test_moving_average_window_starts_at_start_date(client, seed, db):
+    product_id = seed(products=1, sales_per_product=0)[0]
+    crud.create_sales_batch(db, [schemas.SaleCreate(product_id=product_id, quantity=1, date=datetime(2025, 1, 15))])
+    series = client.get("/analytics/sales", params={
+        "start_date": date(2024, 12, 1).isoformat(), "moving_average": 2,
+    }).json()["series"]
+    assert [point["moving_average"] for point in series] == pytest.approx([5.0])
+
+
+def test_rename_refreshes_cached_names(client, seed, db):
+    # Renomear produto/categoria não toca no DASHBOARD: o cache e o ETag têm de mudar mesmo assim
+    product_id = seed(products=1, sales_per_product=2, categories=1)[0]
+    product = db.get(models.Product, product_id)
+    params = {"group_by": "product"}
+    first = client.get("/analytics/sales", params=params)
+
+    response = client.put(f"/{product_id}", json={
+        "name": "Produto renomeado", "price": float(product.price), "category_id": product.category_id,
+    })
+    assert response.status_code == 200, response.text
+    second = client.get("/analytics/sales", params=params,
+                        headers={"If-None-Match": first.headers["etag"]})
+    assert second.status_code == 200
+    assert {group["name"] for group in second.json()["groups"]} == {"Produto renomeado"}
+
+    params = {"group_by": "category"}
+    before = client.get("/analytics/sales", params=params)
+    csv_body = f"id;name;discount_percentage\n{product.category_id};Categoria renomeada;0\n"
+    response = client.post("/upload-categories-csv/", params={"mode": "upsert"},
+                           files={"file": ("categorias.csv", csv_body.encode(), "text/csv")})
+    assert response.status_code == 200, response.text
+    after = client.get("/analytics/sales", params=params,
+                       headers={"If-None-Match": before.headers["etag"]})
+    assert after.status_code == 200
+    assert {group["name"] for group in after.json()["groups"]} == {"Categoria renomeada"}
@@ -0,0 +1,54 @@
+# backend/tests/test_archive.py
+"""Arquivamento mensal: dashboard e exportações iguais antes e depois, e restauração."""
+from sqlalchemy import func, select
+
+from app import archive, models, rollup
+
+
+def _export(client, **params):
+    response = client.get("/export/sales", params=params)
+    assert response.status_code == 200, response.text
+    return sorted(response.text.splitlines())
+
+
+def _sales_count(db):
+    return db.execute(select(func.count(models.Sale.id))).scalar()
+
+
+def test_archive_keeps_dashboard_and_exports(client, db, seed):
+    seed(products=3, sales_per_product=12)   # semanais a partir de jan/2025
+    dashboard = client.get("/dashboard-stats/").json()
+    exported = _export(client)
+    ndjson = _export(client, format="ndjson")
+
+    results = archive.archive_closed(db, keep_months=0)
+    assert [r["month"] for r in results] == ["2025-01", "2025-02", "2025-03"]
+    assert _sales_count(db) == 0
+
+    assert client.get("/dashboard-stats/").json() == dashboard
+    assert _export(client) == exported
+    assert _export(client, format="ndjson") == ndjson
+    assert len(client.get("/sales/archives").json()) == 3
+
+    # Período: só as vendas (e os arquivos) de fevereiro
+    february = _export(client, since_date="2025-02-01", until_date="2025-02-28")
+    assert 1 < len(february) < len(exported)
+    assert all(",2025-02-" in line for line in february if not line.startswith("ID"))
+
+    # O recálculo preserva os agregados dos meses arquivados
+    rollup.rebuild(db)
+    assert client.get("/dashboard-stats/").json() == dashboard
+
+    assert archive.archive_closed(db, keep_months=0) == []
+
+
+def test_restore_month(client, db, seed):
+    seed(products=2, sales_per_product=6)
+    total = _sales_count(db)
+    exported = _export(client)
+    archive.archive_closed(db, keep_months=0)
+
+    restored = sum(archive.restore_month(db, r.month) for r in db.query(models.SalesArchive).all())
+    assert restored == total == _sales_count(db)
+    assert _export(client) == exported
+    assert client.get("/sales/archives").json() == []
@@ -0,0 +1,47 @@
+# backend/tests/test_cache.py
+"""
+Um invalidate() que chega enquanto o loader roda descarta o resultado dele:
+o valor calculado antes da escrita não pode ficar servido pelo TTL inteiro.
+"""
+import asyncio
+
+import pytest
+
+from app import cache
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, monkeypatch, tmp_path):
+    if request.param == "sqlite":
+        instance = cache.SQLiteBackend(str(tmp_path / "cache.db"), cache.CACHE_MAX_ENTRIES)
+    else:
+        instance = cache.MemoryBackend(cache.CACHE_MAX_ENTRIES, cache.CACHE_TTL_SECONDS)
+    monkeypatch.setattr(cache, "_backend", instance)
+    return instance
+
+
+def test_get_or_set_skips_value_loaded_before_invalidate(backend):
+    def stale_loader():
+        cache.invalidate(cache.PRODUCTS)   # escrita concorrente durante a consulta
+        return "velho"
+
+    assert cache.get_or_set(cache.PRODUCTS, "lista", stale_loader) == "velho"
+    assert cache.get_or_set(cache.PRODUCTS, "lista", lambda: "novo") == "novo"
+    assert cache.get_or_set(cache.PRODUCTS, "lista", lambda: "outro") == "novo"
+
+
+def test_aget_or_set_skips_value_loaded_before_invalidate(backend):
+    async def stale_loader():
+        cache.invalidate(cache.DASHBOARD)
+        return "velho"
+
+    async def loader(value):
+        return value
+
+    async def scenario():
+        first = await cache.aget_or_set(cache.DASHBOARD, "stats", stale_loader)
+        second = await cache.aget_or_set(cache.DASHBOARD, "stats", lambda: loader("novo"))
+        third = await cache.aget_or_set(cache.DASHBOARD, "stats", lambda: loader("outro"))
+        return first, second, third
+
+    assert asyncio.run(scenario()) == ("velho", "novo", "novo")
@@ -0,0 +1,95 @@
+# backend/tests/test_events.py
+"""Feed do dashboard: escritas que acontecem enquanto o snapshot é lido."""
+import asyncio
+
+from app import cache, crud, events, schemas
+
+
+def _first_messages(load_snapshot, count: int = 2, timeout: float = 2.0):
+    """Conecta um assinante e coleta as primeiras `count` mensagens do feed (sem pings)."""
+    async def run():
+        subscriber = events.broadcaster.subscribe()
+        messages = []
+        try:
+            async def collect():
+                async for kind, data in events.feed(subscriber, load_snapshot):
+                    if kind != "ping":
+                        messages.append((kind, data))
+                    if len(messages) == count:
+                        return
+            await asyncio.wait_for(collect(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            events.broadcaster.unsubscribe(subscriber)
+        return messages
+
+    return asyncio.run(run())
+
+
+def _stats(db):
+    return cache.get_or_set(cache.DASHBOARD, "stats", lambda: crud.get_dashboard_stats(db))
+
+
+def test_write_during_snapshot_load_is_delivered(db, seed):
+    product_id = seed(products=1, sales_per_product=1)[0]
+    before = _stats(db)
+
+    async def load_snapshot():
+        # O snapshot é lido (do cache) e só então a venda é confirmada: o delta
+        # dela chega durante a leitura e não pode ser descartado
+        snapshot = _stats(db)
+        crud.create_sales_batch(db, [schemas.SaleCreate(product_id=product_id, quantity=2)])
+        return snapshot
+
+    messages = _first_messages(load_snapshot)
+    assert [kind for kind, _ in messages] == ["snapshot", "delta"]
+    assert messages[0][1] == before
+    assert messages[1][1]["kpis"]["sale_count"] == 1
+
+
+def test_write_before_snapshot_load_is_not_repeated(db, seed):
+    product_id = seed(products=1, sales_per_product=1)[0]
+
+    async def load_snapshot():
+        return _stats(db)
+
+    async def run():
+        subscriber = events.broadcaster.subscribe()
+        try:
+            # Publicada antes da leitura: já está no snapshot, o delta sai do pendente
+            crud.create_sales_batch(db, [schemas.SaleCreate(product_id=product_id, quantity=1)])
+            stream = events.feed(subscriber, load_snapshot)
+            kind, snapshot = await stream.__anext__()
+            return kind, snapshot, await subscriber.next(0.2)
+        finally:
+            events.broadcaster.unsubscribe(subscriber)
+
+    kind, snapshot, pending = asyncio.run(run())
+    assert kind == "snapshot"
+    assert snapshot == crud.get_dashboard_stats(db)
+    assert pending is None
+
+
+def test_dashboard_cache_is_invalidated_before_publish(db, seed, monkeypatch):
+    product_id = seed(products=1, sales_per_product=1)[0]
+    _stats(db)
+    versions_at_publish = []
+    publish = events.broadcaster.publish
+
+    def recording_publish(delta):
+        versions_at_publish.append(cache.versions(cache.DASHBOARD))
+        publish(delta)
+
+    async def run():
+        subscriber = events.broadcaster.subscribe()
+        try:
+            before = cache.versions(cache.DASHBOARD)
+            monkeypatch.setattr(events.broadcaster, "publish", recording_publish)
+            crud.create_sales_batch(db, [schemas.SaleCreate(product_id=product_id, quantity=1)])
+            return before
+        finally:
+            events.broadcaster.unsubscribe(subscriber)
+
+    before = asyncio.run(run())
+    assert versions_at_publish and versions_at_publish[0] != before
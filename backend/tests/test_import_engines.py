@@ -0,0 +1,94 @@
+# backend/tests/test_import_engines.py
+"""
+O mesmo CSV de vendas importado pelos três engines (default, parallel e
+columnar) tem de gerar as mesmas vendas e os mesmos erros.
+"""
+import csv
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app import columnar_import, importers, models, parallel_import
+
+pytestmark = pytest.mark.skipif(
+    not columnar_import.COLUMNAR_AVAILABLE, reason="engine colunar requer numpy e pyarrow"
+)
+
+# Datas válidas e inválidas nos dois formatos aceitos (dias inexistentes inclusive)
+DATES = [
+    "2025-01-15", "15/01/2025", "2024-02-29", "29/02/2024",
+    "2025-02-30", "31/02/2025", "2023-02-29", "29/02/2023", "2025-04-31", "31/04/2025",
+    "2025-13-01", "01/13/2025", "00/01/2025", "2025-00-10",
+    "", "ontem", "2025/01/15", " 2025-01-15",
+]
+
+
+def _write_csv(path, product_ids, rows: int = 800):
+    rng = random.Random(25)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["product_id", "quantity", "total_price", "date"])
+        for _ in range(rows):
+            writer.writerow([
+                rng.choice(product_ids + [999999, "", "x"]),
+                rng.choice(["1", "2", "3.0", "", "abc"]),
+                rng.choice(["", "", "19.90", "1.234,56", "R$ 10,00"]),
+                rng.choice(DATES),
+            ])
+
+
+def _imported(db, started: datetime):
+    """Vendas importadas; datas de "agora" (sem data válida no CSV) viram um marcador."""
+    rows = db.execute(
+        select(models.Sale.product_id, models.Sale.quantity, models.Sale.total_price,
+               models.Sale.profit, models.Sale.date).order_by(models.Sale.id)
+    ).all()
+    return [
+        (product_id, quantity, total_price, profit, "agora" if date >= started else date)
+        for product_id, quantity, total_price, profit, date in rows
+    ]
+
+
+def _run(engine: str, db, path: str):
+    if engine == "columnar":
+        return columnar_import.import_sales_file(db, path, block_rows=100)
+    if engine == "parallel":
+        return parallel_import.import_sales_file(db, path, processes=2)
+    with open(path, "rb") as f:
+        return importers.import_sales(db, importers.open_csv_stream(f))
+
+
+def test_engines_agree(db, seed, tmp_path):
+    product_ids = seed(products=5, sales_per_product=0)
+    path = str(tmp_path / "vendas.csv")
+    _write_csv(path, product_ids)
+
+    results = {}
+    for engine in ("default", "parallel", "columnar"):
+        db.execute(models.Sale.__table__.delete())
+        db.commit()
+        started = datetime.utcnow() - timedelta(seconds=1)
+        report = _run(engine, db, path)
+        results[engine] = (report["sales_added"], report["errors"], _imported(db, started))
+
+    assert results["default"][0] > 0
+    assert results["parallel"] == results["default"]
+    assert results["columnar"] == results["default"]
+
+
+def test_columnar_rejects_impossible_dates(db, seed, tmp_path):
+    product_id = seed(products=1, sales_per_product=0)[0]
+    path = tmp_path / "datas.csv"
+    path.write_text(
+        "product_id,quantity,date\n"
+        f"{product_id},1,31/02/2025\n"
+        f"{product_id},1,2025-02-30\n"
+        f"{product_id},1,29/02/2024\n",
+        encoding="utf-8",
+    )
+    started = datetime.utcnow() - timedelta(seconds=1)
+    columnar_import.import_sales_file(db, str(path))
+    dates = [row[-1] for row in _imported(db, started)]
+    assert dates == ["agora", "agora", datetime(2024, 2, 29)]
@@ -0,0 +1,51 @@
+# backend/tests/test_migrations.py
+"""Migração 2 (valores em centavos) sobre um banco no esquema antigo, com colunas Float."""
+import pytest
+from sqlalchemy import create_engine, inspect, text
+
+from app import migrations
+
+LEGACY_SCHEMA = [
+    "CREATE TABLE categories (id INTEGER PRIMARY KEY, name VARCHAR UNIQUE, discount_percentage FLOAT)",
+    "CREATE TABLE products (id INTEGER PRIMARY KEY, name VARCHAR, price FLOAT, category_id INTEGER)",
+    "CREATE TABLE sales (id INTEGER PRIMARY KEY, product_id INTEGER, quantity INTEGER,"
+    " total_price FLOAT, profit FLOAT, date DATETIME)",
+    "INSERT INTO categories VALUES (1, 'Bebidas', 0)",
+    "INSERT INTO products VALUES (1, 'Café', 19.99, 1)",
+    "INSERT INTO sales VALUES (1, 1, 2, 39.98, 7.5, '2025-01-15 12:00:00')",
+]
+
+
+@pytest.fixture
+def legacy_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'legacy.db'}")
+    with engine.begin() as conn:
+        for statement in LEGACY_SCHEMA:
+            conn.execute(text(statement))
+    yield engine
+    engine.dispose()
+
+
+def _columns(engine, table: str) -> set:
+    return {col["name"] for col in inspect(engine).get_columns(table)}
+
+
+def test_money_migration_converts_to_cents(legacy_engine):
+    assert 2 in migrations.upgrade(legacy_engine)
+
+    assert "price" not in _columns(legacy_engine, "products")
+    with legacy_engine.connect() as conn:
+        assert conn.execute(text("SELECT price_cents FROM products")).scalar() == 1999
+        assert conn.execute(text("SELECT total_price_cents, profit_cents FROM sales")).one() == (3998, 750)
+        assert conn.execute(text("SELECT total_sales_cents FROM sales_daily")).scalar() == 3998
+
+
+def test_money_migration_requires_drop_column(legacy_engine, monkeypatch):
+    monkeypatch.setattr(migrations.sqlite3, "sqlite_version_info", (3, 31, 1))
+
+    with pytest.raises(RuntimeError, match="SQLite 3.35"):
+        migrations.upgrade(legacy_engine)
+
+    # Nada da migração 2 ficou gravado: a coluna antiga segue lá e a versão não foi marcada
+    assert {"price", "price_cents"} & _columns(legacy_engine, "products") == {"price"}
+    assert [done for version, _, done in migrations.status(legacy_engine) if version == 2] == [False]
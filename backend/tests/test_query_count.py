@@ -0,0 +1,51 @@
+# backend/tests/test_query_count.py
+"""
+Número de comandos SQL por requisição das listagens e do dashboard.
+
+Cada rota tem um número fixo de consultas, qualquer que seja o número de
+linhas: uma consulta por linha (N+1, ex. relação carregada sob demanda na
+serialização) aparece aqui como diferença entre o banco pequeno e o grande.
+"""
+import pytest
+
+from app import cache
+
+# (rota, parâmetros, consultas esperadas)
+ROUTES = [
+    ("/products/", {}, 1),
+    ("/products/", {"limit": 50}, 1),
+    ("/sales/", {"limit": 1000}, 1),
+    ("/sales/", {"limit": 1000, "slim": "true"}, 1),
+    ("/sales/", {"limit": 1000, "sort": "date", "category_id": 1}, 1),
+    ("/categories/", {}, 1),
+    ("/dashboard-stats/", {}, 2),
+]
+
+
+def _queries(client, count_queries, path, params) -> int:
+    # Sem cache: a requisição precisa ir ao banco
+    cache.clear()
+    with count_queries() as counter:
+        response = client.get(path, params=params)
+    assert response.status_code == 200, response.text
+    return counter[0]
+
+
+@pytest.mark.parametrize("path,params,expected", ROUTES)
+def test_fixed_query_count(client, seed, count_queries, path, params, expected):
+    seed(products=3, sales_per_product=2)
+    small = _queries(client, count_queries, path, params)
+
+    seed(products=40, sales_per_product=10)
+    large = _queries(client, count_queries, path, params)
+
+    assert small == large == expected
+
+
+def test_listings_return_nested_relations(client, seed):
+    # A contagem só vale se as relações vierem embutidas na mesma consulta
+    seed(products=5, sales_per_product=2)
+    sale = client.get("/sales/", params={"limit": 5}).json()[0]
+    assert sale["product"]["category"]["name"].startswith("Categoria")
+    product = client.get("/products/").json()[0]
+    assert product["category"]["name"].startswith("Categoria")
@@ -0,0 +1,53 @@
+# backend/tests/test_uploads.py
+"""
+Uploads de CSV passando pelo UploadFile do Starlette, inclusive com o
+SpooledTemporaryFile do Python < 3.11 (sem readable()/seekable()).
+"""
+import io
+
+from sqlalchemy import select
+from starlette.datastructures import UploadFile
+
+from app import models
+from app.routers import uploads
+
+CATEGORIES_CSV = "id;name;discount_percentage\n1;Bebidas;5\n2;Limpeza;0\n".encode("utf-8-sig")
+
+
+class LegacySpooledFile:
+    """Como o SpooledTemporaryFile do Python 3.10: só read/seek/tell e o `_file` interno."""
+
+    def __init__(self, data: bytes):
+        self._file = io.BytesIO(data)
+
+    def read(self, *args):
+        return self._file.read(*args)
+
+    def seek(self, *args):
+        return self._file.seek(*args)
+
+    def tell(self):
+        return self._file.tell()
+
+
+def _category_names(db):
+    return db.scalars(select(models.Category.name).order_by(models.Category.id)).all()
+
+
+def test_upload_categories_csv(client, db):
+    response = client.post(
+        "/upload-categories-csv/",
+        files={"file": ("categorias.csv", CATEGORIES_CSV, "text/csv")},
+    )
+
+    assert response.status_code == 200, response.text
+    assert _category_names(db) == ["Bebidas", "Limpeza"]
+
+
+def test_open_upload_without_readable():
+    upload = UploadFile(file=LegacySpooledFile(CATEGORIES_CSV), filename="categorias.csv")
+
+    rows = list(uploads._open_upload(upload))
+
+    assert [row["name"] for row in rows] == ["Bebidas", "Limpeza"]
+    assert rows[0]["discount_percentage"] == "5"